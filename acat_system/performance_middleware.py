@@ -0,0 +1,135 @@
+"""
+ACAT Performance Middleware
+Per-request timing exposed through Server-Timing headers and structured logs
+"""
+
+import itertools
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from apps.core import instrumentation
+
+logger = logging.getLogger('acat.performance')
+
+
+class PerformanceMiddleware:
+    """
+    Records wall time, SQL count/time, cache hits/misses and template render
+    time for every request.
+
+    Must be the first entry in MIDDLEWARE so the wall time covers the whole
+    middleware stack.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERFORMANCE_INSTRUMENTATION', True):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'PERFORMANCE_SERVER_TIMING', True)
+        self.slow_request_ms = getattr(settings, 'PERFORMANCE_SLOW_REQUEST_MS', 1000)
+        self.summary_every = getattr(settings, 'PERFORMANCE_SUMMARY_EVERY', 500)
+        self._request_counter = itertools.count(1)
+        self.metrics = None
+        if getattr(settings, 'METRICS_ENABLED', False):
+            from apps.core import metrics
+            self.metrics = metrics
+        instrumentation.install_cache_instrumentation()
+
+    def __call__(self, request):
+        stats, token = instrumentation.start_request(request)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(instrumentation.db_execute_wrapper)
+                    )
+                response = self.get_response(request)
+            stats.total_time = stats.elapsed()
+        finally:
+            instrumentation.finish_request(token)
+
+        if self.server_timing:
+            response['Server-Timing'] = self.format_server_timing(stats)
+        self.log_request(request, response, stats)
+        instrumentation.view_stats.record(stats)
+        if self.metrics is not None:
+            self.metrics.observe_request(request, response, stats)
+        self.maybe_log_summary()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = instrumentation.current_stats()
+        match = request.resolver_match
+        if stats is not None and match is not None:
+            stats.view_name = match.view_name
+            stats.route = match.route
+
+    def process_template_response(self, request, response):
+        stats = instrumentation.current_stats()
+        if stats is None:
+            return response
+
+        render_started = time.perf_counter()
+        db_time_before = stats.db_time
+
+        def record_render_time(rendered):
+            # Las consultas perezosas evaluadas en la plantilla cuentan como BD
+            elapsed = time.perf_counter() - render_started
+            stats.template_time += elapsed - (stats.db_time - db_time_before)
+
+        response.add_post_render_callback(record_render_time)
+        return response
+
+    @staticmethod
+    def format_server_timing(stats):
+        app_time = max(stats.total_time - stats.db_time - stats.template_time, 0.0)
+        metrics = [
+            f'total;dur={stats.total_time * 1000:.1f}',
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.db_queries} queries"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+            f'app;dur={app_time * 1000:.1f}',
+            f'cache;desc="hit={stats.cache_hits} miss={stats.cache_misses}"',
+        ]
+        return ', '.join(metrics)
+
+    def log_request(self, request, response, stats):
+        duration_ms = stats.total_time * 1000
+        level = logging.INFO if duration_ms >= self.slow_request_ms else logging.DEBUG
+        if not logger.isEnabledFor(level):
+            return
+        fields = {
+            'view': stats.view_name or 'unresolved',
+            'route': stats.route,
+            'method': request.method,
+            'status': getattr(response, 'status_code', None),
+            'duration_ms': round(duration_ms, 1),
+            'db_queries': stats.db_queries,
+            'db_ms': round(stats.db_time * 1000, 1),
+            'template_ms': round(stats.template_time * 1000, 1),
+            'cache_hits': stats.cache_hits,
+            'cache_misses': stats.cache_misses,
+        }
+        logger.log(
+            level,
+            ' '.join(f'{key}={value}' for key, value in fields.items()),
+            extra={'performance': fields},
+        )
+
+    def maybe_log_summary(self):
+        if not self.summary_every:
+            return
+        if next(self._request_counter) % self.summary_every:
+            return
+        for row in instrumentation.view_stats.snapshot(limit=10):
+            logger.info(
+                'hot_view view=%s requests=%d total_s=%.2f avg_ms=%.1f max_ms=%.1f '
+                'avg_queries=%.1f db_s=%.2f template_s=%.2f',
+                row['view'], row['requests'], row['total_time'],
+                row['avg_time'] * 1000, row['max_time'] * 1000,
+                row['avg_db_queries'], row['db_time'], row['template_time'],
+            )
@@ -0,0 +1,46 @@
+"""
+Read replica routing per request.
+
+Requests to views marked with ``@read_replica`` read from a replica (see
+apps.core.db_routing); any request that writes pins the client to the
+primary for REPLICA_STICKY_SECONDS through a cookie.
+"""
+
+import time
+
+from django.conf import settings
+
+from apps.core import db_routing
+
+
+class ReplicaRoutingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REPLICA_DATABASES:
+            return self.get_response(request)
+
+        # Reads go to the primary until process_view decides otherwise
+        with db_routing.use_replica(enabled=False) as state:
+            request.db_routing = state
+            response = self.get_response(request)
+
+        if state.wrote:
+            until = time.time() + settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                db_routing.STICKY_COOKIE, f'{until:.0f}',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+                secure=request.is_secure(),
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = getattr(request, 'db_routing', None)
+        if (state is not None and request.method in db_routing.SAFE_METHODS
+                and db_routing.wants_replica(view_func)
+                and not db_routing.pinned_to_primary(request)):
+            state.replica = True
+        return None
@@ -11,7 +11,8 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -51,6 +52,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "acat_system.performance_middleware.PerformanceMiddleware",  # Debe ir primero
+    "acat_system.replica_middleware.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -89,15 +92,77 @@ WSGI_APPLICATION = "acat_system.wsgi.application"
 # Database configuration will be set in environment-specific settings
 DATABASES = {
     "default": {
-        "ENGINE": "django.contrib.gis.db.backends.postgis",
+        "ENGINE": "apps.core.db_backend",  # PostGIS con métricas de conexiones
         "NAME": config('DB_NAME', default='acat_system'),
         "USER": config('DB_USER', default='acat_user'),
         "PASSWORD": config('DB_PASSWORD', default='password'),
         "HOST": config('DB_HOST', default='localhost'),
         "PORT": config('DB_PORT', default='5432'),
+        "OPTIONS": {
+            "connect_timeout": config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+        },
     }
 }
 
+# Conexiones: 'persistent' (una por hilo, reutilizada hasta DB_CONN_MAX_AGE),
+# 'pgbouncer' (igual, pero DB_HOST apunta a PgBouncer en modo transacción) u
+# 'off' (una conexión por request)
+DB_POOL_MODE = config('DB_POOL_MODE', default='persistent')
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=300, cast=int)
+# Con PgBouncer, el listener LISTEN/NOTIFY necesita llegar directo a PostgreSQL
+DB_DIRECT_HOST = config('DB_DIRECT_HOST', default='')
+DB_DIRECT_PORT = config('DB_DIRECT_PORT', default='')
+
+
+def configure_databases(databases, pool_mode):
+    """
+    Aplica el modo de conexiones a ``default``, agrega las réplicas de solo
+    lectura de DB_REPLICAS ("host[:puerto],..."; mismas credenciales que
+    default) y devuelve sus alias. Los settings que redefinen DATABASES la
+    vuelven a llamar.
+    """
+    if pool_mode not in ('persistent', 'pgbouncer', 'off'):
+        raise ImproperlyConfigured(f'DB_POOL_MODE desconocido: {pool_mode}')
+    # A través de PgBouncer en modo transacción el listener nunca recibe
+    # notificaciones y refdata serviría datos viejos sin darse cuenta
+    if (pool_mode == 'pgbouncer' and not DB_DIRECT_HOST
+            and config('CHANGE_LISTENER_ENABLED', default=True, cast=bool)):
+        raise ImproperlyConfigured(
+            'DB_POOL_MODE=pgbouncer requiere DB_DIRECT_HOST (PostgreSQL sin PgBouncer) '
+            'para el listener LISTEN/NOTIFY, o CHANGE_LISTENER_ENABLED=False'
+        )
+    default = databases['default']
+    default['CONN_MAX_AGE'] = 0 if pool_mode == 'off' else DB_CONN_MAX_AGE
+    # Descarta al inicio de cada request las conexiones que el servidor cerró
+    default['CONN_HEALTH_CHECKS'] = pool_mode != 'off'
+    # En modo transacción un cursor con nombre no sobrevive entre sentencias
+    default['DISABLE_SERVER_SIDE_CURSORS'] = pool_mode == 'pgbouncer'
+
+    aliases = []
+    for number, address in enumerate(config('DB_REPLICAS', default='', cast=Csv()), start=1):
+        host, _, port = address.partition(':')
+        alias = f'replica_{number}'
+        databases[alias] = {
+            **default,
+            'HOST': host,
+            'PORT': port or default['PORT'],
+            # En los tests las réplicas son la misma base
+            'TEST': {'MIRROR': 'default'},
+        }
+        aliases.append(alias)
+    return aliases
+
+
+# Lecturas de vistas @read_replica en réplicas (apps.core.db_routing)
+REPLICA_DATABASES = configure_databases(DATABASES, DB_POOL_MODE)
+DATABASE_ROUTERS = ['apps.core.db_routing.ReplicaRouter']
+# Retraso máximo tolerado antes de volver a leer de default
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=10.0, cast=float)
+# Cada cuánto cada proceso vuelve a medir el retraso de las réplicas
+REPLICA_LAG_CHECK_SECONDS = config('REPLICA_LAG_CHECK_SECONDS', default=5.0, cast=float)
+# Tras escribir, el usuario lee de default durante este tiempo
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=15, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -153,16 +218,75 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'apps.core.pagination.EstimatedCountPagination',
     'PAGE_SIZE': 20,
 }
 
+# Por encima de este número de filas los paginadores usan el conteo estimado
+# de PostgreSQL en lugar de COUNT(*)
+ESTIMATED_COUNT_THRESHOLD = config('ESTIMATED_COUNT_THRESHOLD', default=10000, cast=int)
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
 ]
 
+# Instrumentación de rendimiento por request (Server-Timing + logs)
+PERFORMANCE_INSTRUMENTATION = config('PERFORMANCE_INSTRUMENTATION', default=True, cast=bool)
+PERFORMANCE_SERVER_TIMING = config('PERFORMANCE_SERVER_TIMING', default=True, cast=bool)
+PERFORMANCE_SLOW_REQUEST_MS = config('PERFORMANCE_SLOW_REQUEST_MS', default=1000, cast=int)
+PERFORMANCE_SUMMARY_EVERY = config('PERFORMANCE_SUMMARY_EVERY', default=500, cast=int)
+
+# Métricas Prometheus (/metrics). Con gunicorn definir PROMETHEUS_MULTIPROC_DIR
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_ALLOWED_NETWORKS = config(
+    'METRICS_ALLOWED_NETWORKS',
+    default='127.0.0.0/8,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16',
+    cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]
+)
+METRICS_DOMAIN_CACHE_SECONDS = config('METRICS_DOMAIN_CACHE_SECONDS', default=30, cast=int)
+
+# Chequeos de /ready/: timeout por dependencia y caché del resultado en el proceso
+HEALTH_CHECK_TIMEOUT = config('HEALTH_CHECK_TIMEOUT', default=2.0, cast=float)
+HEALTH_CHECK_CACHE_SECONDS = config('HEALTH_CHECK_CACHE_SECONDS', default=5, cast=int)
+
+# Consultas lentas: log + tabla SlowQuery, con EXPLAIN ANALYZE para una muestra
+SLOW_QUERY_CAPTURE = config('SLOW_QUERY_CAPTURE', default=True, cast=bool)
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=500, cast=int)
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = config('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', default=0.1, cast=float)
+SLOW_QUERY_EXPLAIN_MAX_MS = config('SLOW_QUERY_EXPLAIN_MAX_MS', default=10000, cast=int)
+SLOW_QUERY_PERSIST = config('SLOW_QUERY_PERSIST', default=True, cast=bool)
+
+# Comentarios sqlcommenter (/*view=...,route=...,user_role=...*/) en cada consulta
+SQL_COMMENTER_ENABLED = config('SQL_COMMENTER_ENABLED', default=True, cast=bool)
+
+# Caché de fragmentos de denuncias (claves versionadas, ver apps.complaints.cache)
+COMPLAINTS_FRAGMENT_CACHE_SECONDS = config('COMPLAINTS_FRAGMENT_CACHE_SECONDS', default=3600, cast=int)
+
+# Particiones anuales de denuncias que se crean por adelantado (apps.complaints.partitions)
+COMPLAINTS_PARTITIONS_AHEAD = config('COMPLAINTS_PARTITIONS_AHEAD', default=2, cast=int)
+
+# Datos de referencia en memoria: cada cuánto se revisa la versión compartida
+REFDATA_CHECK_SECONDS = config('REFDATA_CHECK_SECONDS', default=1.0, cast=float)
+
+# Hilo LISTEN/NOTIFY por worker que invalida los cachés locales (apps.core.change_listener)
+CHANGE_LISTENER_ENABLED = config('CHANGE_LISTENER_ENABLED', default=True, cast=bool)
+
+# Presupuestos de consultas (@query_budget): 'raise', 'log' u 'off'
+QUERY_BUDGET_MODE = config('QUERY_BUDGET_MODE', default='log')
+
+# Fotos de evidencia (apps.complaints.evidence): tamaño máximo por archivo
+EVIDENCE_PHOTO_MAX_BYTES = config('EVIDENCE_PHOTO_MAX_BYTES', default=25 * 1024 * 1024, cast=int)
+
+# Cola de trabajos en segundo plano (apps.core.jobs, manage.py run_workers)
+JOBS_RUN_INLINE = config('JOBS_RUN_INLINE', default=False, cast=bool)
+JOBS_POLL_SECONDS = config('JOBS_POLL_SECONDS', default=1.0, cast=float)
+JOBS_RETRY_DELAY_SECONDS = config('JOBS_RETRY_DELAY_SECONDS', default=30, cast=int)
+JOBS_STALE_SECONDS = config('JOBS_STALE_SECONDS', default=300, cast=int)
+JOBS_SHUTDOWN_SECONDS = config('JOBS_SHUTDOWN_SECONDS', default=60, cast=int)
+JOBS_RETENTION_DAYS = config('JOBS_RETENTION_DAYS', default=7, cast=int)
+
 # Internationalization
 LOCALE_PATHS = [
     BASE_DIR / "locale",
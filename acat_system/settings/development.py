@@ -7,6 +7,20 @@ from .base import *
 # Development specific settings
 DEBUG = True
 
+# Exceder un @query_budget falla de inmediato (también en las pruebas de CI)
+QUERY_BUDGET_MODE = config('QUERY_BUDGET_MODE', default='raise')
+
+# Sin workers: los trabajos en segundo plano corren al confirmar el request
+JOBS_RUN_INLINE = config('JOBS_RUN_INLINE', default=True, cast=bool)
+
+# Caché en memoria del proceso (producción y staging usan Redis)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'acat-dev',
+    }
+}
+
 # Allowed hosts for development
 ALLOWED_HOSTS = [
     'localhost',
@@ -29,7 +43,7 @@ CSRF_TRUSTED_ORIGINS = [
 # Database - PostgreSQL con PostGIS
 DATABASES = {
     'default': {
-        'ENGINE': 'django.contrib.gis.db.backends.postgis',
+        'ENGINE': 'apps.core.db_backend',
         'NAME': config('DB_NAME', default='acat_system_dev'),
         'USER': config('DB_USER', default='acat_user'),
         'PASSWORD': config('DB_PASSWORD', default='dev_password'),
@@ -37,6 +51,10 @@ DATABASES = {
         'PORT': config('DB_PORT', default='5432'),
     }
 }
+# runserver atiende cada request en un hilo nuevo: las conexiones
+# persistentes no se reutilizarían
+DB_POOL_MODE = config('DB_POOL_MODE', default='off')
+REPLICA_DATABASES = configure_databases(DATABASES, DB_POOL_MODE)
 
 # SQLite configuration (backup - comentado)
 # DATABASES = {
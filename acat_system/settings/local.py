@@ -8,7 +8,7 @@ from decouple import config
 # Use PostgreSQL for local development
 DATABASES = {
     'default': {
-        'ENGINE': 'django.contrib.gis.db.backends.postgis',
+        'ENGINE': 'apps.core.db_backend',
         'NAME': config('DB_NAME', default='acat_system_dev'),
         'USER': config('DB_USER', default='acat_user'),
         'PASSWORD': config('DB_PASSWORD', default='dev_password'),
@@ -16,6 +16,10 @@ DATABASES = {
         'PORT': config('DB_PORT', default='5432'),
     }
 }
+# runserver atiende cada request en un hilo nuevo: las conexiones
+# persistentes no se reutilizarían
+DB_POOL_MODE = config('DB_POOL_MODE', default='off')
+REPLICA_DATABASES = configure_databases(DATABASES, DB_POOL_MODE)
 
 # Override specific settings for local development
 DEBUG = True
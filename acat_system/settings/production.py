@@ -9,6 +9,8 @@ DEBUG = False
 
 # Security settings
 SECURE_SSL_REDIRECT = config('SECURE_SSL_REDIRECT', default=True, cast=bool)
+# Las sondas internas consultan por HTTP plano
+SECURE_REDIRECT_EXEMPT = [r'^health/$', r'^ready/$', r'^metrics$']
 SECURE_HSTS_SECONDS = config('SECURE_HSTS_SECONDS', default=31536000, cast=int)
 SECURE_HSTS_INCLUDE_SUBDOMAINS = config('SECURE_HSTS_INCLUDE_SUBDOMAINS', default=True, cast=bool)
 SECURE_HSTS_PRELOAD = config('SECURE_HSTS_PRELOAD', default=True, cast=bool)
@@ -73,10 +75,17 @@ LOGGING = {
     },
 }
 
+# Los presupuestos de consultas se verifican en desarrollo, pruebas y staging
+QUERY_BUDGET_MODE = 'off'
+
 # Cache configuration
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.redis.RedisCache',
         'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/1'),
+        'OPTIONS': {
+            'socket_connect_timeout': HEALTH_CHECK_TIMEOUT,
+            'socket_timeout': HEALTH_CHECK_TIMEOUT,
+        },
     }
 }
@@ -10,7 +10,7 @@ DEBUG = config('DEBUG', default=False, cast=bool)
 # Database - PostgreSQL with PostGIS for staging
 DATABASES = {
     'default': {
-        'ENGINE': 'django.contrib.gis.db.backends.postgis',
+        'ENGINE': 'apps.core.db_backend',
         'NAME': config('DB_NAME', default='acat_system_staging'),
         'USER': config('DB_USER', default='acat_user'),
         'PASSWORD': config('DB_PASSWORD'),
@@ -18,6 +18,20 @@ DATABASES = {
         'PORT': config('DB_PORT', default='5432'),
         'OPTIONS': {
             'sslmode': 'disable',
+            'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+        },
+    }
+}
+REPLICA_DATABASES = configure_databases(DATABASES, DB_POOL_MODE)
+
+# Cache - Redis (servicio redis de docker-compose.staging.yml)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('REDIS_URL', default='redis://redis:6379/1'),
+        'OPTIONS': {
+            'socket_connect_timeout': HEALTH_CHECK_TIMEOUT,
+            'socket_timeout': HEALTH_CHECK_TIMEOUT,
         },
     }
 }
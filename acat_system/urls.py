@@ -22,6 +22,7 @@ from django.views.generic import TemplateView
 from django.contrib.auth import logout
 from django.shortcuts import redirect
 from django.http import HttpResponse
+from apps.core import views as core_views
 
 # Configurar títulos del admin
 admin.site.site_header = "Sistema ACAT"
@@ -46,6 +47,12 @@ urlpatterns = [
     path("denuncias/", include("apps.complaints.urls")),
     path("dashboard/", include("apps.dashboard.urls")),
     path("api/", include("apps.complaints.api_urls")),
+    # Monitoreo
+    path("health/", core_views.health, name="health"),
+    path("ready/", core_views.ready, name="ready"),
+    path("metrics", core_views.metrics, name="metrics"),
+    # auth_request de nginx para las respuestas cacheadas compartidas
+    path("auth/check/", core_views.auth_check, name="auth_check"),
 ]
 
 # Servir archivos media y static en desarrollo
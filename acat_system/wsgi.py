@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "acat_system.settings")
 
 application = get_wsgi_application()
+
+# Each process serving requests listens for PostgreSQL change notifications
+# to invalidate its in-process caches (apps.core.change_listener). gunicorn
+# loads this module in every worker (no preload_app), so each gets a thread.
+from apps.core import change_listener  # noqa: E402
+
+change_listener.start()
@@ -1,13 +1,34 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.gis.admin import GISModelAdmin
-from .models import ComplaintType, InfractionType, EnvironmentalComplaint
+from django.db.models import OuterRef, Subquery
+from django.utils.html import format_html
+from apps.core.pagination import EstimatedCountPaginator
+from .models import (
+    STATUS_CHOICES, ArchivedComplaint, ComplaintRecord, ComplaintStatusTransition, ComplaintType,
+    EnvironmentalComplaint, EvidencePhoto, InfractionType,
+)
+
+
+def status_action(status, label):
+    """
+    Acción que cambia el estado de las denuncias seleccionadas en un solo
+    UPDATE (ver ``EnvironmentalComplaintQuerySet.transition_status``)
+    """
+    @admin.action(description=f'Cambiar estado a "{label}"', permissions=['change'])
+    def action(modeladmin, request, queryset):
+        updated = queryset.transition_status(status, user=request.user)
+        modeladmin.message_user(
+            request, f'{updated} denuncias cambiadas a "{label}".', messages.SUCCESS
+        )
+    action.__name__ = f'mark_{status}'
+    return action
 
 
 @admin.register(ComplaintType)
 class ComplaintTypeAdmin(admin.ModelAdmin):
     list_display = ('name', 'is_active', 'created_at')
     list_filter = ('is_active', 'created_at')
-    search_fields = ('name',)
+    search_fields = ('^name',)
     ordering = ('name',)
     list_editable = ('is_active',)
 
@@ -16,11 +37,28 @@ class ComplaintTypeAdmin(admin.ModelAdmin):
 class InfractionTypeAdmin(admin.ModelAdmin):
     list_display = ('name', 'severity_level', 'is_active', 'created_at')
     list_filter = ('severity_level', 'is_active', 'created_at')
-    search_fields = ('name',)
+    search_fields = ('^name',)
     ordering = ('name',)
     list_editable = ('is_active',)
 
 
+class EvidencePhotoInline(admin.TabularInline):
+    """Fotos subidas desde el detalle de la denuncia; solo lectura"""
+    model = EvidencePhoto
+    extra = 0
+    fields = ('preview', 'original', 'size', 'status', 'uploaded_by', 'created_at')
+    readonly_fields = fields
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+    
+    @admin.display(description='Miniatura')
+    def preview(self, obj):
+        if obj.status != 'ready':
+            return obj.get_status_display()
+        return format_html('<img src="{}" style="max-height: 80px">', obj.urls['thumb']['jpeg'])
+
+
 @admin.register(EnvironmentalComplaint)
 class EnvironmentalComplaintAdmin(GISModelAdmin):
     list_display = (
@@ -46,7 +84,14 @@ class EnvironmentalComplaintAdmin(GISModelAdmin):
     )
     ordering = ('-infraction_date', '-created_at')
     list_editable = ('status',)
+    actions = [status_action(status, label) for status, label in STATUS_CHOICES]
+    list_select_related = ('protected_area',)
+    autocomplete_fields = ('protected_area', 'sector', 'complaint_type', 'infraction_name')
     date_hierarchy = 'infraction_date'
+    inlines = [EvidencePhotoInline]
+    # Evitar los COUNT(*) exactos (filtrado y total) en cada carga
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Información General', {
@@ -82,3 +127,52 @@ class EnvironmentalComplaintAdmin(GISModelAdmin):
         if not change:  # Si es un nuevo objeto
             obj.created_by = request.user
         super().save_model(request, obj, form, change)
+
+
+@admin.register(ArchivedComplaint)
+class ArchivedComplaintAdmin(GISModelAdmin):
+    """Solo consulta: el archivo lo llena manage.py archive_complaints"""
+    list_display = ('sitada_number', 'accused_name', 'infraction_date', 'status', 'archived_at')
+    list_filter = ('status', 'infraction_date')
+    search_fields = ('sitada_number', 'accused_name', 'police_report_number')
+    ordering = ('-infraction_date', '-created_at')
+    date_hierarchy = 'infraction_date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ComplaintStatusTransition)
+class ComplaintStatusTransitionAdmin(admin.ModelAdmin):
+    list_display = ('complaint_label', 'from_status', 'to_status', 'changed_by', 'created_at')
+    list_filter = ('to_status', 'from_status', 'created_at')
+    search_fields = ('complaint_sitada', 'batch')
+    # Sin JOIN con la tabla de denuncias: las transiciones de denuncias
+    # archivadas también se listan; la denuncia se busca en ComplaintRecord
+    list_select_related = ('changed_by',)
+    fields = readonly_fields = (
+        'complaint_label', 'from_status', 'to_status', 'changed_by', 'batch', 'created_at'
+    )
+    
+    def get_queryset(self, request):
+        records = ComplaintRecord.objects_all.filter(pk=OuterRef('complaint_id'))
+        return super().get_queryset(request).annotate(
+            complaint_sitada=Subquery(records.values('sitada_number')[:1]),
+            complaint_archived_at=Subquery(records.values('archived_at')[:1]),
+        )
+    
+    @admin.display(description='Denuncia', ordering='complaint_sitada')
+    def complaint_label(self, obj):
+        if obj.complaint_sitada is None:
+            return f'#{obj.complaint_id}'
+        if obj.complaint_archived_at is not None:
+            return f'SITADA {obj.complaint_sitada} (archivada)'
+        return f'SITADA {obj.complaint_sitada}'
+    
+    def has_add_permission(self, request):
+        return False
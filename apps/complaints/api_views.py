@@ -1,19 +1,48 @@
+from django.db.models import Count, Q
 from rest_framework import viewsets, filters
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from apps.core.db_routing import read_replica
+from apps.core.http_cache import cache_policy
 from django_filters.rest_framework import DjangoFilterBackend
+from . import archive
 from .models import EnvironmentalComplaint, ComplaintType, InfractionType
 from .serializers import (
+    BulkStatusSerializer,
+    ComplaintRecordSerializer,
     EnvironmentalComplaintSerializer, 
     ComplaintTypeSerializer, 
     InfractionTypeSerializer
 )
 
 
-class ComplaintTypeViewSet(viewsets.ModelViewSet):
+class ActiveListMixin:
+    """
+    El listado muestra solo los registros activos; el detalle, la edición y
+    el borrado alcanzan también los desactivados, para poder reactivarlos
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.filter(is_active=True)
+        return queryset
+
+
+# Denuncias activas de cada tipo
+active_complaints = Count('complaints', filter=Q(complaints__is_active=True))
+
+
+# Catálogos iguales para todos los usuarios autenticados
+@read_replica
+@cache_policy('shared', max_age=60, stale_while_revalidate=300)
+class ComplaintTypeViewSet(ActiveListMixin, viewsets.ModelViewSet):
     """
     ViewSet para tipos de denuncia
     """
-    queryset = ComplaintType.objects.all()
+    queryset = ComplaintType.objects_all.annotate(complaint_count=active_complaints)
     serializer_class = ComplaintTypeSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -22,11 +51,13 @@ class ComplaintTypeViewSet(viewsets.ModelViewSet):
     ordering = ['name']
 
 
-class InfractionTypeViewSet(viewsets.ModelViewSet):
+@read_replica
+@cache_policy('shared', max_age=60, stale_while_revalidate=300)
+class InfractionTypeViewSet(ActiveListMixin, viewsets.ModelViewSet):
     """
     ViewSet para tipos de infracción
     """
-    queryset = InfractionType.objects.all()
+    queryset = InfractionType.objects_all.annotate(complaint_count=active_complaints)
     serializer_class = InfractionTypeSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -35,9 +66,13 @@ class InfractionTypeViewSet(viewsets.ModelViewSet):
     ordering = ['name']
 
 
+@read_replica
 class EnvironmentalComplaintViewSet(viewsets.ModelViewSet):
     """
     ViewSet para denuncias ambientales
+    
+    Las denuncias archivadas (``manage.py archive_complaints``) solo aparecen
+    en el listado y el detalle con ``?include_archived=1``.
     """
     queryset = EnvironmentalComplaint.objects.all()
     serializer_class = EnvironmentalComplaintSerializer
@@ -70,13 +105,51 @@ class EnvironmentalComplaintViewSet(viewsets.ModelViewSet):
     ]
     ordering = ['-created_at']
     
+    # Los nombres de tipos, áreas y sectores salen de apps.core.refdata,
+    # así que el listado no necesita JOINs
+    
+    def include_archived(self):
+        return (
+            self.action in ('list', 'retrieve')
+            and self.request.query_params.get('include_archived') in ('1', 'true')
+        )
+    
     def get_queryset(self):
+        if self.include_archived():
+            return archive.complaints(include_archived=True)
+        return super().get_queryset()
+    
+    def get_serializer_class(self):
+        if self.include_archived():
+            return ComplaintRecordSerializer
+        return super().get_serializer_class()
+
+    
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_status(self, request):
         """
-        Optimizar consultas con select_related
+        POST /api/denuncias/bulk-status/ con ``{"status": ..., "ids": [...]}``
+        
+        Sin ``ids`` se aplica a las denuncias que cumplan los filtros de la
+        URL (``?status=pending&protected_area=3``); al menos uno de los dos es
+        obligatorio para no modificar la tabla completa por accidente.
         """
-        return super().get_queryset().select_related(
-            'complaint_type', 
-            'infraction_name', 
-            'protected_area', 
-            'sector'
-        )
+        if not request.user.has_perm('complaints.change_environmentalcomplaint'):
+            raise PermissionDenied('No tiene permiso para modificar denuncias.')
+        
+        serializer = BulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data.get('ids')
+        
+        queryset = self.filter_queryset(EnvironmentalComplaint.objects.all())
+        if ids:
+            queryset = queryset.filter(pk__in=ids)
+        elif not any(
+            param == 'search' or param.split('__')[0] in self.filterset_fields
+            for param in request.query_params
+        ):
+            raise ValidationError('Indique "ids" o al menos un filtro en la URL.')
+        
+        status = serializer.validated_data['status']
+        updated = queryset.transition_status(status, user=request.user)
+        return Response({'status': status, 'updated': updated})
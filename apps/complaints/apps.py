@@ -1,7 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ComplaintsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.complaints"
     verbose_name = "Denuncias Ambientales"
+
+    def ready(self):
+        from . import signals
+
+        post_migrate.connect(
+            signals.create_upcoming_partitions, sender=self, dispatch_uid='complaints_partitions'
+        )
@@ -0,0 +1,92 @@
+"""
+Archivo de denuncias cerradas.
+
+Las denuncias resueltas o desestimadas de años anteriores casi no se leen,
+pero ocupan la mayor parte de la tabla, de sus índices y del mapa.
+``manage.py archive_complaints`` las mueve por lotes a
+``complaints_archivedcomplaint``: cada lote es un ``DELETE ... RETURNING``
+de la tabla principal encadenado a un ``INSERT`` en el archivo, en su propia
+transacción, así que el comando se puede interrumpir y volver a correr.
+
+Las lecturas normales (``EnvironmentalComplaint``) no ven el archivo; las que
+lo necesitan lo piden con ``complaints(include_archived=True)``, que lee la
+vista ``complaints_complaintrecord`` (ambas tablas con ``UNION ALL``).
+
+El número SITADA de una denuncia archivada sigue en ``complaints_sitada``:
+no se puede reutilizar en la tabla principal.
+"""
+
+from django.db import connections, transaction
+
+from . import partitions
+from .models import ArchivedComplaint, ComplaintRecord, EnvironmentalComplaint
+
+CLOSED_STATUSES = ('resolved', 'dismissed')
+TABLE = EnvironmentalComplaint._meta.db_table
+ARCHIVE_TABLE = ArchivedComplaint._meta.db_table
+# Columnas de la tabla principal; el archivo agrega archived_at
+COLUMNS = [field.column for field in EnvironmentalComplaint._meta.concrete_fields]
+
+MOVE_SQL = """
+WITH batch AS (
+    SELECT id, infraction_date FROM {table}
+    WHERE status IN %s AND infraction_date < %s AND id > %s
+    ORDER BY id
+    LIMIT %s
+    FOR UPDATE SKIP LOCKED
+), moved AS (
+    DELETE FROM {table} AS complaint
+    USING batch
+    WHERE complaint.id = batch.id AND complaint.infraction_date = batch.infraction_date
+    RETURNING complaint.*
+)
+INSERT INTO {archive} ({columns}, archived_at)
+SELECT {columns}, now() FROM moved
+RETURNING id, sitada_number
+"""
+
+
+def complaints(include_archived=False):
+    """
+    Denuncias activas; con ``include_archived`` también las archivadas (de
+    la vista combinada, solo lectura, con ``archived_at``)
+    """
+    if include_archived:
+        return ComplaintRecord.objects.all()
+    return EnvironmentalComplaint.objects.all()
+
+
+def closed_before(cutoff, using='default'):
+    """Denuncias que archivaría ``archive_batch`` con esta fecha de corte"""
+    return EnvironmentalComplaint.objects_all.using(using).filter(
+        status__in=CLOSED_STATUSES, infraction_date__lt=cutoff
+    )
+
+
+def archive_batch(cutoff, batch_size, after_id=0, using='default'):
+    """
+    Mueve al archivo hasta ``batch_size`` denuncias cerradas con
+    ``infraction_date`` anterior a ``cutoff`` e ``id`` mayor que
+    ``after_id``, en una transacción. Las filas bloqueadas por otra
+    transacción se saltan (se archivarán en otra corrida). Devuelve los ids
+    movidos, en orden.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(column) for column in COLUMNS)
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(
+            MOVE_SQL.format(table=quote(TABLE), archive=quote(ARCHIVE_TABLE), columns=columns),
+            [CLOSED_STATUSES, cutoff, after_id, batch_size],
+        )
+        moved = cursor.fetchall()
+        if moved and partitions.is_partitioned(using):
+            # El trigger de la tabla principal quitó los números del registro
+            cursor.execute(
+                f"""
+                INSERT INTO {quote(partitions.SITADA_TABLE)} (sitada_number, complaint_id)
+                SELECT * FROM unnest(%s::varchar[], %s::bigint[])
+                """,
+                [[number for _, number in moved], [pk for pk, _ in moved]],
+            )
+    return sorted(pk for pk, _ in moved)
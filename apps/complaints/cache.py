@@ -0,0 +1,87 @@
+"""
+Versiones para el caché de fragmentos de plantillas de denuncias.
+
+Los fragmentos por denuncia se identifican con ``(pk, updated_at)``; los de
+página completa y los conteos, con la versión de la colección, que se
+incrementa con cada alta, cambio o baja confirmada (incluidos los cambios en
+lote). Los nombres de tipos, áreas y sectores se muestran dentro de los
+fragmentos, por eso ambos llevan además la versión de los datos de
+referencia.
+
+Las claves viejas no se borran: al cambiar la versión simplemente dejan de
+usarse y expiran solas.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.utils.functional import cached_property
+
+from apps.core import refdata
+from apps.core.pagination import EstimatedCountPaginator, estimated_count
+
+COLLECTION_VERSION_KEY = 'complaints:collection_version'
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Si la clave fue desalojada, un valor basado en el reloj no repite
+        # una versión anterior que todavía tenga fragmentos en caché
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns() // 1000
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def collection_version():
+    return _get_version(COLLECTION_VERSION_KEY)
+
+
+def bump_collection_version():
+    return _bump_version(COLLECTION_VERSION_KEY)
+
+
+def reference_version():
+    """Versión compartida de los datos de referencia (ver apps.core.refdata)"""
+    return refdata.version()
+
+
+def versioned_key(*parts):
+    """Clave que se invalida al cambiar cualquier denuncia o dato de referencia"""
+    return ':'.join(
+        ['complaints', str(collection_version()), str(reference_version()), *map(str, parts)]
+    )
+
+
+def cached_estimated_count(queryset):
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    digest = hashlib.md5(f'{sql}|{params}'.encode('utf-8')).hexdigest()
+    # Del primario, como refdata: se guarda bajo la versión ya incrementada
+    return cache.get_or_set(
+        versioned_key('count', digest),
+        lambda: estimated_count(queryset.using('default')),
+        settings.COMPLAINTS_FRAGMENT_CACHE_SECONDS,
+    )
+
+
+class VersionedCountPaginator(EstimatedCountPaginator):
+    """Conteo estimado que además se guarda en caché hasta el próximo cambio"""
+
+    @cached_property
+    def count(self):
+        return cached_estimated_count(self.object_list)
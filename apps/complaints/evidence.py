@@ -0,0 +1,186 @@
+"""
+Fotos de evidencia: carga, almacenamiento por contenido y miniaturas.
+
+La carga es un POST multipart que Django recibe en bloques:
+``HashingUploadHandler`` escribe cada bloque en un archivo temporal y a la
+vez calcula el SHA-256, sin tener el archivo completo en memoria. El original
+se guarda en ``evidence/originals/<ab>/<hash>.<ext>``; si ya existe (la misma
+foto subida a otra denuncia o reenviada) no se vuelve a escribir.
+
+Las versiones reducidas (``SIZES``, en WebP y JPEG) se generan fuera del
+request con la tarea ``complaints.generate_photo_derivatives`` (ver
+apps.core.jobs) y se guardan en
+``evidence/derived/<ab>/<hash>/<tamaño>.<formato>``. Como la ruta depende
+solo del contenido, nunca cambian y nginx las sirve con
+``Cache-Control: immutable``. Listados, detalle y mapa usan solo estas
+versiones; el original se descarga únicamente desde su enlace.
+"""
+
+import hashlib
+import io
+import logging
+import math
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import SkipFile, TemporaryFileUploadHandler
+from PIL import Image, ImageOps
+
+logger = logging.getLogger('acat.evidence')
+
+# Lado mayor en píxeles de cada versión reducida
+SIZES = {'thumb': 320, 'medium': 1280}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Formatos aceptados (según Pillow) y la extensión con que se guarda el original
+ACCEPTED_FORMATS = {'JPEG': '.jpg', 'MPO': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}
+
+
+class InvalidPhoto(ValueError):
+    pass
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """
+    Guarda la carga en un archivo temporal calculando el SHA-256 de cada
+    bloque; el resultado queda en ``uploaded_file.content_hash``. Descarta
+    los archivos que superan EVIDENCE_PHOTO_MAX_BYTES.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.EVIDENCE_PHOTO_MAX_BYTES:
+            self.file.close()
+            raise SkipFile()
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        uploaded.content_hash = self.sha256.hexdigest()
+        return uploaded
+
+
+def original_name(content_hash, extension):
+    return f'evidence/originals/{content_hash[:2]}/{content_hash}{extension}'
+
+
+def derivative_name(content_hash, size, fmt):
+    return f'evidence/derived/{content_hash[:2]}/{content_hash}/{size}.{fmt}'
+
+
+def derivative_urls(content_hash):
+    return {
+        size: {fmt: default_storage.url(derivative_name(content_hash, size, fmt)) for fmt in FORMATS}
+        for size in SIZES
+    }
+
+
+def inspect(uploaded_file):
+    """Valida que sea una imagen aceptada; devuelve (formato, ancho, alto)"""
+    try:
+        with Image.open(uploaded_file) as image:
+            image_format, (width, height) = image.format, image.size
+            image.verify()
+    except Exception as exc:
+        raise InvalidPhoto(f'{uploaded_file.name}: no es una imagen válida') from exc
+    finally:
+        uploaded_file.seek(0)
+    if image_format not in ACCEPTED_FORMATS:
+        raise InvalidPhoto(f'{uploaded_file.name}: formato {image_format} no admitido')
+    return image_format, width, height
+
+
+def store_original(uploaded_file, image_format):
+    """Guarda el original bajo su hash si todavía no existe; devuelve el nombre"""
+    name = original_name(uploaded_file.content_hash, ACCEPTED_FORMATS[image_format])
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, uploaded_file)
+
+
+def add_photo(complaint, uploaded_file, user=None):
+    """
+    Registra ``uploaded_file`` (recibido con HashingUploadHandler) como foto
+    de ``complaint`` y agenda sus miniaturas. Devuelve ``(foto, creada)``;
+    una foto repetida en la misma denuncia devuelve la existente.
+    """
+    from .models import EvidencePhoto
+
+    image_format, width, height = inspect(uploaded_file)
+    name = store_original(uploaded_file, image_format)
+    photo, created = EvidencePhoto.objects.get_or_create(
+        complaint=complaint,
+        content_hash=uploaded_file.content_hash,
+        defaults={
+            'original': name,
+            'content_type': Image.MIME.get(image_format, 'application/octet-stream'),
+            'size': uploaded_file.size,
+            'width': width,
+            'height': height,
+            'uploaded_by': user,
+        },
+    )
+    if created:
+        schedule_derivatives(photo.pk)
+    return photo, created
+
+
+def _render(image, size, fmt):
+    pil_format, options = FORMATS[fmt]
+    copy = image.copy()
+    copy.thumbnail((SIZES[size], SIZES[size]), Image.LANCZOS)
+    buffer = io.BytesIO()
+    copy.save(buffer, pil_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def generate_derivatives(photo_id):
+    """Genera las versiones que falten y marca la foto como lista"""
+    from .models import EvidencePhoto
+
+    photo = EvidencePhoto.objects.filter(pk=photo_id).first()
+    if photo is None:
+        return
+    pending = [
+        (size, fmt) for size in SIZES for fmt in FORMATS
+        if not default_storage.exists(derivative_name(photo.content_hash, size, fmt))
+    ]
+    if pending:
+        with default_storage.open(photo.original.name, 'rb') as source:
+            with Image.open(source) as image:
+                # En JPEG decodifica directamente a la menor escala que
+                # todavía cubre la versión más grande
+                scale = max(SIZES.values()) / max(image.size)
+                if scale < 1:
+                    image.draft('RGB', (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+                oriented = ImageOps.exif_transpose(image).convert('RGB')
+                for size, fmt in pending:
+                    default_storage.save(
+                        derivative_name(photo.content_hash, size, fmt),
+                        _render(oriented, size, fmt),
+                    )
+    EvidencePhoto.objects.filter(pk=photo_id).update(status='ready')
+
+
+def mark_failed(photo_id):
+    from .models import EvidencePhoto
+
+    logger.error('No se pudieron generar las miniaturas de la foto %s', photo_id)
+    EvidencePhoto.objects.filter(pk=photo_id).update(status='failed')
+
+
+def schedule_derivatives(photo_id):
+    """Encola las miniaturas; el worker las toma después del commit de la foto"""
+    from .tasks import generate_photo_derivatives
+
+    generate_photo_derivatives.delay(photo_id)
@@ -1,6 +1,9 @@
 from django import forms
 from django.contrib.gis.geos import Point
 from django.core.exceptions import ValidationError
+from django.urls import reverse_lazy
+from apps.core.autocomplete import AutocompleteSelect
+from apps.core.refdata import CachedModelChoiceField
 from .models import EnvironmentalComplaint
 
 
@@ -46,6 +49,14 @@ class EnvironmentalComplaintForm(forms.ModelForm):
             'description', 'status'
         ]
         
+        # Validación contra apps.core.refdata, sin un SELECT por campo
+        field_classes = {
+            'complaint_type': CachedModelChoiceField,
+            'infraction_name': CachedModelChoiceField,
+            'protected_area': CachedModelChoiceField,
+            'sector': CachedModelChoiceField,
+        }
+        
         widgets = {
             'sitada_number': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -59,18 +70,23 @@ class EnvironmentalComplaintForm(forms.ModelForm):
                 'class': 'form-control',
                 'type': 'date'
             }),
-            'complaint_type': forms.Select(attrs={
-                'class': 'form-select'
-            }),
-            'infraction_name': forms.Select(attrs={
-                'class': 'form-select'
-            }),
-            'protected_area': forms.Select(attrs={
-                'class': 'form-select'
-            }),
-            'sector': forms.Select(attrs={
-                'class': 'form-select'
-            }),
+            'complaint_type': AutocompleteSelect(
+                reverse_lazy('complaints:autocomplete-complaint-types'),
+                attrs={'class': 'form-select'},
+            ),
+            'infraction_name': AutocompleteSelect(
+                reverse_lazy('complaints:autocomplete-infraction-types'),
+                attrs={'class': 'form-select'},
+            ),
+            'protected_area': AutocompleteSelect(
+                reverse_lazy('complaints:autocomplete-areas'),
+                attrs={'class': 'form-select'},
+            ),
+            'sector': AutocompleteSelect(
+                reverse_lazy('complaints:autocomplete-sectors'),
+                depends_on='protected_area',
+                attrs={'class': 'form-select'},
+            ),
             'description': forms.Textarea(attrs={
                 'class': 'form-control',
                 'rows': 4,
@@ -95,6 +111,8 @@ class EnvironmentalComplaintForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # El área ya se muestra en su propio campo; así no se consulta por sector
+        self.fields['sector'].label_from_instance = lambda sector: sector.name
         
         # Si estamos editando una instancia existente, extraer lat/lng del Point
         if self.instance and self.instance.pk and self.instance.location:
@@ -104,6 +122,14 @@ class EnvironmentalComplaintForm(forms.ModelForm):
     
     def clean(self):
         cleaned_data = super().clean()
+        
+        # Los datos de referencia desactivados no se ofrecen; solo se aceptan
+        # si la denuncia ya los tenía
+        for name in ('complaint_type', 'infraction_name', 'protected_area', 'sector'):
+            value = cleaned_data.get(name)
+            if value is not None and not value.is_active and getattr(self.instance, f'{name}_id') != value.pk:
+                self.add_error(name, 'Esta opción está desactivada')
+        
         latitude = cleaned_data.get('latitude')
         longitude = cleaned_data.get('longitude')
         
@@ -131,6 +157,14 @@ class EnvironmentalComplaintForm(forms.ModelForm):
                 'longitude': 'La longitud debe estar entre -87 y -82 para Costa Rica'
             })
         
+        # El sector debe pertenecer al área elegida (búsqueda encadenada)
+        protected_area = cleaned_data.get('protected_area')
+        sector = cleaned_data.get('sector')
+        if protected_area and sector and sector.protected_area_id != protected_area.pk:
+            raise ValidationError({
+                'sector': 'El sector no pertenece al área protegida seleccionada'
+            })
+        
         # Crear el objeto Point
         try:
             cleaned_data['location'] = Point(longitude, latitude, srid=4326)
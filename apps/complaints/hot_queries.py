@@ -0,0 +1,52 @@
+"""
+Querysets que las vistas y la API ejecutan en cada request, para
+``manage.py index_advisor``. Los valores de los filtros son de ejemplo:
+solo importa la forma de la consulta.
+"""
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+from apps.core.index_advisor import hot_queryset
+from .models import EnvironmentalComplaint
+
+
+@hot_queryset('Listado de denuncias (complaints:list)')
+def complaint_list():
+    return EnvironmentalComplaint.objects.select_related(
+        'protected_area', 'sector', 'complaint_type'
+    ).order_by('-created_at')[:20]
+
+
+@hot_queryset('API: denuncias por estado')
+def api_by_status():
+    return EnvironmentalComplaint.objects.filter(status='pending').order_by('-created_at')[:20]
+
+
+@hot_queryset('API: denuncias por estado y fecha')
+def api_by_status_and_date():
+    return EnvironmentalComplaint.objects.filter(
+        status='in_progress', created_at__gte=timezone.now() - timedelta(days=30)
+    ).order_by('-created_at')[:20]
+
+
+@hot_queryset('API: denuncias por área y sector')
+def api_by_area():
+    return EnvironmentalComplaint.objects.filter(
+        protected_area_id=1, sector_id=1
+    ).order_by('-created_at')[:20]
+
+
+@hot_queryset('Tablero: denuncias de los últimos 30 días')
+def dashboard_recent():
+    return EnvironmentalComplaint.objects.filter(
+        created_at__gte=timezone.now() - timedelta(days=30)
+    ).values('pk')
+
+
+@hot_queryset('Tablero: últimas denuncias')
+def dashboard_latest():
+    return EnvironmentalComplaint.objects.select_related(
+        'protected_area', 'complaint_type'
+    ).order_by('-created_at')[:5]
@@ -0,0 +1,297 @@
+"""
+Importación masiva de denuncias (``manage.py import_complaints``).
+
+El archivo se lee en flujo (CSV con el módulo csv; GeoJSON y Shapefile con
+OGR) en lotes que se validan en procesos paralelos contra mapas en memoria
+de áreas, sectores y tipos. Las filas válidas se cargan con ``COPY`` en una
+tabla temporal y al final se combinan por número SITADA con un ``UPDATE`` y
+un ``INSERT``: una denuncia existente se actualiza solo si algún campo cambió.
+"""
+
+import csv
+import io
+import unicodedata
+from datetime import date, datetime
+
+from django.contrib.gis.gdal import CoordTransform, DataSource, SpatialReference
+
+from apps.core import refdata
+from apps.core.models import ProtectedArea, Sector
+from .models import STATUS_CHOICES, ComplaintType, EnvironmentalComplaint, InfractionType
+from .partitions import SITADA_TABLE
+
+# Nombre de columna -> campo; incluye los encabezados de las exportaciones de SITADA
+FIELD_ALIASES = {
+    'sitada_number': ('sitada_number', 'sitada', 'numero_sitada', 'no_sitada'),
+    'police_report_number': ('police_report_number', 'informe_policial', 'numero_informe'),
+    'infraction_date': ('infraction_date', 'fecha_infraccion', 'fecha'),
+    'accused_name': ('accused_name', 'imputado', 'nombre_imputado'),
+    'complaint_type': ('complaint_type', 'tipo_denuncia', 'tipo'),
+    'infraction_name': ('infraction_name', 'infraccion', 'tipo_infraccion'),
+    'protected_area': ('protected_area', 'area_protegida', 'asp', 'codigo_asp'),
+    'sector': ('sector',),
+    'description': ('description', 'descripcion'),
+    'status': ('status', 'estado'),
+    'longitude': ('longitude', 'longitud', 'lon', 'x'),
+    'latitude': ('latitude', 'latitud', 'lat', 'y'),
+}
+REQUIRED_FIELDS = (
+    'sitada_number', 'infraction_date', 'accused_name', 'complaint_type',
+    'infraction_name', 'protected_area', 'sector',
+)
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d')
+
+# Columnas de la tabla temporal, en el orden del COPY
+STAGING_COLUMNS = (
+    ('line', 'integer'),
+    ('sitada_number', 'varchar(100)'),
+    ('police_report_number', 'varchar(100)'),
+    ('infraction_date', 'date'),
+    ('accused_name', 'varchar(200)'),
+    ('complaint_type_id', 'bigint'),
+    ('infraction_name_id', 'bigint'),
+    ('protected_area_id', 'bigint'),
+    ('sector_id', 'bigint'),
+    ('description', 'text'),
+    ('status', 'varchar(20)'),
+    ('location', 'geometry(Point, 4326)'),
+)
+# Columnas que el merge compara y actualiza
+MERGED_COLUMNS = [name for name, _ in STAGING_COLUMNS if name not in ('line', 'sitada_number')]
+
+_lookups = None
+
+
+def normalize(value):
+    return ' '.join(str(value).split()).upper()
+
+
+def column_key(name):
+    """'Fecha Infracción' -> 'fecha_infraccion'"""
+    ascii_name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode()
+    return '_'.join(ascii_name.lower().split())
+
+
+def build_lookups():
+    """Mapas nombre normalizado -> id; se heredan en los procesos de validación"""
+    areas = refdata.all_objects(ProtectedArea)
+    lookups = {
+        'protected_area': {normalize(area.code): area.pk for area in areas},
+        'sector': {
+            (sector.protected_area_id, normalize(sector.name)): sector.pk
+            for sector in refdata.all_objects(Sector)
+        },
+        'complaint_type': {normalize(t.name): t.pk for t in refdata.all_objects(ComplaintType)},
+        'infraction_name': {normalize(t.name): t.pk for t in refdata.all_objects(InfractionType)},
+        'status': {},
+    }
+    for area in areas:
+        lookups['protected_area'].setdefault(normalize(area.name), area.pk)
+    for code, label in STATUS_CHOICES:
+        lookups['status'][normalize(code)] = code
+        lookups['status'][normalize(label)] = code
+    return lookups
+
+
+def init_worker(lookups):
+    global _lookups
+    _lookups = lookups
+
+
+def resolve_columns(header):
+    """Encabezado del archivo -> {campo: columna}; error si falta un requerido"""
+    available = {column_key(column): column for column in header}
+    mapping = {}
+    for field, aliases in FIELD_ALIASES.items():
+        for alias in aliases:
+            if alias in available:
+                mapping[field] = available[alias]
+                break
+    missing = [field for field in REQUIRED_FIELDS if field not in mapping]
+    if missing:
+        raise ValueError(f'Faltan columnas: {", ".join(missing)}')
+    return mapping
+
+
+def read_csv(path, encoding='utf-8-sig', delimiter=','):
+    """Filas ``(línea, valores, wkt)``; la ubicación sale de longitud/latitud"""
+    with open(path, newline='', encoding=encoding) as handle:
+        reader = csv.DictReader(handle, delimiter=delimiter)
+        mapping = resolve_columns(reader.fieldnames or [])
+        for line, row in enumerate(reader, start=2):
+            yield line, {field: row.get(column) for field, column in mapping.items()}, None
+
+
+def read_ogr(path, layer=0):
+    """
+    Filas de GeoJSON o Shapefile; OGR lee una entidad a la vez. Las
+    geometrías se transforman a EPSG:4326 y las que no son puntos se
+    reemplazan por su centroide.
+    """
+    source = DataSource(str(path))
+    ogr_layer = source[layer]
+    mapping = resolve_columns(ogr_layer.fields)
+    transform = None
+    if ogr_layer.srs is not None and ogr_layer.srs.srid != 4326:
+        transform = CoordTransform(ogr_layer.srs, SpatialReference(4326))
+    for line, feature in enumerate(ogr_layer, start=1):
+        values = {}
+        for field, column in mapping.items():
+            value = feature.get(column)
+            values[field] = value.isoformat() if isinstance(value, (date, datetime)) else value
+        geometry = feature.geom
+        if geometry is not None:
+            if transform is not None:
+                geometry.transform(transform)
+            if geometry.geom_name != 'POINT':
+                geometry = geometry.centroid
+            geometry.coord_dim = 2
+            geometry = geometry.wkt
+        yield line, values, geometry
+
+
+def _text(values, field, max_length=None, required=False):
+    value = values.get(field)
+    value = '' if value is None else str(value).strip()
+    if required and not value:
+        raise ValueError(f'{field} vacío')
+    if max_length is not None and len(value) > max_length:
+        raise ValueError(f'{field} excede {max_length} caracteres')
+    return value
+
+
+def _date(value):
+    value = (value or '').strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value[:10], date_format).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f'fecha inválida: {value!r}')
+
+
+def _location(values, wkt):
+    if wkt:
+        return f'SRID=4326;{wkt}'
+    try:
+        longitude = float(str(values.get('longitude')).replace(',', '.'))
+        latitude = float(str(values.get('latitude')).replace(',', '.'))
+    except (TypeError, ValueError):
+        raise ValueError('sin ubicación (longitud/latitud)')
+    if not (-180 <= longitude <= 180 and -90 <= latitude <= 90):
+        raise ValueError(f'coordenadas fuera de rango: {longitude}, {latitude}')
+    return f'SRID=4326;POINT({longitude!r} {latitude!r})'
+
+
+def _lookup(values, field, default='', area_id=None):
+    value = normalize(values.get(field) or default)
+    key = value if area_id is None else (area_id, value)
+    try:
+        return _lookups[field][key]
+    except KeyError:
+        raise ValueError(f'{field} desconocido: {value!r}')
+
+
+def validate_row(line, values, wkt):
+    area_id = _lookup(values, 'protected_area')
+    return (
+        line,
+        _text(values, 'sitada_number', 100, required=True),
+        _text(values, 'police_report_number', 100),
+        _date(values.get('infraction_date')),
+        _text(values, 'accused_name', 200, required=True),
+        _lookup(values, 'complaint_type'),
+        _lookup(values, 'infraction_name'),
+        area_id,
+        _lookup(values, 'sector', area_id=area_id),
+        _text(values, 'description'),
+        _lookup(values, 'status', default='pending'),
+        _location(values, wkt),
+    )
+
+
+def validate_batch(batch):
+    """
+    Corre en los procesos de validación. Devuelve las filas válidas ya
+    escritas en formato CSV para el COPY, su cantidad y los errores
+    ``(línea, sitada, mensaje)``.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator='\n')
+    valid = 0
+    errors = []
+    for line, values, wkt in batch:
+        try:
+            writer.writerow(validate_row(line, values, wkt))
+            valid += 1
+        except ValueError as exc:
+            errors.append((line, values.get('sitada_number') or '', str(exc)))
+    return buffer.getvalue(), valid, errors
+
+
+def create_staging_table(cursor):
+    columns = ', '.join(f'{name} {sql_type}' for name, sql_type in STAGING_COLUMNS)
+    cursor.execute(f'CREATE TEMP TABLE complaints_import ({columns}) ON COMMIT DROP')
+
+
+def copy_batch(cursor, data):
+    columns = ', '.join(name for name, _ in STAGING_COLUMNS)
+    cursor.copy_expert(
+        f'COPY complaints_import ({columns}) FROM STDIN WITH (FORMAT csv)', io.StringIO(data)
+    )
+
+
+def staged_years(cursor):
+    """Años de infraction_date en la tabla temporal (para crear sus particiones)"""
+    cursor.execute('SELECT DISTINCT extract(year FROM infraction_date)::int FROM complaints_import')
+    return [year for (year,) in cursor.fetchall()]
+
+
+def merge(cursor, user_id, update=True):
+    """
+    Inserta las denuncias nuevas y, con ``update``, actualiza las existentes
+    que cambiaron. Si un número SITADA se repite en el archivo gana la última
+    fila. Devuelve ``(insertadas, actualizadas)``.
+
+    La tabla está particionada y no tiene clave única sobre sitada_number
+    (ver apps.complaints.partitions), así que en lugar de
+    ``ON CONFLICT`` las existentes se encuentran por ``complaints_sitada``.
+    """
+    table = EnvironmentalComplaint._meta.db_table
+    columns = ', '.join(MERGED_COLUMNS)
+    latest = (
+        'SELECT DISTINCT ON (sitada_number) * FROM complaints_import '
+        'ORDER BY sitada_number, line DESC'
+    )
+    updated = 0
+    if update:
+        assignments = ', '.join(f'{name} = latest.{name}' for name in MERGED_COLUMNS)
+        current = ', '.join(f'complaint.{name}' for name in MERGED_COLUMNS)
+        incoming = ', '.join(f'latest.{name}' for name in MERGED_COLUMNS)
+        cursor.execute(
+            f"""
+            UPDATE {table} AS complaint
+            SET {assignments}, updated_at = now()
+            FROM ({latest}) AS latest
+            JOIN {SITADA_TABLE} AS registry USING (sitada_number)
+            WHERE complaint.id = registry.complaint_id
+              AND ({current}) IS DISTINCT FROM ({incoming})
+            """
+        )
+        updated = cursor.rowcount
+    cursor.execute(
+        f"""
+        INSERT INTO {table} (
+            sitada_number, {columns}, evidence_photos, created_by_id,
+            created_at, updated_at, is_active
+        )
+        SELECT sitada_number, {columns}, '[]'::jsonb, %s, now(), now(), true
+        FROM ({latest}) AS latest
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {SITADA_TABLE} AS registry
+            WHERE registry.sitada_number = latest.sitada_number
+        )
+        """,
+        [user_id],
+    )
+    return cursor.rowcount, updated
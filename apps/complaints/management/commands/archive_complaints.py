@@ -0,0 +1,106 @@
+import re
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.complaints import archive
+from apps.complaints.signals import refresh_complaint_rollups
+
+
+def parse_cutoff(value, today):
+    """
+    ``--older-than``: una fecha (``2023-01-01``), días (``730`` o ``730d``)
+    o años (``2y``, que cuenta desde el 1 de enero del año en curso)
+    """
+    match = re.fullmatch(r'(\d+)\s*([dy]?)', value.strip().lower())
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        if unit == 'y':
+            return date(today.year - amount, 1, 1)
+        return today - timedelta(days=amount)
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(
+            f'--older-than inválido: {value!r} (use AAAA-MM-DD, días como 730 o años como 2y)'
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve al archivo (complaints_archivedcomplaint) las denuncias resueltas '
+        'o desestimadas con fecha de infracción anterior al corte, por lotes. '
+        'Cada lote se confirma por separado: el comando se puede interrumpir y '
+        'volver a correr.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', required=True,
+            help='Corte por fecha de infracción: AAAA-MM-DD, días (730) o años (2y)',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Denuncias por lote y transacción (por defecto 1000)',
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=0.0,
+            help='Pausa en segundos entre lotes, para no saturar la réplica ni el WAL',
+        )
+        parser.add_argument(
+            '--max-batches', type=int,
+            help='Detenerse después de esta cantidad de lotes (el resto en otra corrida)',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Solo contar las denuncias que se archivarían',
+        )
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        database = options['database']
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser al menos 1')
+        cutoff = parse_cutoff(options['older_than'], timezone.localdate())
+
+        pending = archive.closed_before(cutoff, using=database).count()
+        self.stdout.write(
+            f'{pending} denuncias cerradas con fecha de infracción anterior al {cutoff:%Y-%m-%d}'
+        )
+        if options['dry_run'] or not pending:
+            return
+
+        moved = 0
+        batches = 0
+        last_id = 0
+        started = time.monotonic()
+        try:
+            while options['max_batches'] is None or batches < options['max_batches']:
+                ids = archive.archive_batch(
+                    cutoff, options['batch_size'], after_id=last_id, using=database
+                )
+                if not ids:
+                    break
+                batches += 1
+                moved += len(ids)
+                last_id = ids[-1]
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'Lote {batches}: {len(ids)} archivadas (total {moved}/{pending}, '
+                    f'{moved / elapsed:.0f} por segundo, último id {last_id})'
+                )
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+        finally:
+            if moved:
+                refresh_complaint_rollups()
+
+        remaining = pending - moved
+        if remaining > 0:
+            self.stdout.write(self.style.WARNING(
+                f'Quedan {remaining} por archivar (bloqueadas por otra transacción o '
+                f'fuera de --max-batches); vuelva a correr el comando'
+            ))
+        self.stdout.write(self.style.SUCCESS(f'{moved} denuncias archivadas en {batches} lotes'))
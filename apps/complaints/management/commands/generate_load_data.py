@@ -0,0 +1,313 @@
+import io
+import multiprocessing
+import os
+import random
+import time
+from bisect import bisect
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from itertools import accumulate
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from apps.complaints.models import (
+    ComplaintStatusTransition, ComplaintType, EnvironmentalComplaint, EvidencePhoto, InfractionType,
+)
+from apps.complaints.partitions import ensure_partitions
+from apps.complaints.signals import refresh_complaint_rollups
+from apps.core.models import ProtectedArea, Sector
+
+# Áreas protegidas reales: código, nombre, centro (lon, lat), radio en km y
+# peso relativo de denuncias
+AREAS = (
+    ('PNC', 'Parque Nacional Corcovado', -83.55, 8.54, 15, 10),
+    ('PNVA', 'Parque Nacional Volcán Arenal', -84.74, 10.45, 8, 6),
+    ('PNSR', 'Parque Nacional Santa Rosa', -85.62, 10.84, 15, 5),
+    ('PNT', 'Parque Nacional Tortuguero', -83.55, 10.54, 12, 8),
+    ('PNCH', 'Parque Nacional Chirripó', -83.49, 9.48, 10, 3),
+    ('PNBC', 'Parque Nacional Braulio Carrillo', -83.98, 10.16, 15, 7),
+    ('PNMA', 'Parque Nacional Manuel Antonio', -84.15, 9.39, 4, 4),
+    ('PNPV', 'Parque Nacional Palo Verde', -85.33, 10.35, 10, 5),
+    ('RNVSCN', 'Refugio Nacional de Vida Silvestre Caño Negro', -84.78, 10.89, 10, 6),
+    ('PNVT', 'Parque Nacional Volcán Tenorio', -85.01, 10.70, 6, 2),
+    ('PNRV', 'Parque Nacional Rincón de la Vieja', -85.35, 10.83, 8, 3),
+    ('PILA', 'Parque Internacional La Amistad', -82.95, 9.35, 25, 4),
+    ('RBAMB', 'Reserva Biológica Alberto Manuel Brenes', -84.60, 10.22, 4, 1),
+    ('ZPAM', 'Zona Protectora Arenal-Monteverde', -84.78, 10.33, 8, 3),
+    ('PNCA', 'Parque Nacional Cahuita', -82.83, 9.74, 5, 3),
+    ('PNMB', 'Parque Nacional Marino Ballena', -83.75, 9.12, 5, 2),
+)
+# Sector: desplazamiento del centro del área en fracciones del radio
+SECTORS = (
+    ('Sector Norte', 0, 0.5),
+    ('Sector Sur', 0, -0.5),
+    ('Sector Este', 0.5, 0),
+    ('Sector Oeste', -0.5, 0),
+    ('Sector Central', 0, 0),
+)
+# Tipo de denuncia, peso, infracción asociada y su severidad
+TYPES = (
+    ('Tala ilegal', 25, 'Tala de árboles', 'GRAVE'),
+    ('Caza furtiva', 18, 'Caza de animales protegidos', 'MUY_GRAVE'),
+    ('Pesca ilegal', 12, 'Pesca en zona vedada', 'GRAVE'),
+    ('Contaminación de ríos', 10, 'Vertido de contaminantes', 'GRAVE'),
+    ('Construcción ilegal', 10, 'Construcción sin permisos', 'MODERADA'),
+    ('Invasión de terrenos', 10, 'Ocupación ilegal', 'MODERADA'),
+    ('Quema no autorizada', 8, 'Incendio provocado', 'MUY_GRAVE'),
+    ('Extracción de arena', 7, 'Extracción de recursos', 'MODERADA'),
+)
+# Distribución del estado según la antigüedad de la denuncia (días)
+STATUS_BY_AGE = (
+    (30, ('pending', 'in_progress', 'resolved', 'dismissed'), (60, 35, 4, 1)),
+    (365, ('pending', 'in_progress', 'resolved', 'dismissed'), (20, 40, 30, 10)),
+    (None, ('pending', 'in_progress', 'resolved', 'dismissed'), (3, 7, 70, 20)),
+)
+FIRST_NAMES = (
+    'José', 'Juan', 'Carlos', 'Luis', 'Jorge', 'Manuel', 'Francisco', 'Roberto', 'Mario',
+    'María', 'Ana', 'Laura', 'Carmen', 'Sofía', 'Rosa', 'Patricia', 'Marta', 'Elena',
+)
+LAST_NAMES = (
+    'Rodríguez', 'Vargas', 'Jiménez', 'Mora', 'Rojas', 'González', 'Hernández', 'Sánchez',
+    'Ramírez', 'Castro', 'Araya', 'Solano', 'Chaves', 'Alvarado', 'Quesada', 'Villalobos',
+)
+DESCRIPTIONS = (
+    '', '', '',
+    'Denuncia recibida por guardaparques durante patrullaje.',
+    'Reporte ciudadano por línea telefónica.',
+    'Hallazgo durante operativo conjunto con Fuerza Pública.',
+)
+# Más denuncias en la estación seca (diciembre a abril)
+MONTH_ACCEPTANCE = {12: 1.0, 1: 1.0, 2: 1.0, 3: 1.0, 4: 1.0}
+KM_PER_DEGREE = 111.0
+# Desde esta cantidad de filas los índices se recrean al final de la carga
+DEFER_INDEXES_FROM = 100_000
+
+COLUMNS = (
+    'sitada_number', 'police_report_number', 'location', 'protected_area_id', 'sector_id',
+    'infraction_date', 'accused_name', 'complaint_type_id', 'infraction_name_id', 'description',
+    'evidence_photos', 'status', 'created_by_id', 'created_at', 'updated_at', 'is_active',
+)
+
+_context = None
+
+
+def picker(items, weights):
+    """Elección ponderada con una sola llamada a random() (más rápida que choices)"""
+    cumulative = list(accumulate(weights))
+    total = cumulative[-1]
+    return lambda rng: items[bisect(cumulative, rng.random() * total)]
+
+
+def init_worker(context):
+    global _context
+    _context = dict(context)
+    _context['pick_area'] = picker(context['areas'], [area['weight'] for area in context['areas']])
+    _context['pick_type'] = picker(context['types'], [kind['weight'] for kind in context['types']])
+    _context['pick_status'] = [
+        (max_age, picker(statuses, weights)) for max_age, statuses, weights in STATUS_BY_AGE
+    ]
+
+
+def generate_chunk(chunk):
+    """
+    Filas ``start..stop`` en formato text de COPY. Cada lote tiene su propia
+    semilla: el resultado no depende de la cantidad de procesos.
+    """
+    index, start, stop = chunk
+    context = _context
+    rng = random.Random(f"{context['seed']}:{index}")
+    today = context['today']
+    span_days = context['years'] * 365
+    lines = []
+    for number in range(start, stop):
+        area = context['pick_area'](rng)
+        sector_id, offset_x, offset_y = area['sectors'][int(rng.random() * len(area['sectors']))]
+        radius = area['radius'] / KM_PER_DEGREE
+        longitude = area['lon'] + (offset_x + rng.gauss(0, 0.3)) * radius
+        latitude = area['lat'] + (offset_y + rng.gauss(0, 0.3)) * radius
+
+        # Más denuncias recientes (crecimiento del registro) y en la estación seca
+        while True:
+            age = int((1 - rng.random() ** 0.7) * span_days)
+            infraction_date = today - timedelta(days=age)
+            if rng.random() < MONTH_ACCEPTANCE.get(infraction_date.month, 0.6):
+                break
+        # Se registra unos días después de la infracción y se actualiza hasta hoy
+        delay = min(age, int(rng.expovariate(1 / 10)))
+        created_at = datetime.combine(infraction_date, datetime.min.time(), dt_timezone.utc) + timedelta(
+            days=delay, seconds=int(rng.random() * 86400)
+        )
+        updated_at = created_at + timedelta(days=int(rng.random() * min(age - delay + 1, 90)))
+        status = next(pick for max_age, pick in context['pick_status'] if max_age is None or age < max_age)(rng)
+        kind = context['pick_type'](rng)
+        police_report = f'OIJ-{rng.randrange(10 ** 6):06d}' if rng.random() < 0.3 else ''
+
+        lines.append('\t'.join((
+            f"{context['prefix']}-{number:08d}",
+            police_report,
+            f'SRID=4326;POINT({longitude:.6f} {latitude:.6f})',
+            str(area['id']),
+            str(sector_id),
+            infraction_date.isoformat(),
+            f'{FIRST_NAMES[int(rng.random() * len(FIRST_NAMES))]} '
+            f'{LAST_NAMES[int(rng.random() * len(LAST_NAMES))]} '
+            f'{LAST_NAMES[int(rng.random() * len(LAST_NAMES))]}',
+            str(kind['id']),
+            str(kind['infraction_id']),
+            DESCRIPTIONS[int(rng.random() * len(DESCRIPTIONS))],
+            '[]',
+            status,
+            str(context['user_id']),
+            created_at.isoformat(),
+            updated_at.isoformat(),
+            't',
+        )))
+    return stop - start, '\n'.join(lines) + '\n'
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera denuncias sintéticas con distribuciones realistas (áreas, fechas, '
+        'estados y tipos) y las carga con COPY para pruebas de carga'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--complaints', type=int, required=True, help='Cantidad de denuncias')
+        parser.add_argument(
+            '--seed', type=int, default=1,
+            help='Semilla: la misma semilla el mismo día genera los mismos datos',
+        )
+        parser.add_argument('--years', type=int, default=10, help='Años de historia (por defecto 10)')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Procesos generadores (por defecto: núcleos)',
+        )
+        parser.add_argument('--chunk-size', type=int, default=50_000, help='Filas por COPY')
+        parser.add_argument(
+            '--truncate', action='store_true',
+            help='Vaciar antes la tabla de denuncias (y sus transiciones y fotos)',
+        )
+        parser.add_argument(
+            '--keep-indexes', action='store_true',
+            help=f'No recrear los índices al final aunque se generen {DEFER_INDEXES_FROM} filas o más',
+        )
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        if options['complaints'] < 1:
+            raise CommandError('--complaints debe ser al menos 1')
+        database = options['database']
+        context = self.reference_data(database, options)
+        connection = connections[database]
+        table = EnvironmentalComplaint._meta.db_table
+        defer_indexes = options['complaints'] >= DEFER_INDEXES_FROM and not options['keep_indexes']
+
+        chunks = [
+            (index, start, min(start + options['chunk_size'], options['complaints']))
+            for index, start in enumerate(range(0, options['complaints'], options['chunk_size']))
+        ]
+        # Los procesos generadores no usan la base de datos
+        connection.close()
+        pool = multiprocessing.get_context('fork').Pool(
+            max(1, options['workers']), initializer=init_worker, initargs=(context,)
+        )
+        started = time.monotonic()
+        written = 0
+        try:
+            with transaction.atomic(using=database), connection.cursor() as cursor:
+                cursor.execute('SET LOCAL synchronous_commit = off')
+                if options['truncate']:
+                    # Transiciones y fotos no tienen llave foránea (tabla particionada)
+                    cursor.execute(
+                        f'TRUNCATE {table}, {ComplaintStatusTransition._meta.db_table}, '
+                        f'{EvidencePhoto._meta.db_table}'
+                    )
+                today = context['today']
+                ensure_partitions(range(today.year - options['years'], today.year + 1), using=database)
+                indexes = self.drop_indexes(cursor, table) if defer_indexes else []
+                for rows, data in pool.imap(generate_chunk, chunks):
+                    cursor.copy_expert(
+                        f'COPY {table} ({", ".join(COLUMNS)}) FROM STDIN', io.StringIO(data)
+                    )
+                    written += rows
+                    elapsed = time.monotonic() - started
+                    self.stderr.write(
+                        f'\r{written}/{options["complaints"]} denuncias ({written / elapsed:.0f} filas/s)',
+                        ending='',
+                    )
+                self.stderr.write('')
+                for name, definition in indexes:
+                    self.stderr.write(f'Recreando {name}...')
+                    # En la tabla particionada la definición es "ON ONLY": así
+                    # no se crearía en las particiones
+                    cursor.execute(definition.replace(' ON ONLY ', ' ON ', 1))
+                cursor.execute(f'ANALYZE {table}')
+                transaction.on_commit(refresh_complaint_rollups, using=database)
+        except Exception as exc:
+            if 'duplicate key' in str(exc):
+                raise CommandError(
+                    f'Ya existen denuncias con el prefijo {context["prefix"]}: use --truncate u otra --seed'
+                )
+            raise
+        finally:
+            pool.terminate()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{written} denuncias generadas en {elapsed:.1f} s ({written / elapsed:.0f} filas/s)'
+        ))
+
+    def reference_data(self, database, options):
+        """Crea (si faltan) las áreas, sectores, tipos y el usuario de carga"""
+        user, _ = User.objects.db_manager(database).get_or_create(
+            username='carga_sintetica', defaults={'is_active': False}
+        )
+        areas = []
+        for code, name, lon, lat, radius, weight in AREAS:
+            area, _ = ProtectedArea.objects_all.db_manager(database).get_or_create(
+                code=code, defaults={'name': name}
+            )
+            sectors = []
+            for sector_name, offset_x, offset_y in SECTORS:
+                sector, _ = Sector.objects_all.db_manager(database).get_or_create(
+                    name=sector_name, protected_area=area
+                )
+                sectors.append((sector.pk, offset_x, offset_y))
+            areas.append({
+                'id': area.pk, 'lon': lon, 'lat': lat, 'radius': radius,
+                'weight': weight, 'sectors': sectors,
+            })
+        types = []
+        for name, weight, infraction_name, severity in TYPES:
+            kind, _ = ComplaintType.objects_all.db_manager(database).get_or_create(name=name)
+            infraction, _ = InfractionType.objects_all.db_manager(database).get_or_create(
+                name=infraction_name, defaults={'severity_level': severity}
+            )
+            types.append({'id': kind.pk, 'infraction_id': infraction.pk, 'weight': weight})
+        return {
+            'seed': options['seed'],
+            'prefix': f'CARGA{options["seed"]}',
+            'years': options['years'],
+            'today': date.today(),
+            'user_id': user.pk,
+            'areas': areas,
+            'types': types,
+        }
+
+    def drop_indexes(self, cursor, table):
+        """Elimina los índices que no respaldan restricciones; devuelve sus definiciones"""
+        cursor.execute(
+            """
+            SELECT index_class.relname, pg_get_indexdef(index_class.oid)
+            FROM pg_index
+            JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+            WHERE pg_index.indrelid = %s::regclass
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = pg_index.indexrelid)
+            """,
+            [table],
+        )
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {cursor.db.ops.quote_name(name)}')
+        return indexes
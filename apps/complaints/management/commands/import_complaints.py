@@ -0,0 +1,164 @@
+import csv
+import itertools
+import multiprocessing
+import os
+import time
+from collections import deque
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from apps.complaints import importing
+from apps.complaints.partitions import ensure_partitions
+from apps.complaints.signals import refresh_complaint_rollups
+
+OGR_EXTENSIONS = ('.geojson', '.json', '.shp')
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def validate_in_pool(pool, row_batches, window):
+    """
+    Valida los lotes en el pool conservando el orden, con a lo sumo
+    ``window`` lotes en vuelo para no leer el archivo completo a memoria
+    """
+    pending = deque()
+    for batch in row_batches:
+        pending.append(pool.apply_async(importing.validate_batch, (batch,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa denuncias desde CSV, GeoJSON o Shapefile. Valida en procesos '
+        'paralelos, carga con COPY y combina por número SITADA.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo .csv, .geojson/.json o .shp')
+        parser.add_argument(
+            '--user', required=True,
+            help='Usuario que figura como creador de las denuncias nuevas',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Procesos de validación; 0 valida en este proceso (por defecto: núcleos)',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Filas por lote de validación y COPY (por defecto 5000)',
+        )
+        parser.add_argument(
+            '--no-update', action='store_true',
+            help='No modificar las denuncias que ya existen',
+        )
+        parser.add_argument('--delimiter', default=',', help='Separador del CSV')
+        parser.add_argument('--encoding', default='utf-8-sig', help='Codificación del CSV')
+        parser.add_argument('--layer', type=int, default=0, help='Capa de GeoJSON/Shapefile')
+        parser.add_argument(
+            '--errors', metavar='CSV',
+            help='Escribir aquí las filas rechazadas (línea, sitada, error)',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Validar y cargar sin confirmar la transacción',
+        )
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'No existe {path}')
+        try:
+            user = User.objects.using(options['database']).get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'No existe el usuario {options["user"]}')
+
+        if path.suffix.lower() in OGR_EXTENSIONS:
+            rows = importing.read_ogr(path, layer=options['layer'])
+        else:
+            rows = importing.read_csv(path, encoding=options['encoding'], delimiter=options['delimiter'])
+
+        lookups = importing.build_lookups()
+        importing.init_worker(lookups)
+        connection = connections[options['database']]
+        # Los procesos de validación no usan la base de datos; no deben
+        # heredar la conexión abierta
+        connection.close()
+        pool = None
+        if options['workers'] > 0:
+            pool = multiprocessing.get_context('fork').Pool(
+                options['workers'], initializer=importing.init_worker, initargs=(lookups,)
+            )
+
+        started = time.monotonic()
+        errors = []
+        total = 0
+        try:
+            with transaction.atomic(using=options['database']):
+                with connection.cursor() as cursor:
+                    importing.create_staging_table(cursor)
+                    row_batches = batches(rows, options['batch_size'])
+                    if pool:
+                        validated = validate_in_pool(pool, row_batches, window=2 * options['workers'])
+                    else:
+                        validated = map(importing.validate_batch, row_batches)
+                    for data, valid, batch_errors in validated:
+                        if valid:
+                            importing.copy_batch(cursor, data)
+                        total += valid + len(batch_errors)
+                        errors.extend(batch_errors)
+                        elapsed = time.monotonic() - started
+                        self.stderr.write(
+                            f'\r{total} filas leídas, {len(errors)} rechazadas '
+                            f'({total / elapsed:.0f} filas/s)',
+                            ending='',
+                        )
+                    self.stderr.write('')
+                    cursor.execute('ANALYZE complaints_import')
+                    # Fechas sin partición propia irían a la partición por defecto
+                    ensure_partitions(importing.staged_years(cursor), using=options['database'])
+                    inserted, updated = importing.merge(
+                        cursor, user.pk, update=not options['no_update']
+                    )
+                if options['dry_run']:
+                    transaction.set_rollback(True, using=options['database'])
+                else:
+                    transaction.on_commit(refresh_complaint_rollups, using=options['database'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if pool:
+                pool.terminate()
+
+        if options['errors'] and errors:
+            with open(options['errors'], 'w', newline='', encoding='utf-8') as handle:
+                writer = csv.writer(handle)
+                writer.writerow(['linea', 'sitada', 'error'])
+                writer.writerows(errors)
+        for line, sitada, message in errors[:20]:
+            self.stderr.write(f'  línea {line} ({sitada or "sin SITADA"}): {message}')
+        if len(errors) > 20:
+            self.stderr.write(f'  ... y {len(errors) - 20} errores más')
+
+        elapsed = time.monotonic() - started
+        summary = (
+            f'{inserted} denuncias nuevas, {updated} actualizadas, {len(errors)} filas rechazadas '
+            f'de {total} en {elapsed:.1f} s'
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Simulación (sin cambios): {summary}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
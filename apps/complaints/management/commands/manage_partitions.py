@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.complaints import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        'Crea las particiones anuales de denuncias que falten (año en curso y '
+        'siguientes) y saca de la partición por defecto las denuncias de años '
+        'que ahora tienen partición propia'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--year', type=int, action='append', default=[],
+            help='Crear también la partición de este año (se puede repetir)',
+        )
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        database = options['database']
+        if not partitions.is_partitioned(database):
+            raise CommandError(f'{partitions.TABLE} no está particionada (migración complaints 0007)')
+        created = partitions.ensure_partitions(options['year'], using=database)
+
+        with connections[database].cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT child.relname, pg_get_expr(child.relpartbound, child.oid),
+                       greatest(child.reltuples, 0)::bigint
+                FROM pg_inherits
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE pg_inherits.inhparent = %s::regclass
+                ORDER BY child.relname
+                """,
+                [partitions.TABLE],
+            )
+            for name, bound, rows in cursor.fetchall():
+                self.stdout.write(f'{name:<48} {rows:>12} filas (estimado)  {bound}')
+
+        if created:
+            self.stdout.write(self.style.SUCCESS(
+                f'Particiones creadas: {", ".join(str(year) for year in created)}'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('No faltaban particiones'))
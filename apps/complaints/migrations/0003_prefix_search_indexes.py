@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-18 10:05
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("complaints", "0002_alter_environmentalcomplaint_status"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="complainttype",
+            index=models.Index(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"),
+                    name="text_pattern_ops",
+                ),
+                name="complaints_ctype_prefix_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="infractiontype",
+            index=models.Index(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"),
+                    name="text_pattern_ops",
+                ),
+                name="complaints_itype_prefix_idx",
+            ),
+        ),
+    ]
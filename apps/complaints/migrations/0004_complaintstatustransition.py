@@ -0,0 +1,87 @@
+# Generated by Django 5.0 on 2026-10-18 11:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("complaints", "0003_prefix_search_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ComplaintStatusTransition",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "from_status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pendiente"),
+                            ("in_progress", "En Proceso"),
+                            ("resolved", "Resuelto"),
+                            ("dismissed", "Desestimado"),
+                        ],
+                        max_length=20,
+                        verbose_name="Estado anterior",
+                    ),
+                ),
+                (
+                    "to_status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pendiente"),
+                            ("in_progress", "En Proceso"),
+                            ("resolved", "Resuelto"),
+                            ("dismissed", "Desestimado"),
+                        ],
+                        max_length=20,
+                        verbose_name="Estado nuevo",
+                    ),
+                ),
+                ("batch", models.UUIDField(db_index=True, verbose_name="Lote")),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Fecha del cambio"
+                    ),
+                ),
+                (
+                    "changed_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Modificado por",
+                    ),
+                ),
+                (
+                    "complaint",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="status_transitions",
+                        to="complaints.environmentalcomplaint",
+                        verbose_name="Denuncia",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Transición de estado",
+                "verbose_name_plural": "Transiciones de estado",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Triggers de LISTEN/NOTIFY para invalidar cachés en los procesos
+# (ver apps.core.change_listener; la función se crea en core.0004)
+
+from django.db import migrations
+
+TABLES = [
+    "complaints_complainttype",
+    "complaints_infractiontype",
+    "complaints_environmentalcomplaint",
+]
+
+
+def create_trigger(table):
+    return (
+        f"CREATE TRIGGER {table}_notify_change "
+        f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+        f"FOR EACH STATEMENT EXECUTE FUNCTION acat_notify_change();"
+    )
+
+
+def drop_trigger(table):
+    return f"DROP TRIGGER IF EXISTS {table}_notify_change ON {table};"
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("complaints", "0004_complaintstatustransition"),
+        ("core", "0004_change_notifications"),
+    ]
+
+    operations = [
+        migrations.RunSQL(create_trigger(table), drop_trigger(table)) for table in TABLES
+    ]
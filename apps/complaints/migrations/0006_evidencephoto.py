@@ -0,0 +1,108 @@
+# Generated by Django 5.0 on 2026-10-18 15:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("complaints", "0005_change_notifications"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="environmentalcomplaint",
+            name="evidence_photos",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="URLs de fotos externas; las subidas al sistema están en EvidencePhoto",
+                verbose_name="Fotos de evidencia",
+            ),
+        ),
+        migrations.CreateModel(
+            name="EvidencePhoto",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "content_hash",
+                    models.CharField(db_index=True, max_length=64, verbose_name="SHA-256"),
+                ),
+                (
+                    "original",
+                    models.FileField(max_length=255, upload_to="", verbose_name="Original"),
+                ),
+                (
+                    "content_type",
+                    models.CharField(max_length=50, verbose_name="Tipo de contenido"),
+                ),
+                ("size", models.PositiveBigIntegerField(verbose_name="Tamaño (bytes)")),
+                (
+                    "width",
+                    models.PositiveIntegerField(blank=True, null=True, verbose_name="Ancho"),
+                ),
+                (
+                    "height",
+                    models.PositiveIntegerField(blank=True, null=True, verbose_name="Alto"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Procesando"),
+                            ("ready", "Lista"),
+                            ("failed", "Error"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="Estado",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Fecha de carga"),
+                ),
+                (
+                    "complaint",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="photos",
+                        to="complaints.environmentalcomplaint",
+                        verbose_name="Denuncia",
+                    ),
+                ),
+                (
+                    "uploaded_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Subida por",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Foto de evidencia",
+                "verbose_name_plural": "Fotos de evidencia",
+                "ordering": ["created_at"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("complaint", "content_hash"),
+                        name="complaints_photo_unique_hash",
+                    )
+                ],
+            },
+        ),
+    ]
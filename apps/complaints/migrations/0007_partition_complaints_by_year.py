@@ -0,0 +1,221 @@
+# Particionado anual de complaints_environmentalcomplaint por infraction_date
+# (ver apps.complaints.partitions)
+#
+# La tabla se reconstruye: se renombra, se crea la tabla particionada con las
+# mismas columnas, se copian las filas y se recrean índices, llaves foráneas y
+# triggers con los mismos nombres. En bases grandes conviene correrla en una
+# ventana de mantenimiento: copia todas las denuncias en una transacción.
+#
+# PostgreSQL exige que las claves únicas de una tabla particionada incluyan
+# la columna de partición, así que:
+#   - la llave primaria pasa a ser (id, infraction_date); Django sigue usando id
+#   - la unicidad de sitada_number la garantiza complaints_sitada
+#   - las transiciones y fotos dejan de tener llave foránea en la base (el
+#     borrado en cascada lo sigue haciendo el ORM)
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+TABLE = "complaints_environmentalcomplaint"
+SEQUENCE = f"{TABLE}_id_seq"
+SITADA_TABLE = "complaints_sitada"
+PARTITIONS_AHEAD = 2
+REFERENCING = {
+    "complaints_complaintstatustransition": "complaints_complaintstatustransition_complaint_id_fk",
+    "complaints_evidencephoto": "complaints_evidencephoto_complaint_id_fk",
+}
+
+INDEXES_SQL = """
+SELECT index_class.relname, pg_get_indexdef(index_class.oid)
+FROM pg_index
+JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+WHERE pg_index.indrelid = %s::regclass
+  AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = pg_index.indexrelid)
+"""
+FOREIGN_KEYS_SQL = """
+SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+WHERE conrelid = %s::regclass AND contype = 'f'
+"""
+
+SITADA_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION complaints_sitada_sync() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        DELETE FROM {SITADA_TABLE}
+        WHERE sitada_number = OLD.sitada_number AND complaint_id = OLD.id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO {SITADA_TABLE} (sitada_number, complaint_id)
+        VALUES (NEW.sitada_number, NEW.id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION complaints_sitada_truncate() RETURNS trigger AS $$
+BEGIN
+    TRUNCATE {SITADA_TABLE};
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+SITADA_TRIGGERS = f"""
+CREATE TRIGGER {TABLE}_sitada_sync
+AFTER INSERT OR DELETE ON {TABLE}
+FOR EACH ROW EXECUTE FUNCTION complaints_sitada_sync();
+
+CREATE TRIGGER {TABLE}_sitada_update
+AFTER UPDATE OF sitada_number ON {TABLE}
+FOR EACH ROW WHEN (OLD.sitada_number IS DISTINCT FROM NEW.sitada_number)
+EXECUTE FUNCTION complaints_sitada_sync();
+
+CREATE TRIGGER {TABLE}_sitada_truncate
+AFTER TRUNCATE ON {TABLE}
+FOR EACH STATEMENT EXECUTE FUNCTION complaints_sitada_truncate();
+"""
+NOTIFY_TRIGGER = (
+    f"CREATE TRIGGER {TABLE}_notify_change "
+    f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {TABLE} "
+    f"FOR EACH STATEMENT EXECUTE FUNCTION acat_notify_change();"
+)
+
+
+def fetch(schema_editor, sql, params=()):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def is_partitioned(schema_editor):
+    return fetch(schema_editor, "SELECT relkind FROM pg_class WHERE oid = %s::regclass", [TABLE])[0][0] == "p"
+
+
+def partition(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql" or is_partitioned(schema_editor):
+        return
+    execute = schema_editor.execute
+    old = f"{TABLE}_unpartitioned"
+
+    # Definiciones con los nombres actuales; se recrean tras borrar la tabla vieja
+    indexes = fetch(schema_editor, INDEXES_SQL, [TABLE])
+    foreign_keys = fetch(schema_editor, FOREIGN_KEYS_SQL, [TABLE])
+    current = datetime.date.today().year
+    years = {year for (year,) in fetch(
+        schema_editor, f"SELECT DISTINCT extract(year FROM infraction_date)::int FROM {TABLE}"
+    )}
+    years |= set(range(current, current + PARTITIONS_AHEAD + 1))
+    max_id = fetch(schema_editor, f"SELECT coalesce(max(id), 0) FROM {TABLE}")[0][0]
+
+    execute(f"ALTER TABLE {TABLE} RENAME TO {old}")
+    execute(
+        f"CREATE TABLE {TABLE} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS "
+        f"INCLUDING STORAGE INCLUDING COMMENTS) PARTITION BY RANGE (infraction_date)"
+    )
+    for year in sorted(years):
+        execute(
+            f"CREATE TABLE {TABLE}_y{year} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)",
+            [datetime.date(year, 1, 1), datetime.date(year + 1, 1, 1)],
+        )
+    execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+    execute(f"INSERT INTO {TABLE} SELECT * FROM {old}")
+    # CASCADE: quita las llaves foráneas de transiciones y fotos
+    execute(f"DROP TABLE {old} CASCADE")
+
+    # La columna identity de la tabla vieja (y su secuencia, del mismo
+    # nombre) no pasa a la particionada: secuencia propia
+    execute(f"CREATE SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id")
+    execute("SELECT setval(%s, %s, false)", [SEQUENCE, max_id + 1])
+    execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+    execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, infraction_date)")
+    for name, definition in foreign_keys:
+        execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+    for name, definition in indexes:
+        execute(definition)
+
+    execute(
+        f"CREATE TABLE {SITADA_TABLE} ("
+        f"sitada_number varchar(100) PRIMARY KEY, complaint_id bigint NOT NULL)"
+    )
+    execute(f"INSERT INTO {SITADA_TABLE} SELECT sitada_number, id FROM {TABLE}")
+    execute(SITADA_FUNCTION)
+    execute(SITADA_TRIGGERS)
+    execute(NOTIFY_TRIGGER)
+    execute(f"ANALYZE {TABLE}")
+
+
+def unpartition(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql" or not is_partitioned(schema_editor):
+        return
+    execute = schema_editor.execute
+    old = f"{TABLE}_partitioned"
+
+    # Los índices de la tabla padre se definen "ON ONLY"; en la tabla simple no
+    indexes = [
+        definition.replace(" ON ONLY ", " ON ", 1)
+        for _, definition in fetch(schema_editor, INDEXES_SQL, [TABLE])
+    ]
+    foreign_keys = fetch(schema_editor, FOREIGN_KEYS_SQL, [TABLE])
+
+    execute(f"ALTER TABLE {TABLE} RENAME TO {old}")
+    execute(
+        f"CREATE TABLE {TABLE} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS "
+        f"INCLUDING STORAGE INCLUDING COMMENTS)"
+    )
+    execute(f"ALTER SEQUENCE {SEQUENCE} OWNED BY NONE")
+    execute(f"INSERT INTO {TABLE} SELECT * FROM {old}")
+    execute(f"DROP TABLE {old} CASCADE")
+    execute(f"ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id")
+    execute(f"DROP TABLE {SITADA_TABLE}")
+    execute("DROP FUNCTION complaints_sitada_sync(), complaints_sitada_truncate()")
+
+    execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id)")
+    execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_sitada_number_key UNIQUE (sitada_number)")
+    for name, definition in foreign_keys:
+        execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+    for definition in indexes:
+        execute(definition)
+    for table, name in REFERENCING.items():
+        execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY (complaint_id) "
+            f"REFERENCES {TABLE} (id) DEFERRABLE INITIALLY DEFERRED"
+        )
+    execute(NOTIFY_TRIGGER)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("complaints", "0006_evidencephoto"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(partition, unpartition)],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="complaintstatustransition",
+                    name="complaint",
+                    field=models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="status_transitions",
+                        to="complaints.environmentalcomplaint",
+                        verbose_name="Denuncia",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="evidencephoto",
+                    name="complaint",
+                    field=models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="photos",
+                        to="complaints.environmentalcomplaint",
+                        verbose_name="Denuncia",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 5.0 on 2026-10-19 09:20
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+import django.db.models.manager
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("complaints", "0007_partition_complaints_by_year"),
+        ("core", "0006_active_managers"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="complainttype",
+            options={
+                "default_manager_name": "objects_all",
+                "ordering": ["name"],
+                "verbose_name": "Tipo de Denuncia",
+                "verbose_name_plural": "Tipos de Denuncia",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="infractiontype",
+            options={
+                "default_manager_name": "objects_all",
+                "ordering": ["name"],
+                "verbose_name": "Tipo de Infracción",
+                "verbose_name_plural": "Tipos de Infracción",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="environmentalcomplaint",
+            options={
+                "default_manager_name": "objects_all",
+                "ordering": ["-infraction_date", "-created_at"],
+                "verbose_name": "Denuncia Ambiental",
+                "verbose_name_plural": "Denuncias Ambientales",
+            },
+        ),
+        migrations.AlterModelManagers(
+            name="complainttype",
+            managers=[
+                ("objects_all", django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name="infractiontype",
+            managers=[
+                ("objects_all", django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name="environmentalcomplaint",
+            managers=[
+                ("objects_all", django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name="complainttype",
+            name="complaints_ctype_prefix_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="infractiontype",
+            name="complaints_itype_prefix_idx",
+        ),
+        migrations.AddIndex(
+            model_name="complainttype",
+            index=models.Index(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"),
+                    name="text_pattern_ops",
+                ),
+                condition=models.Q(("is_active", True)),
+                name="complaints_ctype_prefix_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="infractiontype",
+            index=models.Index(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"),
+                    name="text_pattern_ops",
+                ),
+                condition=models.Q(("is_active", True)),
+                name="complaints_itype_prefix_idx",
+            ),
+        ),
+        # En la tabla particionada cada índice se crea también en todas las
+        # particiones (y en las que se agreguen después)
+        migrations.AddIndex(
+            model_name="environmentalcomplaint",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["-created_at"],
+                name="complaints_active_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="environmentalcomplaint",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["status", "-created_at"],
+                name="complaints_active_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="environmentalcomplaint",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["protected_area", "sector", "-created_at"],
+                name="complaints_active_area_idx",
+            ),
+        ),
+    ]
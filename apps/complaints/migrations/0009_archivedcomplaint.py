@@ -0,0 +1,224 @@
+# Archivo de denuncias cerradas (ver apps.complaints.archive)
+#
+# - complaints_archivedcomplaint: mismas columnas que la tabla principal más
+#   archived_at; archive_complaints mueve las filas por lotes.
+# - complaints_complaintrecord: vista UNION ALL de ambas tablas para las
+#   lecturas que incluyen las archivadas (modelo no administrado).
+# - complaints_sitada conserva los números archivados para que no se
+#   reutilicen: el TRUNCATE de la tabla principal ya no los borra y borrar
+#   una archivada libera su número.
+
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+import django.db.models.manager
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+TABLE = "complaints_environmentalcomplaint"
+ARCHIVE_TABLE = "complaints_archivedcomplaint"
+VIEW = "complaints_complaintrecord"
+SITADA_TABLE = "complaints_sitada"
+COLUMNS = (
+    "id, sitada_number, police_report_number, location, protected_area_id, sector_id, "
+    "infraction_date, accused_name, complaint_type_id, infraction_name_id, description, "
+    "evidence_photos, status, created_by_id, created_at, updated_at, is_active"
+)
+
+TRUNCATE_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION complaints_sitada_truncate() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM {SITADA_TABLE} AS sitada
+    WHERE NOT EXISTS (SELECT 1 FROM {ARCHIVE_TABLE} WHERE id = sitada.complaint_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+OLD_TRUNCATE_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION complaints_sitada_truncate() RETURNS trigger AS $$
+BEGIN
+    TRUNCATE {SITADA_TABLE};
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def has_sitada_registry(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [SITADA_TABLE])
+        return cursor.fetchone()[0] is not None
+
+
+def create_view(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE VIEW {VIEW} AS "
+        f"SELECT {COLUMNS}, NULL::timestamp with time zone AS archived_at FROM {TABLE} "
+        f"UNION ALL "
+        f"SELECT {COLUMNS}, archived_at FROM {ARCHIVE_TABLE}"
+    )
+    if has_sitada_registry(schema_editor):
+        schema_editor.execute(TRUNCATE_FUNCTION)
+        schema_editor.execute(
+            f"CREATE TRIGGER {ARCHIVE_TABLE}_sitada_sync "
+            f"AFTER DELETE ON {ARCHIVE_TABLE} "
+            f"FOR EACH ROW EXECUTE FUNCTION complaints_sitada_sync()"
+        )
+
+
+def drop_view(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP VIEW IF EXISTS {VIEW}")
+    if has_sitada_registry(schema_editor):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {ARCHIVE_TABLE}_sitada_sync ON {ARCHIVE_TABLE}")
+        schema_editor.execute(OLD_TRUNCATE_FUNCTION)
+
+
+def snapshot_fields():
+    return [
+        ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+        ("sitada_number", models.CharField(max_length=100, verbose_name="Número en SITADA")),
+        (
+            "police_report_number",
+            models.CharField(blank=True, max_length=100, verbose_name="Número de informe policial"),
+        ),
+        (
+            "location",
+            django.contrib.gis.db.models.fields.PointField(srid=4326, verbose_name="Ubicación"),
+        ),
+        ("infraction_date", models.DateField(verbose_name="Fecha de la infracción")),
+        ("accused_name", models.CharField(max_length=200, verbose_name="Nombre del imputado")),
+        ("description", models.TextField(blank=True, verbose_name="Descripción detallada")),
+        (
+            "evidence_photos",
+            models.JSONField(blank=True, default=list, verbose_name="Fotos de evidencia"),
+        ),
+        (
+            "status",
+            models.CharField(
+                choices=[
+                    ("pending", "Pendiente"),
+                    ("in_progress", "En Proceso"),
+                    ("resolved", "Resuelto"),
+                    ("dismissed", "Desestimado"),
+                ],
+                max_length=20,
+                verbose_name="Estado",
+            ),
+        ),
+        ("created_at", models.DateTimeField(verbose_name="Fecha de creación")),
+        ("updated_at", models.DateTimeField(verbose_name="Fecha de actualización")),
+        ("is_active", models.BooleanField(default=True, verbose_name="Activo")),
+        (
+            "complaint_type",
+            models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to="complaints.complainttype",
+                verbose_name="Tipo de denuncia",
+            ),
+        ),
+        (
+            "created_by",
+            models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Creado por",
+            ),
+        ),
+        (
+            "infraction_name",
+            models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to="complaints.infractiontype",
+                verbose_name="Nombre de infracción",
+            ),
+        ),
+        (
+            "protected_area",
+            models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to="core.protectedarea",
+                verbose_name="Área Silvestre Protegida",
+            ),
+        ),
+        (
+            "sector",
+            models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to="core.sector",
+                verbose_name="Sector",
+            ),
+        ),
+    ]
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("complaints", "0008_active_managers"),
+        ("core", "0006_active_managers"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedComplaint",
+            fields=snapshot_fields() + [
+                (
+                    "archived_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Fecha de archivo"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Denuncia archivada",
+                "verbose_name_plural": "Denuncias archivadas",
+                "ordering": ["-infraction_date", "-created_at"],
+                "abstract": False,
+                "default_manager_name": "objects_all",
+                "indexes": [
+                    models.Index(fields=["infraction_date"], name="complaints_archived_date_idx"),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("sitada_number",), name="complaints_archived_sitada_uniq"
+                    ),
+                ],
+            },
+            managers=[
+                ("objects_all", django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ComplaintRecord",
+            fields=snapshot_fields() + [
+                ("archived_at", models.DateTimeField(null=True, verbose_name="Fecha de archivo")),
+            ],
+            options={
+                "verbose_name": "Denuncia (incluye archivadas)",
+                "verbose_name_plural": "Denuncias (incluye archivadas)",
+                "db_table": "complaints_complaintrecord",
+                "ordering": ["-infraction_date", "-created_at"],
+                "abstract": False,
+                "managed": False,
+                "default_manager_name": "objects_all",
+            },
+            managers=[
+                ("objects_all", django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.RunPython(create_view, drop_view),
+    ]
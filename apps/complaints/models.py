@@ -1,7 +1,13 @@
+import uuid
+
 from django.contrib.gis.db import models
+from django.contrib.postgres.indexes import OpClass
+from django.db import connections, transaction
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from apps.core.models import BaseModel, ProtectedArea, Sector
+from apps.core.models import ActiveManager, BaseModel, ProtectedArea, Sector
 
 
 class ComplaintType(BaseModel):
@@ -11,10 +17,18 @@ class ComplaintType(BaseModel):
     name = models.CharField(_('Nombre'), max_length=200)
     description = models.TextField(_('Descripción'), blank=True)
     
-    class Meta:
+    class Meta(BaseModel.Meta):
         verbose_name = _('Tipo de Denuncia')
         verbose_name_plural = _('Tipos de Denuncia')
         ordering = ['name']
+        indexes = [
+            # Autocompletado por prefijo, solo de tipos activos
+            models.Index(
+                OpClass(Upper('name'), name='text_pattern_ops'),
+                name='complaints_ctype_prefix_idx',
+                condition=models.Q(is_active=True),
+            ),
+        ]
     
     def __str__(self):
         return self.name
@@ -38,20 +52,112 @@ class InfractionType(BaseModel):
         default='MODERADA'
     )
     
-    class Meta:
+    class Meta(BaseModel.Meta):
         verbose_name = _('Tipo de Infracción')
         verbose_name_plural = _('Tipos de Infracción')
         ordering = ['name']
+        indexes = [
+            # Autocompletado por prefijo, solo de tipos activos
+            models.Index(
+                OpClass(Upper('name'), name='text_pattern_ops'),
+                name='complaints_itype_prefix_idx',
+                condition=models.Q(is_active=True),
+            ),
+        ]
     
     def __str__(self):
         return self.name
 
 
+STATUS_CHOICES = [
+    ('pending', _('Pendiente')),
+    ('in_progress', _('En Proceso')),
+    ('resolved', _('Resuelto')),
+    ('dismissed', _('Desestimado')),
+]
+
+
+class EnvironmentalComplaintQuerySet(models.QuerySet):
+    def with_related(self):
+        """
+        Relaciones que muestran los listados, el detalle y la API; incluye
+        sector__protected_area porque ``Sector.__str__`` la usa
+        """
+        return self.select_related(
+            'protected_area', 'sector__protected_area', 'complaint_type', 'infraction_name'
+        )
+
+    def transition_status(self, status, user=None):
+        """
+        Cambia el estado de todas las denuncias del queryset en un solo
+        ``UPDATE ... RETURNING`` y registra las transiciones con un
+        ``bulk_create``. No llama a ``save()`` ni emite ``post_save``: al
+        confirmar la transacción se envía una sola vez
+        ``complaints_bulk_updated``. Devuelve la cantidad de denuncias
+        modificadas (las que ya tenían ``status`` se omiten).
+        """
+        from .signals import complaints_bulk_updated
+
+        model = self.model
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        table = quote(model._meta.db_table)
+        pk = quote(model._meta.pk.column)
+        status_column = quote(model._meta.get_field('status').column)
+        updated_at = quote(model._meta.get_field('updated_at').column)
+        ids_sql, ids_params = self.order_by().values('pk').query.sql_with_params()
+
+        with transaction.atomic(using=self.db):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    UPDATE {table} AS complaint
+                    SET {status_column} = %s, {updated_at} = %s
+                    FROM (
+                        SELECT {pk}, {status_column} FROM {table}
+                        WHERE {pk} IN ({ids_sql}) AND {status_column} <> %s
+                        FOR UPDATE
+                    ) AS previous
+                    WHERE complaint.{pk} = previous.{pk}
+                    RETURNING complaint.{pk}, previous.{status_column}
+                    """,
+                    [status, timezone.now(), *ids_params, status],
+                )
+                changed = cursor.fetchall()
+
+            if not changed:
+                return 0
+            batch = uuid.uuid4()
+            ComplaintStatusTransition.objects.using(self.db).bulk_create(
+                [
+                    ComplaintStatusTransition(
+                        complaint_id=complaint_id,
+                        from_status=previous_status,
+                        to_status=status,
+                        changed_by=user,
+                        batch=batch,
+                    )
+                    for complaint_id, previous_status in changed
+                ],
+                batch_size=1000,
+            )
+            ids = [complaint_id for complaint_id, _ in changed]
+            transaction.on_commit(
+                lambda: complaints_bulk_updated.send(
+                    sender=model, ids=ids, status=status, user=user, batch=batch,
+                ),
+                using=self.db,
+            )
+        return len(changed)
+
+
 class EnvironmentalComplaint(BaseModel):
     """
     Denuncia Ambiental
     """
-    # Números de referencia
+    # Números de referencia. La tabla está particionada por infraction_date
+    # (apps.complaints.partitions): unique lo valida Django y en la base lo
+    # garantiza complaints_sitada
     sitada_number = models.CharField(
         _('Número en SITADA'), 
         max_length=100, 
@@ -108,19 +214,14 @@ class EnvironmentalComplaint(BaseModel):
         _('Fotos de evidencia'),
         default=list,
         blank=True,
-        help_text=_('URLs de las fotos de evidencia')
+        help_text=_('URLs de fotos externas; las subidas al sistema están en EvidencePhoto')
     )
     
     # Estado de la denuncia
     status = models.CharField(
         _('Estado'),
         max_length=20,
-        choices=[
-            ('pending', _('Pendiente')),
-            ('in_progress', _('En Proceso')),
-            ('resolved', _('Resuelto')),
-            ('dismissed', _('Desestimado')),
-        ],
+        choices=STATUS_CHOICES,
         default='pending'
     )
     
@@ -132,6 +233,9 @@ class EnvironmentalComplaint(BaseModel):
         related_name='created_complaints'
     )
     
+    objects = ActiveManager.from_queryset(EnvironmentalComplaintQuerySet)()
+    objects_all = EnvironmentalComplaintQuerySet.as_manager()
+    
     # Propiedades calculadas
     @property
     def coordinates_x(self):
@@ -143,7 +247,7 @@ class EnvironmentalComplaint(BaseModel):
         """Coordenada Y (Latitud)"""
         return self.location.y if self.location else None
     
-    class Meta:
+    class Meta(BaseModel.Meta):
         verbose_name = _('Denuncia Ambiental')
         verbose_name_plural = _('Denuncias Ambientales')
         ordering = ['-infraction_date', '-created_at']
@@ -152,7 +256,223 @@ class EnvironmentalComplaint(BaseModel):
             models.Index(fields=['infraction_date']),
             models.Index(fields=['status']),
             models.Index(fields=['protected_area', 'sector']),
+            # Listados, tablero y API leen con ``objects`` (solo activas)
+            models.Index(
+                fields=['-created_at'],
+                name='complaints_active_created_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=['status', '-created_at'],
+                name='complaints_active_status_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=['protected_area', 'sector', '-created_at'],
+                name='complaints_active_area_idx',
+                condition=models.Q(is_active=True),
+            ),
         ]
     
     def __str__(self):
         return f"SITADA {self.sitada_number} - {self.accused_name}"
+
+
+class ComplaintSnapshot(models.Model):
+    """
+    Columnas de una denuncia fuera de la tabla principal: el archivo y la
+    vista que lo combina con ella. Las llaves foráneas no tienen restricción
+    en la base ni borrado en cascada; los nombres se resuelven con refdata.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    sitada_number = models.CharField(_('Número en SITADA'), max_length=100)
+    police_report_number = models.CharField(_('Número de informe policial'), max_length=100, blank=True)
+    location = models.PointField(_('Ubicación'), srid=4326)
+    protected_area = models.ForeignKey(
+        ProtectedArea,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        verbose_name=_('Área Silvestre Protegida'),
+        related_name='+'
+    )
+    sector = models.ForeignKey(
+        Sector,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        verbose_name=_('Sector'),
+        related_name='+'
+    )
+    infraction_date = models.DateField(_('Fecha de la infracción'))
+    accused_name = models.CharField(_('Nombre del imputado'), max_length=200)
+    complaint_type = models.ForeignKey(
+        ComplaintType,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        verbose_name=_('Tipo de denuncia'),
+        related_name='+'
+    )
+    infraction_name = models.ForeignKey(
+        InfractionType,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        verbose_name=_('Nombre de infracción'),
+        related_name='+'
+    )
+    description = models.TextField(_('Descripción detallada'), blank=True)
+    evidence_photos = models.JSONField(_('Fotos de evidencia'), default=list, blank=True)
+    status = models.CharField(_('Estado'), max_length=20, choices=STATUS_CHOICES)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        verbose_name=_('Creado por'),
+        related_name='+'
+    )
+    created_at = models.DateTimeField(_('Fecha de creación'))
+    updated_at = models.DateTimeField(_('Fecha de actualización'))
+    is_active = models.BooleanField(_('Activo'), default=True)
+
+    objects = ActiveManager()
+    objects_all = models.Manager()
+
+    class Meta:
+        abstract = True
+        default_manager_name = 'objects_all'
+        ordering = ['-infraction_date', '-created_at']
+
+    def __str__(self):
+        return f"SITADA {self.sitada_number} - {self.accused_name}"
+
+
+class ArchivedComplaint(ComplaintSnapshot):
+    """
+    Denuncia cerrada (resuelta o desestimada) sacada de la tabla principal
+    por ``manage.py archive_complaints`` (ver apps.complaints.archive). Sus
+    transiciones y fotos se quedan donde estaban, con el mismo ``id``.
+    """
+    archived_at = models.DateTimeField(_('Fecha de archivo'), default=timezone.now)
+
+    class Meta(ComplaintSnapshot.Meta):
+        verbose_name = _('Denuncia archivada')
+        verbose_name_plural = _('Denuncias archivadas')
+        constraints = [
+            # complaints_sitada conserva además el número para que no se
+            # reutilice en la tabla principal
+            models.UniqueConstraint(fields=['sitada_number'], name='complaints_archived_sitada_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['infraction_date'], name='complaints_archived_date_idx'),
+        ]
+
+
+class ComplaintRecord(ComplaintSnapshot):
+    """
+    Denuncias de la tabla principal y del archivo (vista ``UNION ALL``), para
+    las lecturas que piden explícitamente incluir las archivadas.
+    ``archived_at`` es nulo en las que no están archivadas.
+    """
+    archived_at = models.DateTimeField(_('Fecha de archivo'), null=True)
+
+    class Meta(ComplaintSnapshot.Meta):
+        managed = False
+        db_table = 'complaints_complaintrecord'
+        verbose_name = _('Denuncia (incluye archivadas)')
+        verbose_name_plural = _('Denuncias (incluye archivadas)')
+
+
+class ComplaintStatusTransition(models.Model):
+    """
+    Cambio de estado de una denuncia aplicado en lote
+    """
+    # Sin llave foránea en la base: la tabla de denuncias está particionada
+    # (ver apps.complaints.partitions); el ORM hace el borrado en cascada
+    complaint = models.ForeignKey(
+        EnvironmentalComplaint,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        verbose_name=_('Denuncia'),
+        related_name='status_transitions'
+    )
+    from_status = models.CharField(_('Estado anterior'), max_length=20, choices=STATUS_CHOICES)
+    to_status = models.CharField(_('Estado nuevo'), max_length=20, choices=STATUS_CHOICES)
+    changed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_('Modificado por'),
+        related_name='+'
+    )
+    batch = models.UUIDField(_('Lote'), db_index=True)
+    created_at = models.DateTimeField(_('Fecha del cambio'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('Transición de estado')
+        verbose_name_plural = _('Transiciones de estado')
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.complaint_id}: {self.from_status} -> {self.to_status}"
+
+
+PHOTO_STATUS_CHOICES = [
+    ('pending', _('Procesando')),
+    ('ready', _('Lista')),
+    ('failed', _('Error')),
+]
+
+
+class EvidencePhoto(models.Model):
+    """
+    Foto de evidencia subida al sistema. El original se guarda una sola vez
+    por contenido (ver apps.complaints.evidence); las miniaturas se generan
+    en segundo plano y mientras tanto ``status`` es ``pending``.
+    """
+    # Sin llave foránea en la base, como ComplaintStatusTransition.complaint
+    complaint = models.ForeignKey(
+        EnvironmentalComplaint,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        verbose_name=_('Denuncia'),
+        related_name='photos'
+    )
+    content_hash = models.CharField(_('SHA-256'), max_length=64, db_index=True)
+    original = models.FileField(_('Original'), max_length=255)
+    content_type = models.CharField(_('Tipo de contenido'), max_length=50)
+    size = models.PositiveBigIntegerField(_('Tamaño (bytes)'))
+    width = models.PositiveIntegerField(_('Ancho'), null=True, blank=True)
+    height = models.PositiveIntegerField(_('Alto'), null=True, blank=True)
+    status = models.CharField(
+        _('Estado'),
+        max_length=20,
+        choices=PHOTO_STATUS_CHOICES,
+        default='pending'
+    )
+    uploaded_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_('Subida por'),
+        related_name='+'
+    )
+    created_at = models.DateTimeField(_('Fecha de carga'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('Foto de evidencia')
+        verbose_name_plural = _('Fotos de evidencia')
+        ordering = ['created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['complaint', 'content_hash'], name='complaints_photo_unique_hash'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.complaint_id}: {self.content_hash[:12]}"
+    
+    @property
+    def urls(self):
+        """URLs de las versiones reducidas: ``urls.thumb.webp``, ``urls.medium.jpeg``"""
+        from .evidence import derivative_urls
+        return derivative_urls(self.content_hash)
@@ -0,0 +1,118 @@
+"""
+Particiones anuales de las denuncias por ``infraction_date``.
+
+Desde la migración 0007 ``complaints_environmentalcomplaint`` está
+particionada por rango: una tabla por año (``..._y2024``) y una partición
+por defecto para fechas sin partición propia. Los índices y triggers se
+definen en la tabla padre y PostgreSQL los replica en cada partición.
+
+Como toda clave única debe incluir ``infraction_date``, la unicidad del
+número SITADA la mantiene ``complaints_sitada`` (número -> id), actualizada
+por triggers, y las fotos y transiciones apuntan a la denuncia sin llave
+foránea en la base.
+"""
+
+from datetime import date
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .models import EnvironmentalComplaint
+
+TABLE = EnvironmentalComplaint._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+SITADA_TABLE = 'complaints_sitada'
+
+
+def partition_name(year):
+    return f'{TABLE}_y{year}'
+
+
+def is_partitioned(using='default'):
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [TABLE])
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def partition_years(cursor):
+    """Años con partición propia"""
+    cursor.execute(
+        """
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = %s::regclass
+        """,
+        [TABLE],
+    )
+    prefix = partition_name('')
+    return {
+        int(name[len(prefix):]) for (name,) in cursor.fetchall()
+        if name.startswith(prefix) and name[len(prefix):].isdigit()
+    }
+
+
+def create_partition(cursor, year):
+    """
+    Crea la partición de ``year``. Las denuncias de ese año que hubieran
+    caído en la partición por defecto se mueven a la nueva (PostgreSQL no
+    permite crearla mientras existan).
+    """
+    quote = cursor.db.ops.quote_name
+    start, end = date(year, 1, 1), date(year + 1, 1, 1)
+    cursor.execute(
+        f'SELECT EXISTS (SELECT 1 FROM {quote(DEFAULT_PARTITION)} '
+        f'WHERE infraction_date >= %s AND infraction_date < %s)',
+        [start, end],
+    )
+    stranded = cursor.fetchone()[0]
+    if stranded:
+        cursor.execute(f'CREATE TEMP TABLE complaints_moved (LIKE {quote(TABLE)}) ON COMMIT DROP')
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {quote(DEFAULT_PARTITION)}
+                WHERE infraction_date >= %s AND infraction_date < %s
+                RETURNING *
+            )
+            INSERT INTO complaints_moved SELECT * FROM moved
+            """,
+            [start, end],
+        )
+    cursor.execute(
+        f'CREATE TABLE {quote(partition_name(year))} PARTITION OF {quote(TABLE)} '
+        f'FOR VALUES FROM (%s) TO (%s)',
+        [start, end],
+    )
+    if stranded:
+        cursor.execute(f'INSERT INTO {quote(TABLE)} SELECT * FROM complaints_moved')
+        cursor.execute('DROP TABLE complaints_moved')
+
+
+def ensure_partitions(years=(), using='default'):
+    """
+    Crea las particiones que falten para ``years``, para el año en curso y
+    los ``COMPLAINTS_PARTITIONS_AHEAD`` siguientes, y para los años que
+    tengan denuncias en la partición por defecto. Devuelve los años creados.
+    """
+    if not is_partitioned(using):
+        return []
+    current = date.today().year
+    wanted = set(years) | set(range(current, current + settings.COMPLAINTS_PARTITIONS_AHEAD + 1))
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    created = []
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        # Serializa la creación entre procesos (migrate, cron, importaciones)
+        cursor.execute(f'LOCK TABLE {quote(TABLE)} IN SHARE ROW EXCLUSIVE MODE')
+        cursor.execute(
+            f'SELECT DISTINCT extract(year FROM infraction_date)::int FROM {quote(DEFAULT_PARTITION)}'
+        )
+        wanted |= {year for (year,) in cursor.fetchall()}
+        for year in sorted(wanted - partition_years(cursor)):
+            create_partition(cursor, year)
+            created.append(year)
+    return created
@@ -1,9 +1,55 @@
 from rest_framework import serializers
 from rest_framework_gis.serializers import GeoFeatureModelSerializer
-from .models import EnvironmentalComplaint, ComplaintType, InfractionType
+from apps.core import refdata
+from apps.core.query_budget import query_budget
+from .models import STATUS_CHOICES, ComplaintRecord, EnvironmentalComplaint, ComplaintType, InfractionType
 from apps.core.models import ProtectedArea, Sector
 
 
+class ReferenceNameField(serializers.ReadOnlyField):
+    """
+    Nombre de un dato de referencia resuelto con apps.core.refdata a partir
+    de la llave foránea (``source='complaint_type_id'``), sin JOIN
+    """
+    
+    def __init__(self, model, **kwargs):
+        self.model = model
+        super().__init__(**kwargs)
+    
+    def to_representation(self, value):
+        obj = refdata.lookup(self.model, value)
+        return obj.name if obj is not None else None
+
+
+class ReferencePrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """
+    Llave foránea a un dato de referencia validada contra refdata; uno
+    desactivado solo se acepta si la instancia ya lo tenía
+    """
+    
+    def to_internal_value(self, data):
+        obj = refdata.lookup(self.get_queryset().model, data)
+        if obj is None or not (obj.is_active or obj.pk == self._current_pk()):
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+    
+    def _current_pk(self):
+        instance = getattr(self.parent, 'instance', None)
+        return getattr(instance, f'{self.source}_id', None)
+
+
+class ReferenceDataMixin:
+    """
+    Carga refdata al crear el serializer (con ``many=True``, al crear el
+    hijo), fuera del presupuesto por fila de ``to_representation``
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        refdata.preload()
+
+
+@query_budget(0)
 class ComplaintTypeSerializer(serializers.ModelSerializer):
     """
     Serializer para tipos de denuncia
@@ -19,10 +65,14 @@ class ComplaintTypeSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
     
     def get_complaint_count(self, obj):
-        """Obtener cantidad de denuncias por tipo"""
-        return obj.environmentalcomplaint_set.count()
+        """
+        Cantidad de denuncias por tipo, anotada por el ViewSet; un tipo
+        recién creado no tiene denuncias
+        """
+        return getattr(obj, 'complaint_count', 0)
 
 
+@query_budget(0)
 class InfractionTypeSerializer(serializers.ModelSerializer):
     """
     Serializer para tipos de infracción
@@ -38,18 +88,21 @@ class InfractionTypeSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
     
     def get_complaint_count(self, obj):
-        """Obtener cantidad de denuncias por tipo de infracción"""
-        return obj.environmentalcomplaint_set.count()
+        """Cantidad de denuncias por tipo de infracción, anotada por el ViewSet"""
+        return getattr(obj, 'complaint_count', 0)
 
 
-class EnvironmentalComplaintSerializer(serializers.ModelSerializer):
+@query_budget(0)
+class EnvironmentalComplaintSerializer(ReferenceDataMixin, serializers.ModelSerializer):
     """
     Serializer básico para denuncias ambientales
     """
-    complaint_type_name = serializers.CharField(source='complaint_type.name', read_only=True)
-    infraction_name_display = serializers.CharField(source='infraction_name.name', read_only=True)
-    protected_area_name = serializers.CharField(source='protected_area.name', read_only=True)
-    sector_name = serializers.CharField(source='sector.name', read_only=True)
+    serializer_related_field = ReferencePrimaryKeyField
+    
+    complaint_type_name = ReferenceNameField(ComplaintType, source='complaint_type_id')
+    infraction_name_display = ReferenceNameField(InfractionType, source='infraction_name_id')
+    protected_area_name = ReferenceNameField(ProtectedArea, source='protected_area_id')
+    sector_name = ReferenceNameField(Sector, source='sector_id')
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     
     class Meta:
@@ -66,12 +119,26 @@ class EnvironmentalComplaintSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
 
-class EnvironmentalComplaintGeoSerializer(GeoFeatureModelSerializer):
+@query_budget(0)
+class ComplaintRecordSerializer(EnvironmentalComplaintSerializer):
+    """
+    Denuncias de la vista que incluye las archivadas (``?include_archived=1``);
+    solo lectura
+    """
+    
+    class Meta(EnvironmentalComplaintSerializer.Meta):
+        model = ComplaintRecord
+        fields = EnvironmentalComplaintSerializer.Meta.fields + ['archived_at']
+        read_only_fields = fields
+
+
+@query_budget(0)
+class EnvironmentalComplaintGeoSerializer(ReferenceDataMixin, GeoFeatureModelSerializer):
     """
     Serializer GeoJSON para denuncias ambientales con ubicación
     """
-    complaint_type_name = serializers.CharField(source='complaint_type.name', read_only=True)
-    protected_area_name = serializers.CharField(source='protected_area.name', read_only=True)
+    complaint_type_name = ReferenceNameField(ComplaintType, source='complaint_type_id')
+    protected_area_name = ReferenceNameField(ProtectedArea, source='protected_area_id')
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     
     class Meta:
@@ -84,18 +151,30 @@ class EnvironmentalComplaintGeoSerializer(GeoFeatureModelSerializer):
         ]
 
 
+class BulkStatusSerializer(serializers.Serializer):
+    """
+    Cambio de estado en lote: a las denuncias de ``ids`` o, si no se indican,
+    a todas las que cumplan los filtros de la URL
+    """
+    status = serializers.ChoiceField(choices=STATUS_CHOICES)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False
+    )
+
+
 # Serializers para referencias en las APIs
 class ProtectedAreaSerializer(serializers.ModelSerializer):
     """Serializer para áreas protegidas"""
     class Meta:
         model = ProtectedArea
-        fields = ['id', 'name', 'code', 'area_type']
+        fields = ['id', 'name', 'code']
 
 
+@query_budget(0)
 class SectorSerializer(serializers.ModelSerializer):
     """Serializer para sectores"""
     protected_area_name = serializers.CharField(source='protected_area.name', read_only=True)
     
     class Meta:
         model = Sector
-        fields = ['id', 'name', 'code', 'protected_area', 'protected_area_name']
+        fields = ['id', 'name', 'protected_area', 'protected_area_name']
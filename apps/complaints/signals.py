@@ -0,0 +1,43 @@
+"""
+Señales de denuncias.
+
+``complaints_bulk_updated`` se envía una vez por lote (ver
+``EnvironmentalComplaintQuerySet.transition_status``) con los argumentos
+``ids``, ``status``, ``user`` y ``batch``; los cachés y agregados que dependen
+de las denuncias se refrescan aquí una sola vez en lugar de por fila.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from apps.core.metrics import invalidate_domain_metrics
+from .cache import bump_collection_version
+from .models import EnvironmentalComplaint
+from .partitions import ensure_partitions
+
+complaints_bulk_updated = Signal()
+
+
+def refresh_complaint_rollups():
+    bump_collection_version()
+    invalidate_domain_metrics()
+
+
+@receiver(post_save, sender=EnvironmentalComplaint, dispatch_uid='complaints_saved_rollups')
+@receiver(post_delete, sender=EnvironmentalComplaint, dispatch_uid='complaints_deleted_rollups')
+def complaint_changed(sender, using=None, **kwargs):
+    # Al confirmar: antes, otro request podría cachear la página vieja con
+    # la versión nueva
+    transaction.on_commit(refresh_complaint_rollups, using=using)
+
+
+@receiver(complaints_bulk_updated, sender=EnvironmentalComplaint, dispatch_uid='complaints_bulk_rollups')
+def complaints_bulk_changed(sender, **kwargs):
+    # transition_status ya envía la señal después del commit
+    refresh_complaint_rollups()
+
+
+def create_upcoming_partitions(sender, using='default', **kwargs):
+    """post_migrate: particiones del año en curso y los siguientes"""
+    ensure_partitions(using=using)
@@ -0,0 +1,11 @@
+"""
+Tareas en segundo plano de denuncias (ver apps.core.jobs)
+"""
+
+from apps.core import jobs
+from .evidence import generate_derivatives, mark_failed
+
+
+@jobs.task(name='complaints.generate_photo_derivatives', on_failure=mark_failed)
+def generate_photo_derivatives(photo_id):
+    generate_derivatives(photo_id)
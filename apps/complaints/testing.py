@@ -0,0 +1,156 @@
+"""
+Utilidades de prueba: datos de denuncias de tamaño creciente, la
+comprobación de que una vista ejecuta siempre el número de consultas
+esperado con cualquier cantidad de filas y la de que sus consultas sobre
+las denuncias usan índices.
+"""
+
+import json
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.core import refdata
+from apps.core.models import ProtectedArea, Sector
+from .models import ComplaintType, EnvironmentalComplaint, EvidencePhoto, InfractionType
+
+LOCMEM_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'query-scaling-tests',
+    }
+}
+
+# Tamaños de datos; el mayor pasa de una página (20) para incluir la paginación
+DATASET_SIZES = (1, 5, 45)
+
+
+def seq_scans(node, table):
+    """Tablas (o particiones) de ``table`` recorridas por completo en el plan"""
+    found = []
+    if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name', '').startswith(table):
+        found.append(node['Relation Name'])
+    for child in node.get('Plans', []):
+        found += seq_scans(child, table)
+    return found
+
+
+@override_settings(CACHES=LOCMEM_CACHE, QUERY_BUDGET_MODE='raise')
+class QueryScalingTestCase(TestCase):
+    """
+    Cada denuncia usa un área, sector, tipo e infracción distintos (en
+    rotación) y tiene una foto, de modo que un acceso por fila a una
+    relación se nota como consultas adicionales.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('inspector', password='clave')
+        cls.areas = []
+        cls.sectors = []
+        for number in range(4):
+            area = ProtectedArea.objects.create(name=f'Área {number}', code=f'A{number}')
+            cls.areas.append(area)
+            cls.sectors.append(Sector.objects.create(name=f'Sector {number}', protected_area=area))
+        cls.complaint_types = [ComplaintType.objects.create(name=f'Tipo {number}') for number in range(3)]
+        cls.infractions = [InfractionType.objects.create(name=f'Infracción {number}') for number in range(3)]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.created = 0
+
+    def grow_to(self, size):
+        """Agrega denuncias (con una foto cada una) hasta tener ``size``"""
+        complaints = EnvironmentalComplaint.objects.bulk_create([
+            EnvironmentalComplaint(
+                sitada_number=f'SITADA-{number:05d}',
+                accused_name=f'Imputado {number}',
+                description=f'Descripción {number}',
+                infraction_date=date(2024, 1, 1) + timedelta(days=number),
+                location=Point(-85.3 + number / 1000, 10.3, srid=4326),
+                protected_area=self.areas[number % len(self.areas)],
+                sector=self.sectors[number % len(self.sectors)],
+                complaint_type=self.complaint_types[number % len(self.complaint_types)],
+                infraction_name=self.infractions[number % len(self.infractions)],
+                created_by=self.user,
+            )
+            for number in range(self.created, size)
+        ])
+        EvidencePhoto.objects.bulk_create([
+            EvidencePhoto(
+                complaint=complaint,
+                content_hash=f'{complaint.pk:064x}',
+                original=f'evidence/originals/{complaint.pk}.jpg',
+                content_type='image/jpeg',
+                size=1024,
+                status='ready',
+                uploaded_by=self.user,
+            )
+            for complaint in complaints
+        ])
+        self.created = size
+
+    def count_queries(self, url, **extra):
+        # En frío: sin caché de páginas, conteos ni datos de referencia
+        cache.clear()
+        refdata.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, **extra)
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries)
+
+    def assertQueryCountConstant(self, get_url, expected, sizes=DATASET_SIZES, **extra):
+        """
+        Mide ``get_url()`` (una URL, o una función que la calcula tras crecer
+        los datos) con cada tamaño y exige exactamente ``expected`` consultas
+        en todos: un N+1 hace crecer la cuenta con las filas y una consulta
+        extra por request la sube en todos los tamaños
+        """
+        counts = {}
+        for size in sizes:
+            self.grow_to(size)
+            url = get_url() if callable(get_url) else get_url
+            counts[size] = self.count_queries(url, **extra)
+        self.assertEqual(
+            counts, dict.fromkeys(sizes, expected),
+            f'Consultas por tamaño de datos (filas: consultas), se esperaban {expected}: {counts}',
+        )
+
+    def assertUsesIndexes(self, url, table=EnvironmentalComplaint._meta.db_table, **extra):
+        """
+        Repite con ``enable_seqscan = off`` el plan de cada consulta de
+        ``url`` sobre ``table`` (o sus particiones) y falla si alguna sigue
+        recorriendo la tabla completa: un filtro u orden sin índice, que con
+        pocas filas no cambia la cuenta de consultas
+        """
+        self.grow_to(DATASET_SIZES[-1])
+        cache.clear()
+        refdata.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, **extra)
+        self.assertEqual(response.status_code, 200, url)
+
+        scans = []
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+            try:
+                for query in queries:
+                    sql = query['sql']
+                    if not sql.lstrip().upper().startswith('SELECT') or table not in sql:
+                        continue
+                    cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+                    plan = cursor.fetchone()[0]
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    scans += [(relation, sql) for relation in seq_scans(plan[0]['Plan'], table)]
+            finally:
+                cursor.execute('RESET enable_seqscan')
+        self.assertEqual(scans, [], f'Recorridos completos de {table} en {url}')
+
+    def latest_complaint(self):
+        return EnvironmentalComplaint.objects.order_by('-pk').first()
@@ -1,3 +1,556 @@
-from django.test import TestCase
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import date
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import Permission, User
+from django.contrib.gis.geos import Point
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from apps.core import refdata
+from apps.core.models import Job, ProtectedArea, Sector
+from . import evidence
+from .forms import EnvironmentalComplaintForm
+from .models import (
+    ArchivedComplaint, ComplaintRecord, ComplaintStatusTransition, ComplaintType, EnvironmentalComplaint,
+    EvidencePhoto, InfractionType,
+)
+from .signals import complaints_bulk_updated
+from .testing import QueryScalingTestCase
+
+
+LOCMEM_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'complaints-tests',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ComplaintListCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('inspector')
+        area = ProtectedArea.objects.create(name='Palo Verde', code='PV')
+        sector = Sector.objects.create(name='Catalina', protected_area=area)
+        complaint_type = ComplaintType.objects.create(name='Tala ilegal')
+        infraction = InfractionType.objects.create(name='Corta de árboles')
+        EnvironmentalComplaint.objects.bulk_create([
+            EnvironmentalComplaint(
+                sitada_number=f'SITADA-{number:04d}',
+                accused_name=f'Imputado {number}',
+                infraction_date=date(2024, 1, 1),
+                location=Point(-85.3, 10.3, srid=4326),
+                protected_area=area,
+                sector=sector,
+                complaint_type=complaint_type,
+                infraction_name=infraction,
+                created_by=user,
+            )
+            for number in range(20)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        refdata.clear()
+        self.url = reverse('complaints:list')
+
+    def get_list(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_warm_cache_skips_rendering_queries(self):
+        cold_response, cold_queries = self.get_list()
+        warm_response, warm_queries = self.get_list()
+
+        self.assertEqual(cold_response.content, warm_response.content)
+        self.assertGreater(cold_queries, 0)
+        self.assertLessEqual(warm_queries, cold_queries // 3)
+
+    def test_change_invalidates_page(self):
+        self.get_list()
+        complaint = EnvironmentalComplaint.objects.get(sitada_number='SITADA-0019')
+        complaint.accused_name = 'Nombre corregido'
+        with self.captureOnCommitCallbacks(execute=True):
+            complaint.save()
+
+        response, _ = self.get_list()
+        self.assertContains(response, 'Nombre corregido')
+
+    def test_bulk_transition_invalidates_page(self):
+        self.get_list()
+        with self.captureOnCommitCallbacks(execute=True):
+            EnvironmentalComplaint.objects.all().transition_status('resolved')
+
+        response, _ = self.get_list()
+        self.assertNotContains(response, 'Pendiente')
+        self.assertContains(response, 'Resuelto')
+
+    def test_reference_rename_invalidates_rows(self):
+        self.get_list()
+        complaint_type = ComplaintType.objects.get()
+        complaint_type.name = 'Extracción de madera'
+        with self.captureOnCommitCallbacks(execute=True):
+            complaint_type.save()
+
+        response, _ = self.get_list()
+        self.assertContains(response, 'Extracción de madera')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class InactiveReferenceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('inspector')
+        cls.area = ProtectedArea.objects.create(name='Palo Verde', code='PV')
+        cls.sector = Sector.objects.create(name='Catalina', protected_area=cls.area)
+        cls.retired_type = ComplaintType.objects.create(name='Cacería', is_active=False)
+        cls.infraction = InfractionType.objects.create(name='Caza ilegal')
+
+    def setUp(self):
+        cache.clear()
+        refdata.clear()
+
+    def form_data(self):
+        return {
+            'sitada_number': 'SITADA-0001',
+            'accused_name': 'Imputado',
+            'infraction_date': '2024-01-01',
+            'complaint_type': self.retired_type.pk,
+            'infraction_name': self.infraction.pk,
+            'protected_area': self.area.pk,
+            'sector': self.sector.pk,
+            'description': '',
+            'status': 'pending',
+            'latitude': 10.3,
+            'longitude': -85.3,
+        }
+
+    def test_new_complaint_rejects_inactive_type(self):
+        form = EnvironmentalComplaintForm(data=self.form_data())
+        self.assertFalse(form.is_valid())
+        self.assertIn('complaint_type', form.errors)
+
+    def test_existing_complaint_keeps_inactive_type(self):
+        complaint = EnvironmentalComplaint.objects.create(
+            sitada_number='SITADA-0001',
+            accused_name='Imputado',
+            infraction_date=date(2024, 1, 1),
+            location=Point(-85.3, 10.3, srid=4326),
+            protected_area=self.area,
+            sector=self.sector,
+            complaint_type=self.retired_type,
+            infraction_name=self.infraction,
+            created_by=self.user,
+        )
+        form = EnvironmentalComplaintForm(data=self.form_data(), instance=complaint)
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_inactive_complaints_leave_the_list(self):
+        self.client.force_login(self.user)
+        EnvironmentalComplaint.objects.create(
+            sitada_number='SITADA-0002',
+            accused_name='Archivado',
+            infraction_date=date(2024, 1, 1),
+            location=Point(-85.3, 10.3, srid=4326),
+            protected_area=self.area,
+            sector=self.sector,
+            complaint_type=self.retired_type,
+            infraction_name=self.infraction,
+            created_by=self.user,
+            is_active=False,
+        )
+        response = self.client.get(reverse('complaints:list'))
+        self.assertNotContains(response, 'Archivado')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BulkStatusTests(TestCase):
+    url = '/api/denuncias/bulk-status/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.supervisor = User.objects.create_user('supervisor')
+        cls.supervisor.user_permissions.add(Permission.objects.get(codename='change_environmentalcomplaint'))
+        cls.inspector = User.objects.create_user('inspector')
+        area = ProtectedArea.objects.create(name='Santa Rosa', code='SR')
+        defaults = {
+            'location': Point(-85.6, 10.8, srid=4326),
+            'infraction_date': date(2024, 2, 1),
+            'protected_area': area,
+            'sector': Sector.objects.create(name='Murciélago', protected_area=area),
+            'complaint_type': ComplaintType.objects.create(name='Cacería'),
+            'infraction_name': InfractionType.objects.create(name='Caza ilegal'),
+            'created_by': cls.inspector,
+            'accused_name': 'Imputado',
+        }
+        cls.pending = [
+            EnvironmentalComplaint.objects.create(sitada_number=f'SITADA-{number:04d}', **defaults)
+            for number in range(3)
+        ]
+        cls.resolved = EnvironmentalComplaint.objects.create(
+            sitada_number='SITADA-0100', status='resolved', **defaults
+        )
+
+    def post(self, data, query=''):
+        return self.client.post(self.url + query, data, content_type='application/json')
+
+    def statuses(self):
+        return dict(EnvironmentalComplaint.objects.values_list('sitada_number', 'status'))
+
+    def test_requires_change_permission(self):
+        self.client.force_login(self.inspector)
+        response = self.post({'status': 'resolved', 'ids': [self.pending[0].pk]})
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.statuses()['SITADA-0000'], 'pending')
+        self.assertFalse(ComplaintStatusTransition.objects.exists())
+
+    def test_requires_ids_or_filter(self):
+        self.client.force_login(self.supervisor)
+        response = self.post({'status': 'resolved'}, query='?ordering=created_at')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('resolved', {self.statuses()[f'SITADA-000{number}'] for number in range(3)})
+
+    def test_ids_skip_complaints_already_in_status(self):
+        self.client.force_login(self.supervisor)
+        response = self.post({'status': 'resolved', 'ids': [self.pending[0].pk, self.resolved.pk]})
+
+        self.assertEqual(response.json(), {'status': 'resolved', 'updated': 1})
+        transition = ComplaintStatusTransition.objects.get()
+        self.assertEqual(
+            (transition.complaint_id, transition.from_status, transition.to_status, transition.changed_by),
+            (self.pending[0].pk, 'pending', 'resolved', self.supervisor),
+        )
+        self.assertEqual(self.statuses()['SITADA-0001'], 'pending')
+
+    def test_filter_applies_to_matching_complaints_in_one_batch(self):
+        self.client.force_login(self.supervisor)
+        received = []
+        complaints_bulk_updated.connect(lambda **kwargs: received.append(kwargs), weak=False,
+                                        dispatch_uid='bulk_status_test')
+        self.addCleanup(complaints_bulk_updated.disconnect, dispatch_uid='bulk_status_test')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post({'status': 'in_progress'}, query='?status=pending')
+
+        self.assertEqual(response.json()['updated'], 3)
+        self.assertEqual(
+            self.statuses(),
+            {'SITADA-0000': 'in_progress', 'SITADA-0001': 'in_progress', 'SITADA-0002': 'in_progress',
+             'SITADA-0100': 'resolved'},
+        )
+        transitions = ComplaintStatusTransition.objects.all()
+        self.assertEqual(len({transition.batch for transition in transitions}), 1)
+        self.assertEqual(
+            sorted(transition.complaint_id for transition in transitions),
+            sorted(complaint.pk for complaint in self.pending),
+        )
+        self.assertEqual(len(received), 1)
+        self.assertEqual(sorted(received[0]['ids']), sorted(complaint.pk for complaint in self.pending))
+
+    def test_admin_action(self):
+        self.client.force_login(User.objects.create_superuser('jefe'))
+        response = self.client.post(
+            reverse('admin:complaints_environmentalcomplaint_changelist'),
+            {'action': 'mark_dismissed', '_selected_action': [self.pending[0].pk, self.pending[1].pk]},
+            follow=True,
+        )
+
+        self.assertContains(response, '2 denuncias cambiadas a &quot;Desestimado&quot;.')
+        self.assertEqual(self.statuses()['SITADA-0000'], 'dismissed')
+        self.assertEqual(self.statuses()['SITADA-0002'], 'pending')
+        self.assertEqual(ComplaintStatusTransition.objects.filter(to_status='dismissed').count(), 2)
+
+    def test_admin_action_requires_change_permission(self):
+        staff = User.objects.create_user('auditor', is_staff=True)
+        staff.user_permissions.add(Permission.objects.get(codename='view_environmentalcomplaint'))
+        self.client.force_login(staff)
+        self.client.post(
+            reverse('admin:complaints_environmentalcomplaint_changelist'),
+            {'action': 'mark_dismissed', '_selected_action': [self.pending[0].pk]},
+        )
+
+        self.assertEqual(self.statuses()['SITADA-0000'], 'pending')
+        self.assertFalse(ComplaintStatusTransition.objects.exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHE, JOBS_RUN_INLINE=True, EVIDENCE_PHOTO_MAX_BYTES=1024 * 1024)
+class EvidencePhotoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('inspector')
+        area = ProtectedArea.objects.create(name='Tortuguero', code='TO')
+        defaults = {
+            'location': Point(-83.5, 10.5, srid=4326),
+            'infraction_date': date(2024, 3, 1),
+            'protected_area': area,
+            'sector': Sector.objects.create(name='Jalova', protected_area=area),
+            'complaint_type': ComplaintType.objects.create(name='Saqueo de nidos'),
+            'infraction_name': InfractionType.objects.create(name='Extracción de huevos'),
+            'created_by': cls.user,
+            'accused_name': 'Imputado',
+        }
+        cls.complaint = EnvironmentalComplaint.objects.create(sitada_number='SITADA-0200', **defaults)
+        cls.other = EnvironmentalComplaint.objects.create(sitada_number='SITADA-0201', **defaults)
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = self.settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.client.force_login(self.user)
+
+    @staticmethod
+    def png(size=(800, 600), color='green'):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, color).save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def upload(self, complaint, *files):
+        return self.client.post(
+            reverse('complaints:upload-photos', args=[complaint.pk]),
+            {'photos': [SimpleUploadedFile(name, content) for name, content in files]},
+        )
+
+    def messages(self, response):
+        return [str(message) for message in get_messages(response.wsgi_request)]
+
+    def test_upload_stores_original_under_its_hash(self):
+        content = self.png()
+
+        response = self.upload(self.complaint, ('nido.png', content))
+
+        self.assertRedirects(response, reverse('complaints:detail', args=[self.complaint.pk]),
+                             fetch_redirect_response=False)
+        photo = EvidencePhoto.objects.get()
+        content_hash = hashlib.sha256(content).hexdigest()
+        self.assertEqual(
+            (photo.content_hash, photo.original.name, photo.content_type, photo.width, photo.height),
+            (content_hash, evidence.original_name(content_hash, '.png'), 'image/png', 800, 600),
+        )
+        self.assertEqual((photo.status, photo.uploaded_by, photo.size), ('pending', self.user, len(content)))
+        self.assertTrue(default_storage.exists(photo.original.name))
+        self.assertEqual(Job.objects.get().task, 'complaints.generate_photo_derivatives')
+
+    def test_duplicate_upload_reuses_stored_original(self):
+        content = self.png()
+        self.upload(self.complaint, ('nido.png', content))
+        self.upload(self.other, ('copia.png', content))
+        response = self.upload(self.complaint, ('reenviada.png', content))
+
+        photos = EvidencePhoto.objects.order_by('complaint_id')
+        self.assertEqual([photo.complaint_id for photo in photos], [self.complaint.pk, self.other.pk])
+        self.assertEqual(len({photo.original.name for photo in photos}), 1)
+        _, stored = default_storage.listdir(os.path.dirname(photos[0].original.name))
+        self.assertEqual(len(stored), 1)
+        self.assertEqual(self.messages(response), [])
+
+    def test_rejects_files_that_are_not_images(self):
+        response = self.upload(self.complaint, ('notas.png', b'no es una imagen'))
+
+        self.assertFalse(EvidencePhoto.objects.exists())
+        self.assertEqual(self.messages(response), ['notas.png: no es una imagen válida'])
+
+    def test_rejects_oversized_files(self):
+        # Ruido aleatorio: el PNG no se comprime por debajo del límite
+        noise = Image.frombytes('RGB', (700, 700), os.urandom(700 * 700 * 3))
+        buffer = io.BytesIO()
+        noise.save(buffer, 'PNG')
+        self.assertGreater(buffer.tell(), 1024 * 1024)
+
+        response = self.upload(self.complaint, ('grande.png', buffer.getvalue()))
+
+        self.assertFalse(EvidencePhoto.objects.exists())
+        self.assertEqual(self.messages(response), [
+            'No se recibió ninguna foto (el tamaño máximo por archivo es de 1 MB).'
+        ])
+
+    def test_derivatives_generated_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload(self.complaint, ('nido.png', self.png()))
+
+        photo = EvidencePhoto.objects.get()
+        self.assertEqual(photo.status, 'ready')
+        for size, longest in evidence.SIZES.items():
+            for fmt in evidence.FORMATS:
+                with default_storage.open(evidence.derivative_name(photo.content_hash, size, fmt)) as stored:
+                    with Image.open(stored) as image:
+                        self.assertEqual(max(image.size), min(longest, 800))
+        self.assertEqual(Job.objects.get().status, 'succeeded')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('inspector')
+        area = ProtectedArea.objects.create(name='Palo Verde', code='PV')
+        sector = Sector.objects.create(name='Catalina', protected_area=area)
+        complaint_type = ComplaintType.objects.create(name='Tala ilegal')
+        infraction = InfractionType.objects.create(name='Corta de árboles')
+        cls.defaults = {
+            'location': Point(-85.3, 10.3, srid=4326),
+            'protected_area': area,
+            'sector': sector,
+            'complaint_type': complaint_type,
+            'infraction_name': infraction,
+            'created_by': cls.user,
+            'accused_name': 'Imputado',
+        }
+        for number, (year, status) in enumerate([
+            (2020, 'resolved'), (2020, 'dismissed'), (2020, 'pending'), (2024, 'resolved'),
+        ]):
+            EnvironmentalComplaint.objects.create(
+                sitada_number=f'SITADA-{number:04d}', infraction_date=date(year, 3, 1),
+                status=status, **cls.defaults,
+            )
+
+    def test_moves_closed_complaints_older_than_cutoff(self):
+        call_command('archive_complaints', '--older-than', '2023-01-01', '--batch-size', '1', stdout=StringIO())
+
+        self.assertEqual(
+            sorted(ArchivedComplaint.objects.values_list('sitada_number', flat=True)),
+            ['SITADA-0000', 'SITADA-0001'],
+        )
+        self.assertEqual(EnvironmentalComplaint.objects.count(), 2)
+        self.assertEqual(ComplaintRecord.objects.count(), 4)
+
+    def test_archived_sitada_number_is_not_reused(self):
+        call_command('archive_complaints', '--older-than', '2023-01-01', stdout=StringIO())
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            EnvironmentalComplaint.objects.bulk_create([EnvironmentalComplaint(
+                sitada_number='SITADA-0000', infraction_date=date(2024, 5, 1), **self.defaults,
+            )])
+
+    def test_api_includes_archived_only_on_request(self):
+        call_command('archive_complaints', '--older-than', '2023-01-01', stdout=StringIO())
+        self.client.force_login(self.user)
+        url = '/api/denuncias/?format=json'
+
+        self.assertEqual(self.client.get(url).json()['count'], 2)
+        response = self.client.get(url + '&include_archived=1')
+        self.assertEqual(response.json()['count'], 4)
+
+    def test_admin_lists_transitions_of_archived_complaints(self):
+        for sitada_number in ('SITADA-0000', 'SITADA-0003'):
+            ComplaintStatusTransition.objects.create(
+                complaint=EnvironmentalComplaint.objects.get(sitada_number=sitada_number),
+                from_status='pending', to_status='resolved', batch=uuid.uuid4(),
+            )
+        call_command('archive_complaints', '--older-than', '2023-01-01', stdout=StringIO())
+        self.client.force_login(User.objects.create_superuser('supervisor'))
+
+        url = reverse('admin:complaints_complaintstatustransition_changelist')
+        response = self.client.get(url)
+        self.assertContains(response, 'SITADA SITADA-0000 (archivada)')
+        self.assertContains(response, 'SITADA SITADA-0003')
+        self.assertEqual(len(response.context['cl'].result_list), 2)
+
+        response = self.client.get(url, {'q': 'SITADA-0000'})
+        self.assertEqual(len(response.context['cl'].result_list), 1)
+
+
+# Consultas esperadas: sesión y usuario (2), conteo estimado (EXPLAIN y
+# COUNT, 2) y refdata en frío (una por tabla, 4)
+class ComplaintViewQueryScalingTests(QueryScalingTestCase):
+    def test_list(self):
+        # Conteo del paginador y total, cada uno EXPLAIN + COUNT, y la página
+        self.assertQueryCountConstant(reverse('complaints:list'), 7)
+
+    def test_list_last_page(self):
+        self.assertQueryCountConstant(reverse('complaints:list') + '?page=last', 7)
+
+    def test_detail(self):
+        # La denuncia y sus fotos
+        self.assertQueryCountConstant(
+            lambda: reverse('complaints:detail', args=[self.latest_complaint().pk]), 4
+        )
+
+    def test_list_uses_indexes(self):
+        self.assertUsesIndexes(reverse('complaints:list'))
+
+
+class ApiQueryScalingTests(QueryScalingTestCase):
+    def test_complaint_list(self):
+        # Conteo, página y refdata para los nombres
+        self.assertQueryCountConstant('/api/denuncias/?format=json', 9)
+
+    def test_complaint_list_with_archived(self):
+        self.assertQueryCountConstant('/api/denuncias/?format=json&include_archived=1', 9)
+
+    def test_complaint_detail(self):
+        self.assertQueryCountConstant(
+            lambda: f'/api/denuncias/{self.latest_complaint().pk}/?format=json', 7
+        )
+
+    def test_complaint_type_list(self):
+        self.assertQueryCountConstant('/api/tipos-denuncia/?format=json', 5)
+
+    def test_complaint_type_detail(self):
+        self.assertQueryCountConstant(f'/api/tipos-denuncia/{self.complaint_types[0].pk}/?format=json', 3)
+
+    def test_infraction_type_list(self):
+        self.assertQueryCountConstant('/api/tipos-infraccion/?format=json', 5)
+
+    def test_infraction_type_detail(self):
+        self.assertQueryCountConstant(f'/api/tipos-infraccion/{self.infractions[0].pk}/?format=json', 3)
+
+
+class ApiFilterQueryScalingTests(QueryScalingTestCase):
+    """
+    Filtros del listado de denuncias: cada filtro por llave foránea valida
+    el valor con una consulta; todos deben resolverse con índices
+    """
+
+    def filtered(self, query):
+        return f'/api/denuncias/?format=json&{query}'
+
+    def test_status(self):
+        url = self.filtered('status=pending')
+        self.assertQueryCountConstant(url, 9)
+        self.assertUsesIndexes(url)
+
+    def test_status_in(self):
+        url = self.filtered('status__in=pending,in_progress')
+        self.assertQueryCountConstant(url, 9)
+        self.assertUsesIndexes(url)
+
+    def test_area_and_sector(self):
+        url = self.filtered(f'protected_area={self.areas[0].pk}&sector={self.sectors[0].pk}')
+        self.assertQueryCountConstant(url, 11)
+        self.assertUsesIndexes(url)
+
+    def test_complaint_type(self):
+        url = self.filtered(f'complaint_type={self.complaint_types[0].pk}')
+        self.assertQueryCountConstant(url, 10)
+        self.assertUsesIndexes(url)
+
+    def test_infraction(self):
+        url = self.filtered(f'infraction_name={self.infractions[0].pk}')
+        self.assertQueryCountConstant(url, 10)
+        self.assertUsesIndexes(url)
+
+    def test_created_since(self):
+        url = self.filtered('created_at__gte=2000-01-01T00:00:00Z')
+        self.assertQueryCountConstant(url, 9)
+        self.assertUsesIndexes(url)
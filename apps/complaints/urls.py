@@ -9,4 +9,9 @@ urlpatterns = [
     path('<int:pk>/', views.ComplaintDetailView.as_view(), name='detail'),
     path('<int:pk>/editar/', views.ComplaintUpdateView.as_view(), name='update'),
     path('<int:pk>/eliminar/', views.ComplaintDeleteView.as_view(), name='delete'),
+    path('<int:pk>/fotos/', views.EvidencePhotoUploadView.as_view(), name='upload-photos'),
+    path('autocompletar/areas/', views.ProtectedAreaAutocomplete.as_view(), name='autocomplete-areas'),
+    path('autocompletar/sectores/', views.SectorAutocomplete.as_view(), name='autocomplete-sectors'),
+    path('autocompletar/tipos-denuncia/', views.ComplaintTypeAutocomplete.as_view(), name='autocomplete-complaint-types'),
+    path('autocompletar/tipos-infraccion/', views.InfractionTypeAutocomplete.as_view(), name='autocomplete-infraction-types'),
 ]
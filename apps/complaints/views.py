@@ -1,16 +1,33 @@
-from django.shortcuts import render
+import functools
+
+from django.conf import settings
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from django.contrib import messages
+from apps.core.autocomplete import AutocompleteView
+from apps.core.http_cache import cache_policy
+from apps.core import refdata
+from apps.core.models import ProtectedArea, Sector
+from apps.core.query_budget import query_budget
+from .cache import VersionedCountPaginator, cached_estimated_count, collection_version, reference_version
+from .evidence import HashingUploadHandler, InvalidPhoto, add_photo
 from .models import EnvironmentalComplaint, ComplaintType, InfractionType
 from .forms import EnvironmentalComplaintForm
 
 
+# Presupuestos: sesión + usuario (plantilla base) + las consultas de la vista
+@query_budget(10)
 class ComplaintListView(ListView):
     model = EnvironmentalComplaint
     template_name = 'complaints/list.html'
     context_object_name = 'complaints'
+    queryset = EnvironmentalComplaint.objects.all()
     paginate_by = 20
+    paginator_class = VersionedCountPaginator
     ordering = ['-created_at']
     
     def get_queryset(self):
@@ -19,22 +36,75 @@ class ComplaintListView(ListView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['total_complaints'] = EnvironmentalComplaint.objects.count()
-        context['complaint_types'] = ComplaintType.objects.all()
+        context['total_complaints'] = cached_estimated_count(EnvironmentalComplaint.objects.all())
+        # La plantilla llama a la función solo si lo usa
+        context['complaint_types'] = functools.partial(refdata.all_objects, ComplaintType, active_only=True)
+        # La tabla se cachea por página hasta que cambie alguna denuncia
+        context['collection_version'] = collection_version()
+        context['reference_version'] = reference_version()
+        context['fragment_cache_seconds'] = settings.COMPLAINTS_FRAGMENT_CACHE_SECONDS
         return context
 
 
+@query_budget(5)
 class ComplaintDetailView(DetailView):
     model = EnvironmentalComplaint
+    queryset = EnvironmentalComplaint.objects.all()
     template_name = 'complaints/detail.html'
     context_object_name = 'complaint'
     
     def get_queryset(self):
-        return super().get_queryset().select_related(
-            'protected_area', 'sector', 'complaint_type', 'infraction_name'
-        )
+        return super().get_queryset().with_related()
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['reference_version'] = reference_version()
+        context['fragment_cache_seconds'] = settings.COMPLAINTS_FRAGMENT_CACHE_SECONDS
+        # Fuera del fragmento cacheado: cambian al terminar las miniaturas
+        context['photos'] = list(self.object.photos.all())
+        return context
 
 
+@method_decorator(csrf_exempt, name='dispatch')
+class EvidencePhotoUploadView(View):
+    """
+    Carga de fotos de evidencia (campo ``photos``, varios archivos). Los
+    archivos se reciben en bloques con HashingUploadHandler, que debe
+    instalarse antes de que algo lea ``request.POST``; por eso la vista es
+    csrf_exempt y la verificación CSRF se hace dentro de ``post``.
+    """
+    
+    def post(self, request, pk):
+        request.upload_handlers = [HashingUploadHandler(request)]
+        return self._post(request, pk)
+    
+    @method_decorator(csrf_protect)
+    def _post(self, request, pk):
+        complaint = get_object_or_404(EnvironmentalComplaint.objects, pk=pk)
+        files = request.FILES.getlist('photos')
+        if not files:
+            messages.error(
+                request,
+                'No se recibió ninguna foto (el tamaño máximo por archivo es de '
+                f'{settings.EVIDENCE_PHOTO_MAX_BYTES // (1024 * 1024)} MB).'
+            )
+            return redirect('complaints:detail', pk=pk)
+        
+        user = request.user if request.user.is_authenticated else None
+        added = 0
+        for uploaded_file in files:
+            try:
+                _, created = add_photo(complaint, uploaded_file, user=user)
+            except InvalidPhoto as exc:
+                messages.error(request, str(exc))
+                continue
+            added += created
+        if added:
+            messages.success(request, f'{added} fotos agregadas; las miniaturas se están generando.')
+        return redirect('complaints:detail', pk=pk)
+
+
+@query_budget(10)
 class ComplaintCreateView(CreateView):
     model = EnvironmentalComplaint
     form_class = EnvironmentalComplaintForm
@@ -47,8 +117,10 @@ class ComplaintCreateView(CreateView):
         return super().form_valid(form)
 
 
+@query_budget(12)
 class ComplaintUpdateView(UpdateView):
     model = EnvironmentalComplaint
+    queryset = EnvironmentalComplaint.objects.all()
     form_class = EnvironmentalComplaintForm
     template_name = 'complaints/form.html'
     success_url = reverse_lazy('complaints:list')
@@ -60,9 +132,46 @@ class ComplaintUpdateView(UpdateView):
 
 class ComplaintDeleteView(DeleteView):
     model = EnvironmentalComplaint
+    queryset = EnvironmentalComplaint.objects.all()
     template_name = 'complaints/confirm_delete.html'
     success_url = reverse_lazy('complaints:list')
     
     def delete(self, request, *args, **kwargs):
         messages.success(request, 'Denuncia eliminada exitosamente.')
         return super().delete(request, *args, **kwargs)
+
+
+# Catálogos sin datos del usuario: cacheables por navegadores y nginx
+lookup_cache = cache_policy('public', max_age=60, stale_while_revalidate=300)
+
+
+@lookup_cache
+class ProtectedAreaAutocomplete(AutocompleteView):
+    model = ProtectedArea
+    search_fields = ('name', 'code')
+
+
+@lookup_cache
+class SectorAutocomplete(AutocompleteView):
+    """Sectores del área indicada en ``?area=``; sin área no hay resultados"""
+    model = Sector
+
+    def get_queryset(self):
+        area = self.request.GET.get('area')
+        if not area or not area.isdigit():
+            return Sector.objects.none()
+        return Sector.objects.filter(protected_area_id=area).order_by('name')
+
+    def label(self, obj):
+        # No usar str(): desreferencia protected_area
+        return obj.name
+
+
+@lookup_cache
+class ComplaintTypeAutocomplete(AutocompleteView):
+    model = ComplaintType
+
+
+@lookup_cache
+class InfractionTypeAutocomplete(AutocompleteView):
+    model = InfractionType
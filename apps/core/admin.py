@@ -1,12 +1,14 @@
-from django.contrib import admin
-from .models import ProtectedArea, Sector
+from django.contrib import admin, messages
+from django.utils import timezone
+from .models import Job, ProtectedArea, Sector, SlowQuery
 
 
 @admin.register(ProtectedArea)
 class ProtectedAreaAdmin(admin.ModelAdmin):
     list_display = ('code', 'name', 'is_active', 'created_at')
     list_filter = ('is_active', 'created_at')
-    search_fields = ('name', 'code')
+    # Prefijo: usa los índices UPPER(...) text_pattern_ops del autocompletado
+    search_fields = ('^name', '^code')
     ordering = ('name',)
     list_editable = ('is_active',)
 
@@ -15,6 +17,52 @@ class ProtectedAreaAdmin(admin.ModelAdmin):
 class SectorAdmin(admin.ModelAdmin):
     list_display = ('name', 'protected_area', 'is_active', 'created_at')
     list_filter = ('protected_area', 'is_active', 'created_at')
-    search_fields = ('name', 'protected_area__name')
+    search_fields = ('^name', '^protected_area__name')
     ordering = ('protected_area__name', 'name')
     list_editable = ('is_active',)
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'duration_ms', 'origin', 'fingerprint', 'database')
+    list_filter = ('origin', 'database', 'created_at')
+    search_fields = ('fingerprint', 'normalized_sql', 'origin')
+    ordering = ('-created_at',)
+    readonly_fields = (
+        'fingerprint', 'normalized_sql', 'sql', 'duration_ms',
+        'origin', 'database', 'plan', 'created_at',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'queue', 'status', 'progress', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status', 'queue', 'task')
+    search_fields = ('task', 'locked_by')
+    ordering = ('-created_at',)
+    actions = ['requeue']
+    readonly_fields = (
+        'task', 'queue', 'args', 'kwargs', 'priority', 'status', 'run_at', 'attempts',
+        'max_attempts', 'progress_current', 'progress_total', 'progress_message', 'result',
+        'last_error', 'locked_by', 'heartbeat_at', 'created_by', 'created_at', 'started_at',
+        'finished_at',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description='Avance')
+    def progress(self, obj):
+        if obj.progress_percent is None:
+            return obj.progress_message or '-'
+        return f'{obj.progress_percent}% {obj.progress_message}'.strip()
+
+    @admin.action(description='Volver a encolar los trabajos fallidos', permissions=['change'])
+    def requeue(self, request, queryset):
+        updated = queryset.filter(status='failed').update(
+            status='queued', attempts=0, run_at=timezone.now(), finished_at=None,
+        )
+        self.message_user(request, f'{updated} trabajos reencolados.', messages.SUCCESS)
@@ -1,7 +1,15 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.core"
     verbose_name = "Core"
+
+    def ready(self):
+        from apps.core import refdata, slow_queries, sql_comments
+
+        connection_created.connect(slow_queries.install, dispatch_uid='acat_slow_queries')
+        connection_created.connect(sql_comments.install, dispatch_uid='acat_sql_comments')
+        refdata.connect_signals()
@@ -0,0 +1,118 @@
+"""
+Autocompletado para llaves foráneas en formularios públicos.
+
+``AutocompleteSelect`` renderiza solamente la opción seleccionada, de modo
+que el costo del formulario no depende del tamaño de la tabla relacionada;
+las demás opciones se piden a una vista ``AutocompleteView`` que busca por
+prefijo sobre ``UPPER(campo)`` (cubierto por índices ``text_pattern_ops``).
+"""
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import JsonResponse
+from django.views import View
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Select que solo incluye la opción vacía y la seleccionada; el resto se
+    carga por AJAX desde ``url``. ``depends_on`` es el nombre del campo del
+    formulario que filtra las opciones (búsqueda encadenada).
+    """
+
+    def __init__(self, url, depends_on=None, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+        self.depends_on = depends_on
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = str(self.url)
+        if self.depends_on:
+            attrs['data-depends-on'] = self.depends_on
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        # self.choices es el ModelChoiceIterator del campo; recorrerlo
+        # cargaría la tabla completa
+        field = self.choices.field
+        selected = {str(v) for v in value if v not in (None, '')}
+        groups = []
+        if field.empty_label is not None:
+            groups.append((None, [self.create_option(name, '', field.empty_label, not selected, 0)], 0))
+        if selected:
+            # Los campos de datos de referencia resuelven sin consultar la BD
+            resolve = getattr(field, 'instances_for', None)
+            instances = resolve(selected) if resolve else self.instances(field, selected)
+            for index, obj in enumerate(instances, start=1):
+                option_value = field.prepare_value(obj)
+                groups.append((None, [self.create_option(
+                    name, option_value, field.label_from_instance(obj), True, index,
+                )], index))
+        return groups
+
+    @staticmethod
+    def instances(field, values):
+        # Un valor alterado (p. ej. "abc" para un id) se descarta, como en
+        # refdata.lookup, en lugar de fallar al volver a mostrar el formulario
+        model = field.queryset.model
+        key = field.to_field_name or 'pk'
+        model_field = model._meta.get_field(field.to_field_name) if field.to_field_name else model._meta.pk
+        valid = []
+        for value in values:
+            try:
+                valid.append(model_field.to_python(value))
+            except ValidationError:
+                continue
+        if not valid:
+            return []
+        return field.queryset.filter(**{f'{key}__in': valid})
+
+
+class AutocompleteView(View):
+    """
+    Búsqueda por prefijo que responde
+    ``{"results": [{"id": ..., "text": ...}], "more": bool}``
+
+    ``search_fields`` se comparan con ``istartswith`` (``UPPER(campo) LIKE
+    'TÉRMINO%'``), que PostgreSQL resuelve con un índice funcional
+    ``UPPER(campo) text_pattern_ops``.
+    """
+    model = None
+    search_fields = ('name',)
+    page_size = 20
+
+    def get_queryset(self):
+        return self.model.objects.all()
+
+    def filter_term(self, queryset, term):
+        if not term:
+            return queryset
+        condition = None
+        for field in self.search_fields:
+            lookup = Q(**{f'{field}__istartswith': term})
+            condition = lookup if condition is None else condition | lookup
+        return queryset.filter(condition)
+
+    def label(self, obj):
+        return str(obj)
+
+    def get(self, request, *args, **kwargs):
+        term = request.GET.get('q', '').strip()
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        queryset = self.filter_term(self.get_queryset(), term)
+
+        offset = (page - 1) * self.page_size
+        # Una fila extra indica si hay más resultados sin hacer COUNT(*)
+        rows = list(queryset[offset:offset + self.page_size + 1])
+        return JsonResponse({
+            'results': [
+                {'id': obj.pk, 'text': self.label(obj)}
+                for obj in rows[:self.page_size]
+            ],
+            'more': len(rows) > self.page_size,
+        })
@@ -0,0 +1,153 @@
+"""
+Invalidación de cachés en el proceso mediante LISTEN/NOTIFY de PostgreSQL.
+
+Los triggers de las migraciones ``core.0004`` y ``complaints.0005`` ejecutan
+``pg_notify('acat_changes', '<tabla>:<operación>')`` una vez por sentencia y
+PostgreSQL entrega la notificación a todas las sesiones que escuchan el
+canal cuando la transacción confirma. Cada worker de gunicorn (ver
+``acat_system/wsgi.py``) y cada comando de larga duración que llame a
+``start()`` mantiene un hilo con su propia conexión escuchando el canal y
+avisa a los suscriptores de las tablas modificadas.
+
+Mientras el hilo no está conectado, ``is_healthy()`` devuelve False y los
+cachés deben volver a su mecanismo de respaldo (p. ej. refdata consulta la
+versión compartida en Redis). Al reconectar se invalida todo, porque las
+notificaciones enviadas durante la desconexión se pierden.
+"""
+
+import logging
+import os
+import select
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('acat.change_listener')
+
+CHANNEL = 'acat_changes'
+# Cada cuánto se verifica la conexión si no llegan notificaciones
+KEEPALIVE_SECONDS = 30
+MAX_BACKOFF_SECONDS = 30
+
+_subscribers = defaultdict(list)
+_all_tables_subscribers = []
+_state = {'thread': None, 'pid': None, 'healthy': False}
+_lock = threading.Lock()
+_stop = threading.Event()
+
+
+def subscribe(tables, callback):
+    """
+    ``callback(tables)`` se llama en el hilo del listener con el conjunto de
+    tablas modificadas; con ``tables=None`` recibe todas las notificaciones.
+    Tras una reconexión se llama con ``None`` (todo puede haber cambiado).
+    """
+    if tables is None:
+        _all_tables_subscribers.append(callback)
+        return
+    for table in tables:
+        _subscribers[table].append(callback)
+
+
+def is_healthy():
+    return _state['healthy'] and _state['pid'] == os.getpid()
+
+
+def _dispatch(tables):
+    callbacks = list(_all_tables_subscribers)
+    if tables is None:
+        callbacks += [cb for group in _subscribers.values() for cb in group]
+    else:
+        for table in tables:
+            callbacks += _subscribers.get(table, [])
+    for callback in dict.fromkeys(callbacks):
+        try:
+            callback(tables)
+        except Exception:
+            logger.exception('Error en el suscriptor %r', callback)
+
+
+def _connect(alias):
+    wrapper = connections[alias]
+    params = wrapper.get_connection_params()
+    params.pop('cursor_factory', None)
+    params['application_name'] = f'acat-listener-{os.getpid()}'
+    # PgBouncer en modo transacción no entrega las notificaciones
+    if settings.DB_DIRECT_HOST:
+        params['host'] = settings.DB_DIRECT_HOST
+        params['port'] = settings.DB_DIRECT_PORT or params.get('port')
+    conn = wrapper.Database.connect(**params)
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute(f'LISTEN {CHANNEL}')
+    return conn
+
+
+def _listen(conn):
+    while not _stop.is_set():
+        ready, _, _ = select.select([conn], [], [], KEEPALIVE_SECONDS)
+        if not ready:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            continue
+        conn.poll()
+        tables = set()
+        while conn.notifies:
+            notify = conn.notifies.pop(0)
+            tables.add(notify.payload.split(':', 1)[0])
+        if tables:
+            _dispatch(tables)
+
+
+def _run(alias):
+    backoff = 1
+    while not _stop.is_set():
+        conn = None
+        try:
+            conn = _connect(alias)
+            _state['healthy'] = True
+            backoff = 1
+            logger.info('Escuchando el canal %s', CHANNEL)
+            # Lo ocurrido antes de conectar (o durante una desconexión) no
+            # se notificó
+            _dispatch(None)
+            _listen(conn)
+        except Exception:
+            logger.warning(
+                'Listener de %s desconectado; reintento en %ss', CHANNEL, backoff, exc_info=True
+            )
+        finally:
+            _state['healthy'] = False
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        _stop.wait(backoff)
+        backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+
+
+def start(alias='default'):
+    """
+    Inicia el hilo del listener en este proceso (idempotente). Después de un
+    fork el hilo del padre no existe en el hijo, por eso se compara el pid.
+    """
+    if not settings.CHANGE_LISTENER_ENABLED or connections[alias].vendor != 'postgresql':
+        return False
+    with _lock:
+        if _state['pid'] == os.getpid() and _state['thread'] is not None and _state['thread'].is_alive():
+            return True
+        _stop.clear()
+        _state.update(pid=os.getpid(), healthy=False)
+        thread = threading.Thread(
+            target=_run, args=(alias,), name='acat-change-listener', daemon=True
+        )
+        _state['thread'] = thread
+        thread.start()
+    return True
+
+
+def stop():
+    _stop.set()
@@ -0,0 +1,40 @@
+"""
+Backend PostGIS con métricas de conexiones.
+
+Mide cuánto tarda cada conexión nueva (con PgBouncer en modo transacción es
+solo el login en el pooler; la espera por una conexión al servidor ocurre en
+la primera consulta y no se incluye), lleva la cuenta de conexiones abiertas
+por proceso y adelanta al azar el reciclaje por ``CONN_MAX_AGE`` para que los
+workers no se reconecten todos en el mismo segundo.
+"""
+
+import random
+import time
+
+from django.contrib.gis.db.backends.postgis.base import DatabaseWrapper as PostGISDatabaseWrapper
+
+from apps.core.metrics import DB_CONNECT_SECONDS, DB_CONNECTIONS_OPEN, DB_CONNECTIONS_OPENED
+
+# Fracción de CONN_MAX_AGE que se puede adelantar el cierre de una conexión
+MAX_AGE_JITTER = 0.1
+
+
+class DatabaseWrapper(PostGISDatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        DB_CONNECT_SECONDS.labels(database=self.alias).observe(time.perf_counter() - started)
+        DB_CONNECTIONS_OPENED.labels(database=self.alias).inc()
+        DB_CONNECTIONS_OPEN.labels(database=self.alias).inc()
+        return connection
+
+    def connect(self):
+        super().connect()
+        max_age = self.settings_dict['CONN_MAX_AGE']
+        if self.close_at is not None and max_age:
+            self.close_at -= random.uniform(0, max_age * MAX_AGE_JITTER)
+
+    def _close(self):
+        if self.connection is not None:
+            DB_CONNECTIONS_OPEN.labels(database=self.alias).dec()
+        return super()._close()
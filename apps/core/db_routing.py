@@ -0,0 +1,152 @@
+"""
+Lecturas en réplicas de PostgreSQL.
+
+Las vistas de solo lectura pesadas se marcan con ``@read_replica`` (los
+tableros, el mapa, los catálogos y las denuncias de la API). En un request
+GET o HEAD a una de ellas, ``ReplicaRouter`` envía las lecturas a una réplica
+sana; todo lo demás, y todas las escrituras, van a ``default``. Fuera de
+requests (comandos, trabajos) se usa ``with use_replica():``.
+
+- Lectura de lo propio: un request que escribe deja una cookie que fija al
+  usuario en ``default`` durante ``REPLICA_STICKY_SECONDS``, y desde la
+  primera escritura el resto del request también lee de ``default``.
+- Retraso: cada proceso consulta el retraso de cada réplica a lo sumo cada
+  ``REPLICA_LAG_CHECK_SECONDS``; una réplica con más de
+  ``REPLICA_MAX_LAG_SECONDS`` o que no responde se descarta hasta la próxima
+  revisión. Sin réplicas sanas se lee de ``default``.
+"""
+
+import contextlib
+import contextvars
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from .metrics import DB_REPLICA_LAG, DB_ROUTED_READS
+
+logger = logging.getLogger('acat.db_routing')
+
+STICKY_COOKIE = 'acat_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN NULL
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+END
+"""
+
+
+@dataclass
+class RoutingState:
+    replica: bool = True
+    wrote: bool = False
+    alias: str = None
+
+
+_state = contextvars.ContextVar('acat_db_routing', default=None)
+_lag_lock = threading.Lock()
+# alias -> (revisado en, retraso en segundos o None si no sirve)
+_lag_checks = {}
+
+
+def read_replica(view):
+    """Marca una vista (función o clase, incluidos viewsets) para leer de réplicas"""
+    view.read_replica = True
+    return view
+
+
+def wants_replica(view_func):
+    view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+    return bool(getattr(view_func, 'read_replica', False) or getattr(view_class, 'read_replica', False))
+
+
+def replica_lag(alias):
+    """Retraso de la réplica en segundos; None si no responde o no es réplica"""
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            lag = cursor.fetchone()[0]
+    except DatabaseError:
+        logger.warning('La réplica %s no responde', alias, exc_info=True)
+        connections[alias].close()
+        return None
+    if lag is None:
+        logger.warning('%s no es una réplica (pg_is_in_recovery() es falso)', alias)
+        return None
+    return float(lag)
+
+
+def healthy_replicas():
+    now = time.monotonic()
+    healthy = []
+    for alias in settings.REPLICA_DATABASES:
+        with _lag_lock:
+            checked_at, lag = _lag_checks.get(alias, (None, None))
+            stale = checked_at is None or now - checked_at >= settings.REPLICA_LAG_CHECK_SECONDS
+            if stale:
+                # Marca la revisión antes de hacerla: otros hilos usan el valor anterior
+                _lag_checks[alias] = (now, lag)
+        if stale:
+            lag = replica_lag(alias)
+            with _lag_lock:
+                _lag_checks[alias] = (now, lag)
+            DB_REPLICA_LAG.labels(database=alias).set(-1 if lag is None else lag)
+        if lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS:
+            healthy.append(alias)
+    return healthy
+
+
+def _choose():
+    healthy = healthy_replicas()
+    alias = random.choice(healthy) if healthy else 'default'
+    DB_ROUTED_READS.labels(database=alias).inc()
+    return alias
+
+
+@contextlib.contextmanager
+def use_replica(enabled=True):
+    """Lecturas del bloque en una réplica (si hay alguna sana)"""
+    token = _state.set(RoutingState(replica=enabled and bool(settings.REPLICA_DATABASES)))
+    try:
+        yield _state.get()
+    finally:
+        _state.reset(token)
+
+
+def pinned_to_primary(request):
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaRouter:
+    """Router de ``DATABASE_ROUTERS``; las réplicas solo se usan dentro de ``use_replica``"""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica or state.wrote:
+            return 'default'
+        if state.alias is None:
+            state.alias = _choose()
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Las réplicas tienen los mismos datos que default
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
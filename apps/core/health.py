@@ -0,0 +1,89 @@
+"""
+Chequeos de salud usados por /health/ y /ready/.
+
+Cada chequeo tiene un tiempo máximo acotado y el resultado conjunto se
+cachea en memoria del proceso unos segundos, de modo que el HEALTHCHECK de
+Docker, nginx y el cron puedan consultar seguido sin cargar la base de datos.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+
+_lock = threading.Lock()
+_cached_result = None
+_cached_at = 0.0
+
+
+def _statement_timeout_ms():
+    return int(settings.HEALTH_CHECK_TIMEOUT * 1000)
+
+
+def check_database():
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL statement_timeout = %s', [_statement_timeout_ms()])
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+
+
+def check_postgis():
+    if connection.vendor != 'postgresql':
+        return 'skipped'
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL statement_timeout = %s', [_statement_timeout_ms()])
+            cursor.execute('SELECT PostGIS_Lib_Version()')
+            return cursor.fetchone()[0]
+
+
+def check_cache():
+    backend = settings.CACHES['default']['BACKEND']
+    if 'redis' not in backend.lower():
+        return 'skipped'
+    # Los timeouts de socket se configuran en CACHES['default']['OPTIONS']
+    cache.set('health:ping', 'ok', 10)
+    if cache.get('health:ping') != 'ok':
+        raise RuntimeError('lectura de caché inconsistente')
+
+
+CHECKS = (
+    ('database', check_database),
+    ('postgis', check_postgis),
+    ('cache', check_cache),
+)
+
+
+def run_checks():
+    results = {}
+    healthy = True
+    for name, check in CHECKS:
+        started = time.perf_counter()
+        try:
+            detail = check()
+            results[name] = {'ok': True}
+            if detail:
+                results[name]['detail'] = detail
+        except Exception as exc:
+            healthy = False
+            results[name] = {'ok': False, 'error': f'{type(exc).__name__}: {exc}'}
+        results[name]['ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return healthy, results
+
+
+def readiness():
+    """
+    Resultado de los chequeos, reutilizado durante HEALTH_CHECK_CACHE_SECONDS
+    """
+    global _cached_result, _cached_at
+    with _lock:
+        now = time.monotonic()
+        if _cached_result is None or now - _cached_at >= settings.HEALTH_CHECK_CACHE_SECONDS:
+            _cached_result = run_checks()
+            _cached_at = now
+        return _cached_result
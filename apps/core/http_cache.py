@@ -0,0 +1,81 @@
+"""
+Políticas de caché HTTP por vista.
+
+``@cache_policy(scope, max_age, stale_while_revalidate, vary)`` fija
+``Cache-Control``/``Vary`` en las respuestas 200 a GET y HEAD. Los alcances:
+
+- ``public``: la misma respuesta para cualquier visitante, también anónimo.
+  Navegadores y el microcaché de nginx la guardan ``max_age`` segundos.
+- ``shared``: la misma respuesta para todo usuario autenticado (agregados,
+  catálogos de la API). El navegador la ve como ``private``; nginx la
+  guarda por ``X-Accel-Expires`` en una sola copia compartida, solo en
+  ubicaciones protegidas con ``auth_request`` a ``/auth/check/`` (ver
+  ``nginx/staging.conf``).
+- ``private``: depende del usuario (páginas con su nombre, mensajes); solo
+  la guarda su navegador y lleva ``Vary: Cookie``.
+
+Se aplica como decorador de funciones o de vistas basadas en clases
+(incluidos los ViewSets de DRF).
+"""
+
+import functools
+
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views import View
+
+SCOPES = ('public', 'shared', 'private')
+
+
+def apply_policy(response, scope, max_age=0, stale_while_revalidate=0, vary=()):
+    directives = {'max_age': max_age}
+    if stale_while_revalidate:
+        directives['stale_while_revalidate'] = stale_while_revalidate
+
+    if scope == 'public':
+        patch_cache_control(response, public=True, **directives)
+    else:
+        patch_cache_control(response, private=True, **directives)
+        patch_vary_headers(response, ('Cookie', 'Authorization') if scope == 'shared' else ('Cookie',))
+        if scope == 'shared' and max_age:
+            # nginx lo interpreta y no lo reenvía al cliente
+            response['X-Accel-Expires'] = str(max_age)
+    if vary:
+        patch_vary_headers(response, vary)
+    return response
+
+
+class cache_policy:
+    def __init__(self, scope, max_age=0, stale_while_revalidate=0, vary=()):
+        if scope not in SCOPES:
+            raise ValueError(f'Alcance de caché desconocido: {scope!r}')
+        self.scope = scope
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+        self.vary = tuple(vary)
+
+    def __call__(self, target):
+        if isinstance(target, type):
+            if not issubclass(target, View):
+                raise TypeError(f'cache_policy no sabe decorar la clase {target.__name__}')
+            target.dispatch = self._wrap(target.dispatch, method=True)
+            return target
+        return self._wrap(target)
+
+    def _wrap(self, func, method=False):
+        policy = self
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            request = args[1] if method else args[0]
+            response = func(*args, **kwargs)
+            if (
+                request.method in ('GET', 'HEAD')
+                and response.status_code == 200
+                and not response.has_header('Cache-Control')
+            ):
+                apply_policy(
+                    response, policy.scope, policy.max_age,
+                    policy.stale_while_revalidate, policy.vary,
+                )
+            return response
+        return wrapper
@@ -0,0 +1,484 @@
+"""
+Recomendaciones de índices a partir de las consultas reales
+(``manage.py index_advisor``).
+
+Las fuentes son ``pg_stat_statements`` (tiempo acumulado por forma de
+consulta) y los querysets calientes que cada app declara en su módulo
+``hot_queries.py``::
+
+    @index_advisor.hot_queryset('Listado de denuncias')
+    def complaint_list():
+        return EnvironmentalComplaint.objects.order_by('-created_at')[:20]
+
+De cada consulta se extraen, por tabla, las columnas comparadas por
+igualdad, la columna de rango y el orden. Con eso se proponen índices
+compuestos (igualdad primero, luego rango u orden), parciales cuando la
+consulta filtra ``is_active``, con ``INCLUDE`` cuando la consulta lee pocas
+columnas más, y BRIN para rangos sobre columnas correlacionadas con el orden
+físico de tablas grandes. Se descartan las propuestas que un índice
+existente ya cubre y se señalan los índices sin uso o redundantes.
+
+El análisis del SQL es heurístico: está pensado para el SQL que genera el
+ORM de Django y su resultado es una migración para revisar, no para aplicar
+a ciegas.
+"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+
+from django.apps import apps
+from django.contrib.postgres.indexes import BrinIndex
+from django.db import migrations, models
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+from django.utils.module_loading import autodiscover_modules
+
+# Columnas extra que se agregan con INCLUDE como máximo
+MAX_INCLUDE = 3
+# Correlación mínima (pg_stats) para proponer BRIN en lugar de B-tree
+BRIN_MIN_CORRELATION = 0.9
+
+_registry = {}
+
+CLAUSE_END = r'\b(?:GROUP BY|ORDER BY|LIMIT|OFFSET|FOR UPDATE|HAVING)\b'
+
+
+def hot_queryset(name):
+    """Registra una función sin argumentos que devuelve un queryset caliente"""
+    def register(func):
+        _registry[name] = func
+        return func
+    return register
+
+
+def autodiscover():
+    autodiscover_modules('hot_queries')
+    return dict(_registry)
+
+
+@dataclass
+class Pattern:
+    """Cómo una consulta usa una tabla"""
+    table: str
+    equality: tuple = ()
+    range_column: str = None
+    order: tuple = ()
+    active_only: bool = False
+    selected: frozenset = frozenset()
+
+    def key(self):
+        return (self.table, self.equality, self.range_column, self.order, self.active_only)
+
+
+@dataclass
+class Workload:
+    pattern: Pattern
+    time_ms: float = 0.0
+    calls: int = 0
+    cost: float = 0.0
+    sources: list = field(default_factory=list)
+
+
+@dataclass
+class ExistingIndex:
+    name: str
+    table: str
+    method: str
+    columns: tuple
+    include: tuple
+    opclasses: tuple
+    predicate: str
+    unique: bool
+    constraint: bool
+    expression: bool
+    scans: int
+    size: int
+
+
+@dataclass
+class Proposal:
+    model: type
+    index: models.Index
+    workload: Workload
+    reason: str
+
+
+# --- Análisis del SQL -------------------------------------------------------
+
+def _section(sql, start, end=CLAUSE_END):
+    match = re.search(start, sql, re.IGNORECASE)
+    if not match:
+        return ''
+    rest = sql[match.end():]
+    stop = re.search(end, rest, re.IGNORECASE)
+    return rest[:stop.start()] if stop else rest
+
+
+def parse(sql, tables):
+    """
+    Patrones de acceso por tabla de ``tables`` en una consulta del ORM. Solo
+    mira la consulta externa; los alias de tabla no se resuelven.
+    """
+    select = _section(sql, r'\bSELECT\b', r'\bFROM\b')
+    where = _section(sql, r'\bWHERE\b')
+    order = _section(sql, r'\bORDER BY\b', r'\b(?:LIMIT|OFFSET|FOR UPDATE)\b')
+
+    patterns = {}
+    for table in tables:
+        if f'"{table}"' not in sql:
+            continue
+        column = rf'"{table}"\."(\w+)"'
+        # "=" con un valor, no con otra columna (F() o condiciones de JOIN)
+        equality = set(re.findall(column + r'\s*(?:=(?!\s*")|IN\s*\(|IS\s+NULL)', where, re.IGNORECASE))
+        ranges = re.findall(column + r'\s*(?:(?:<(?!>)|>)=?|BETWEEN\b)', where, re.IGNORECASE)
+        # Booleanos sin comparación: WHERE "t"."is_active" AND ...
+        equality |= set(re.findall(
+            r'(?:^|\bAND|\bOR|\()\s*' + column + r'\s*(?=AND\b|OR\b|\)|$)', where.strip()
+        ))
+        active_only = 'is_active' in equality
+        equality.discard('is_active')
+        ordering = tuple(
+            (name, direction.upper() == 'DESC')
+            for name, direction in re.findall(column + r'\s*(ASC|DESC)?', order, re.IGNORECASE)
+        )
+        ranges = [name for name in ranges if name not in equality]
+        if not (equality or ranges or ordering or active_only):
+            continue
+        patterns[table] = Pattern(
+            table=table,
+            equality=tuple(sorted(equality)),
+            range_column=ranges[0] if ranges else None,
+            order=ordering,
+            active_only=active_only,
+            selected=frozenset(re.findall(column, select)),
+        )
+    return patterns
+
+
+def seq_scans(plan, tables):
+    """Tablas de ``tables`` leídas con Seq Scan en un plan EXPLAIN (FORMAT JSON)"""
+    found = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') in tables:
+            found.append((node['Relation Name'], node.get('Filter', ''), node.get('Plan Rows', 0)))
+        stack.extend(node.get('Plans', []))
+    return found
+
+
+def _add(workloads, pattern, source, time_ms=0.0, calls=0, cost=0.0):
+    workload = workloads.get(pattern.key())
+    if workload is None:
+        workload = workloads[pattern.key()] = Workload(pattern)
+    else:
+        workload.pattern.selected |= pattern.selected
+    workload.time_ms += time_ms
+    workload.calls += calls
+    workload.cost = max(workload.cost, cost)
+    workload.sources.append(source)
+
+
+def statement_workloads(cursor, tables, workloads, min_calls=10, limit=200):
+    """Agrega las formas de consulta de pg_stat_statements más costosas"""
+    cursor.execute(
+        """
+        SELECT query, calls, total_exec_time FROM pg_stat_statements
+        WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+          AND calls >= %s AND query ~* '^\\s*(/\\*.*?\\*/\\s*)?SELECT'
+        ORDER BY total_exec_time DESC
+        LIMIT %s
+        """,
+        [min_calls, limit],
+    )
+    for query, calls, total_time in cursor.fetchall():
+        for pattern in parse(query, tables).values():
+            _add(workloads, pattern, f'pg_stat_statements ({calls} llamadas)', total_time, calls)
+
+
+def queryset_workloads(cursor, registry, tables, workloads):
+    """
+    Agrega los querysets calientes con el costo de su plan; devuelve los
+    Seq Scan encontrados como ``(consulta, tabla, filtro, filas)``
+    """
+    scans = []
+    for name, func in registry.items():
+        queryset = func()
+        sql, params = queryset.query.get_compiler(using=cursor.db.alias).as_sql()
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        root = plan[0]['Plan']
+        for table, condition, rows in seq_scans(root, tables):
+            scans.append((name, table, condition, rows))
+        for pattern in parse(sql, tables).values():
+            _add(workloads, pattern, name, cost=root['Total Cost'])
+    return scans
+
+
+# --- Estado de la base ------------------------------------------------------
+
+def project_tables():
+    """db_table -> modelo de las apps del proyecto"""
+    return {
+        model._meta.db_table: model
+        for model in apps.get_models()
+        if model.__module__.startswith('apps.') and model._meta.managed and not model._meta.proxy
+    }
+
+
+def existing_indexes(cursor, tables):
+    """
+    Índices de ``tables``. En tablas particionadas ``pg_stat_user_indexes``
+    solo tiene las particiones: los usos y el tamaño se suman.
+    """
+    cursor.execute(
+        """
+        SELECT index_class.relname, table_class.relname, am.amname,
+               array(
+                   SELECT attribute.attname
+                   FROM unnest(pg_index.indkey::int2[]) WITH ORDINALITY AS key(attnum, position)
+                   JOIN pg_attribute attribute
+                     ON attribute.attrelid = pg_index.indrelid AND attribute.attnum = key.attnum
+                   ORDER BY key.position
+               ),
+               pg_index.indnkeyatts,
+               pg_index.indclass::oid[],
+               pg_get_expr(pg_index.indpred, pg_index.indrelid),
+               pg_index.indisunique,
+               EXISTS (SELECT 1 FROM pg_constraint WHERE conindid = pg_index.indexrelid),
+               pg_index.indexprs IS NOT NULL,
+               coalesce(stats.idx_scan, 0) + coalesce((
+                   SELECT sum(child.idx_scan) FROM pg_inherits
+                   JOIN pg_stat_user_indexes child ON child.indexrelid = pg_inherits.inhrelid
+                   WHERE pg_inherits.inhparent = pg_index.indexrelid
+               ), 0),
+               pg_relation_size(pg_index.indexrelid) + coalesce((
+                   SELECT sum(pg_relation_size(inhrelid)) FROM pg_inherits
+                   WHERE pg_inherits.inhparent = pg_index.indexrelid
+               ), 0)
+        FROM pg_index
+        JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid
+        JOIN pg_class table_class ON table_class.oid = pg_index.indrelid
+        JOIN pg_am am ON am.oid = index_class.relam
+        LEFT JOIN pg_stat_user_indexes stats ON stats.indexrelid = pg_index.indexrelid
+        WHERE table_class.relname = ANY(%s)
+        """,
+        [list(tables)],
+    )
+    indexes = []
+    for (name, table, method, columns, key_count, opclasses, predicate, unique,
+         constraint, expression, scans, size) in cursor.fetchall():
+        indexes.append(ExistingIndex(
+            name=name, table=table, method=method,
+            columns=tuple(columns[:key_count]), include=tuple(columns[key_count:]),
+            opclasses=tuple(opclasses[:key_count]), predicate=predicate or '',
+            unique=unique, constraint=constraint, expression=expression,
+            scans=int(scans), size=int(size),
+        ))
+    return indexes
+
+
+def table_statistics(cursor, tables):
+    """
+    (filas estimadas por tabla, {(tabla, columna): (n_distinct, correlación)});
+    las filas de una tabla particionada son la suma de sus particiones
+    """
+    cursor.execute(
+        """
+        SELECT parent.relname, sum(greatest(child.reltuples, 0))::bigint
+        FROM pg_class parent
+        LEFT JOIN pg_inherits ON pg_inherits.inhparent = parent.oid
+        JOIN pg_class child ON child.oid = coalesce(pg_inherits.inhrelid, parent.oid)
+        WHERE parent.relname = ANY(%s)
+        GROUP BY parent.relname
+        """,
+        [list(tables)],
+    )
+    rows = dict(cursor.fetchall())
+    cursor.execute(
+        """
+        SELECT tablename, attname, n_distinct, correlation FROM pg_stats
+        WHERE schemaname = current_schema() AND tablename = ANY(%s)
+        """,
+        [list(tables)],
+    )
+    columns = {}
+    for table, column, n_distinct, correlation in cursor.fetchall():
+        # n_distinct negativo es una fracción de las filas
+        if n_distinct is not None and n_distinct < 0:
+            n_distinct = -n_distinct * rows.get(table, 0)
+        previous = columns.get((table, column))
+        # Tabla particionada: pg_stats trae una fila por partición y otra heredada
+        if previous is None or (n_distinct or 0) > (previous[0] or 0):
+            columns[(table, column)] = (n_distinct, correlation)
+    return rows, columns
+
+
+# --- Propuestas -------------------------------------------------------------
+
+def _field_name(model, column):
+    for model_field in model._meta.concrete_fields:
+        if model_field.column == column:
+            return model_field.name
+    return None
+
+
+def _covered(columns, include, active_only, indexes, table):
+    """¿Algún índice B-tree existente ya sirve para este acceso?"""
+    for index in indexes:
+        if index.table != table or index.method != 'btree' or index.expression:
+            continue
+        if index.predicate and not (active_only and 'is_active' in index.predicate):
+            continue
+        if index.columns[:len(columns)] != tuple(columns):
+            continue
+        if set(include) <= set(index.columns) | set(index.include):
+            return True
+    return False
+
+
+def _index_name(model, columns, include, condition, kind):
+    signature = json.dumps([columns, include, condition, kind])
+    digest = hashlib.sha1(signature.encode()).hexdigest()[:7]
+    return f'{model._meta.app_label[:10]}_{model._meta.model_name[:6]}_{digest}_{kind}'
+
+
+def propose(workloads, tables, indexes, rows, column_stats, brin_min_rows):
+    proposals = []
+    seen = set()
+    for workload in sorted(workloads, key=lambda item: (-item.time_ms, -item.cost)):
+        pattern = workload.pattern
+        model = tables[pattern.table]
+        has_active = any(f.column == 'is_active' for f in model._meta.concrete_fields)
+        active_only = pattern.active_only and has_active
+
+        # Rango puro sobre una columna correlacionada de una tabla grande: BRIN
+        if pattern.range_column and not pattern.equality and not pattern.order:
+            _, correlation = column_stats.get((pattern.table, pattern.range_column), (None, None))
+            if (rows.get(pattern.table, 0) >= brin_min_rows and correlation is not None
+                    and abs(correlation) >= BRIN_MIN_CORRELATION):
+                columns = (pattern.range_column,)
+                if any(index.table == pattern.table and index.columns[:1] == columns
+                       for index in indexes) or (pattern.table, columns, 'brin') in seen:
+                    continue
+                seen.add((pattern.table, columns, 'brin'))
+                name = _field_name(model, pattern.range_column)
+                proposals.append(Proposal(
+                    model=model,
+                    index=BrinIndex(
+                        fields=[name], name=_index_name(model, columns, (), None, 'brin'),
+                        autosummarize=True,
+                    ),
+                    workload=workload,
+                    reason=f'rango sobre {name} (correlación física {correlation:.2f}, '
+                           f'{rows[pattern.table]} filas)',
+                ))
+                continue
+
+        # Igualdad primero (más selectiva antes), luego rango u orden
+        equality = sorted(
+            pattern.equality,
+            key=lambda column: -(column_stats.get((pattern.table, column), (0, None))[0] or 0),
+        )
+        columns = list(equality)
+        descending = set()
+        if pattern.range_column:
+            columns.append(pattern.range_column)
+        for column, desc in pattern.order:
+            if column not in columns:
+                columns.append(column)
+            if desc:
+                descending.add(column)
+        if not columns:
+            continue
+        include = []
+        if pattern.selected and len(pattern.selected - set(columns)) <= MAX_INCLUDE:
+            include = sorted(pattern.selected - set(columns) - {'is_active'})
+        if _covered(columns, include, active_only, indexes, pattern.table):
+            continue
+        signature = (pattern.table, tuple(columns), tuple(include), active_only)
+        if signature in seen:
+            continue
+        seen.add(signature)
+
+        # Dirección explícita solo si el orden mezcla ASC y DESC
+        mixed = len({desc for _, desc in pattern.order}) > 1
+        fields = [
+            ('-' if mixed and column in descending else '') + _field_name(model, column)
+            for column in columns
+        ]
+        condition = models.Q(is_active=True) if active_only else None
+        kind = 'pidx' if active_only else ('cidx' if include else 'idx')
+        proposals.append(Proposal(
+            model=model,
+            index=models.Index(
+                fields=fields,
+                include=[_field_name(model, column) for column in include] or None,
+                condition=condition,
+                name=_index_name(model, columns, include, 'is_active' if active_only else None, kind),
+            ),
+            workload=workload,
+            reason=_describe(model, pattern, include, active_only),
+        ))
+    return proposals
+
+
+def _describe(model, pattern, include, active_only):
+    parts = []
+    if pattern.equality:
+        parts.append('igualdad en ' + ', '.join(_field_name(model, c) for c in pattern.equality))
+    if pattern.range_column:
+        parts.append(f'rango en {_field_name(model, pattern.range_column)}')
+    if pattern.order:
+        parts.append('orden por ' + ', '.join(
+            ('-' if desc else '') + _field_name(model, column) for column, desc in pattern.order
+        ))
+    if active_only:
+        parts.append('solo activos (índice parcial)')
+    if include:
+        parts.append('cubre ' + ', '.join(_field_name(model, c) for c in include))
+    return '; '.join(parts)
+
+
+def unused_and_redundant(indexes):
+    """(sin uso, [(redundante, índice que lo contiene)]); ignora los de restricciones"""
+    candidates = [index for index in indexes if not index.unique and not index.constraint]
+    unused = [index for index in candidates if index.scans == 0]
+    redundant = []
+    for index in candidates:
+        if index.expression or index.predicate:
+            continue
+        for other in indexes:
+            if (other is not index and other.table == index.table and other.method == index.method
+                    and not other.predicate and not other.expression
+                    and len(other.columns) > len(index.columns)
+                    and other.columns[:len(index.columns)] == index.columns
+                    and other.opclasses[:len(index.opclasses)] == index.opclasses):
+                redundant.append((index, other))
+                break
+    return unused, redundant
+
+
+# --- Migración --------------------------------------------------------------
+
+def migration_writer(app_label, proposals, removals=()):
+    """
+    ``MigrationWriter`` con las propuestas de ``app_label`` como ``AddIndex``
+    y ``removals`` (nombres de ``Meta.indexes`` sin uso) como ``RemoveIndex``
+    """
+    leaves = MigrationLoader(None, ignore_no_migrations=True).graph.leaf_nodes(app_label)
+    number = max((int(name.split('_')[0]) for _, name in leaves), default=0) + 1
+    migration = migrations.Migration(f'{number:04d}_index_advisor', app_label)
+    migration.dependencies = leaves
+    migration.operations = [
+        migrations.AddIndex(model_name=proposal.model._meta.model_name, index=proposal.index)
+        for proposal in proposals
+    ] + [
+        migrations.RemoveIndex(model_name=model._meta.model_name, name=name)
+        for model, name in removals
+    ]
+    return MigrationWriter(migration)
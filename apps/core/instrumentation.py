@@ -0,0 +1,200 @@
+"""
+Instrumentación de rendimiento por request.
+
+Lleva la cuenta de consultas SQL, tiempo de base de datos, aciertos y fallos
+de caché y tiempo de renderizado de plantillas para el request en curso, y
+mantiene un agregado por vista dentro de cada proceso.
+"""
+
+import contextvars
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache.backends.base import BaseCache
+from django.utils.module_loading import import_string
+
+
+_current_stats = contextvars.ContextVar('acat_request_stats', default=None)
+
+_MISSING = object()
+
+
+@dataclass
+class RequestStats:
+    """
+    Métricas acumuladas durante un único request
+    """
+    started_at: float = field(default_factory=time.perf_counter)
+    request: object = field(default=None, repr=False)
+    view_name: str = ''
+    route: str = ''
+    user_role: str = ''
+    db_queries: int = 0
+    db_time: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    template_time: float = 0.0
+    total_time: float = 0.0
+
+    def elapsed(self):
+        return time.perf_counter() - self.started_at
+
+
+def current_stats():
+    """Métricas del request activo, o None fuera de un request instrumentado"""
+    return _current_stats.get()
+
+
+def _process_origin():
+    argv = sys.argv or ['']
+    if os.path.basename(argv[0]) == 'manage.py' and len(argv) > 1:
+        return f'command:{argv[1]}'
+    return f'process:{os.path.basename(argv[0]) or "python"}'
+
+
+PROCESS_ORIGIN = _process_origin()
+
+
+def current_origin():
+    """
+    Origen del trabajo en curso: la vista del request activo o, fuera de un
+    request, el comando de manage.py que corre en este proceso
+    """
+    stats = _current_stats.get()
+    if stats is not None:
+        return f'view:{stats.view_name or "unresolved"}'
+    return PROCESS_ORIGIN
+
+
+def start_request(request=None):
+    stats = RequestStats(request=request)
+    token = _current_stats.set(stats)
+    return stats, token
+
+
+def finish_request(token):
+    _current_stats.reset(token)
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    """
+    Wrapper para ``connection.execute_wrapper`` que mide cada consulta
+    """
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_queries += 1
+        stats.db_time += time.perf_counter() - start
+
+
+def record_cache_access(hit):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    if hit:
+        stats.cache_hits += 1
+    else:
+        stats.cache_misses += 1
+
+
+def _instrument_get(original):
+    def get(self, key, default=None, version=None, **kwargs):
+        value = original(self, key, _MISSING, version=version, **kwargs)
+        if value is _MISSING:
+            record_cache_access(False)
+            return default
+        record_cache_access(True)
+        return value
+    get._acat_instrumented = True
+    return get
+
+
+def _instrument_get_many(original):
+    def get_many(self, keys, version=None, **kwargs):
+        keys = list(keys)
+        found = original(self, keys, version=version, **kwargs)
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.cache_hits += len(found)
+            stats.cache_misses += len(keys) - len(found)
+        return found
+    get_many._acat_instrumented = True
+    return get_many
+
+
+_cache_lock = threading.Lock()
+
+
+def install_cache_instrumentation():
+    """
+    Envuelve ``get`` y ``get_many`` de los backends de caché configurados
+
+    Se hace a nivel de clase y una sola vez por proceso, de modo que funciona
+    igual con locmem en desarrollo y con Redis en producción.
+    """
+    with _cache_lock:
+        for alias, config in settings.CACHES.items():
+            backend_cls = import_string(config['BACKEND'])
+            if not getattr(backend_cls.get, '_acat_instrumented', False):
+                backend_cls.get = _instrument_get(backend_cls.get)
+            # BaseCache.get_many delega en get(); envolverlo contaría dos veces
+            if (backend_cls.get_many is not BaseCache.get_many
+                    and not getattr(backend_cls.get_many, '_acat_instrumented', False)):
+                backend_cls.get_many = _instrument_get_many(backend_cls.get_many)
+
+
+class ViewStatsRegistry:
+    """
+    Agregado por vista de los requests atendidos por este proceso
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, stats):
+        key = stats.view_name or 'unresolved'
+        with self._lock:
+            entry = self._views.setdefault(key, {
+                'requests': 0,
+                'total_time': 0.0,
+                'max_time': 0.0,
+                'db_queries': 0,
+                'db_time': 0.0,
+                'template_time': 0.0,
+                'cache_hits': 0,
+                'cache_misses': 0,
+            })
+            entry['requests'] += 1
+            entry['total_time'] += stats.total_time
+            entry['max_time'] = max(entry['max_time'], stats.total_time)
+            entry['db_queries'] += stats.db_queries
+            entry['db_time'] += stats.db_time
+            entry['template_time'] += stats.template_time
+            entry['cache_hits'] += stats.cache_hits
+            entry['cache_misses'] += stats.cache_misses
+
+    def snapshot(self, limit=None):
+        """Vistas ordenadas por tiempo total acumulado (las más costosas primero)"""
+        with self._lock:
+            rows = [dict(view=name, **entry) for name, entry in self._views.items()]
+        for row in rows:
+            row['avg_time'] = row['total_time'] / row['requests']
+            row['avg_db_queries'] = row['db_queries'] / row['requests']
+        rows.sort(key=lambda row: row['total_time'], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+view_stats = ViewStatsRegistry()
@@ -0,0 +1,303 @@
+"""
+Cola de trabajos en segundo plano sobre PostgreSQL.
+
+Las tareas se declaran en el módulo ``tasks.py`` de cada app::
+
+    @jobs.task(max_attempts=3)
+    def export_complaints(filters):
+        for done, row in enumerate(rows, 1):
+            ...
+            jobs.report_progress(done, total)
+
+y se encolan con ``export_complaints.delay(filters)``. El trabajo es una fila
+de ``core.Job`` creada en la misma transacción que el request: si el request
+hace rollback, el trabajo tampoco existe. El valor devuelto por la tarea se
+guarda en ``Job.result`` y debe poder serializarse a JSON; si no, el trabajo
+queda fallido sin reintentos.
+
+``manage.py run_workers`` levanta procesos con varios hilos; cada hilo toma
+el siguiente trabajo con ``SELECT ... FOR UPDATE SKIP LOCKED``, de modo que
+varios workers nunca toman el mismo. Un trabajo que falla se reintenta con
+espera exponencial hasta ``max_attempts``; uno cuyo worker dejó de dar
+señales por JOBS_STALE_SECONDS (proceso terminado a la fuerza) se reencola.
+
+Con ``JOBS_RUN_INLINE`` (desarrollo) los trabajos se ejecutan en el mismo
+proceso al confirmar la transacción, sin necesidad de workers.
+"""
+
+import functools
+import json
+import logging
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+logger = logging.getLogger('acat.jobs')
+
+# Cada cuánto los workers marcan sus trabajos en curso como vivos
+HEARTBEAT_SECONDS = 30
+
+_registry = {}
+_local = threading.local()
+# Trabajo en curso de cada hilo worker de este proceso (locked_by -> id)
+_running = {}
+
+
+class Task:
+    def __init__(self, func, name, queue, max_attempts, priority, on_failure):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.priority = priority
+        self.on_failure = on_failure
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def __repr__(self):
+        return f'<Task {self.name}>'
+
+    def delay(self, *args, **kwargs):
+        return self.enqueue(args=args, kwargs=kwargs)
+
+    def enqueue(self, args=(), kwargs=None, *, queue=None, priority=None, countdown=0, user=None):
+        """Crea el trabajo; los argumentos deben poder serializarse a JSON"""
+        from apps.core.models import Job
+
+        job = Job.objects.create(
+            task=self.name,
+            queue=queue or self.queue,
+            args=list(args),
+            kwargs=kwargs or {},
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=countdown),
+            created_by=user,
+        )
+        if settings.JOBS_RUN_INLINE:
+            transaction.on_commit(functools.partial(run_inline, job.pk))
+        return job
+
+
+def task(name=None, queue='default', max_attempts=3, priority=0, on_failure=None):
+    """
+    Registra la función como tarea. ``on_failure(*args, **kwargs)`` se llama
+    con los mismos argumentos cuando se agotan los intentos.
+    """
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__qualname__}'
+        if task_name in _registry and _registry[task_name].func is not func:
+            raise ValueError(f'Tarea duplicada: {task_name}')
+        _registry[task_name] = Task(func, task_name, queue, max_attempts, priority, on_failure)
+        return _registry[task_name]
+    return decorator
+
+
+def autodiscover():
+    autodiscover_modules('tasks')
+
+
+def get_task(name):
+    if name not in _registry:
+        autodiscover()
+    return _registry[name]
+
+
+def report_progress(current, total=None, message=''):
+    """
+    Avance del trabajo en curso (no hace nada fuera de un worker). Se guarda
+    a lo sumo una vez por segundo y cuenta como señal de vida. Dentro de un
+    ``transaction.atomic()`` de la tarea no es visible hasta el commit.
+    """
+    from apps.core.models import Job
+
+    state = getattr(_local, 'job', None)
+    if state is None:
+        return
+    now = time.monotonic()
+    finished = total is not None and current >= total
+    if now - state['reported_at'] < 1 and not finished:
+        return
+    state['reported_at'] = now
+    fields = {
+        'progress_current': current,
+        'progress_message': message[:200],
+        'heartbeat_at': timezone.now(),
+    }
+    if total is not None:
+        fields['progress_total'] = total
+    Job.objects.filter(pk=state['id']).update(**fields)
+
+
+def claim(worker_id, queues):
+    """Toma el siguiente trabajo listo de ``queues`` o devuelve None"""
+    from apps.core.models import Job
+
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status='queued', queue__in=queues, run_at__lte=timezone.now())
+            .order_by('-priority', 'run_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        now = timezone.now()
+        job.status = 'running'
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.heartbeat_at = now
+        job.started_at = job.started_at or now
+        job.save(update_fields=['status', 'attempts', 'locked_by', 'heartbeat_at', 'started_at'])
+    return job
+
+
+def execute(job):
+    """Ejecuta un trabajo ya tomado y registra el resultado o el error"""
+    from apps.core.models import Job
+
+    _local.job = {'id': job.pk, 'reported_at': 0.0}
+    started = time.monotonic()
+    try:
+        result = get_task(job.task)(*job.args, **job.kwargs)
+    except Exception:
+        logger.exception('El trabajo %s (%s) falló en el intento %s', job.pk, job.task, job.attempts)
+        _failed(job, traceback.format_exc())
+        return False
+    finally:
+        _local.job = None
+    try:
+        json.dumps(result, cls=DjangoJSONEncoder)
+    except (TypeError, ValueError) as error:
+        # La tarea ya terminó: reintentarla repetiría sus efectos
+        logger.error('El trabajo %s (%s) devolvió un resultado no serializable: %s', job.pk, job.task, error)
+        Job.objects.filter(pk=job.pk).update(
+            status='failed', finished_at=timezone.now(), locked_by='',
+            last_error=f'La tarea terminó pero su resultado no se puede guardar como JSON: {error}',
+        )
+        return False
+    Job.objects.filter(pk=job.pk).update(
+        status='succeeded', result=result, finished_at=timezone.now(), locked_by='', last_error='',
+    )
+    logger.info('Trabajo %s (%s) completado en %.1f s', job.pk, job.task, time.monotonic() - started)
+    return True
+
+
+def _failed(job, error):
+    from apps.core.models import Job
+
+    now = timezone.now()
+    if job.attempts < job.max_attempts:
+        delay = settings.JOBS_RETRY_DELAY_SECONDS * 2 ** (job.attempts - 1)
+        Job.objects.filter(pk=job.pk).update(
+            status='queued', run_at=now + timedelta(seconds=delay), locked_by='', last_error=error,
+        )
+        return
+    Job.objects.filter(pk=job.pk).update(
+        status='failed', finished_at=now, locked_by='', last_error=error,
+    )
+    _give_up(job)
+
+
+def _give_up(job):
+    task_obj = _registry.get(job.task)
+    if task_obj is None or task_obj.on_failure is None:
+        return
+    try:
+        task_obj.on_failure(*job.args, **job.kwargs)
+    except Exception:
+        logger.exception('Error en on_failure del trabajo %s (%s)', job.pk, job.task)
+
+
+def run_inline(job_id):
+    """Ejecuta el trabajo en este proceso (JOBS_RUN_INLINE)"""
+    from apps.core.models import Job
+
+    claimed = Job.objects.filter(pk=job_id, status='queued').update(
+        status='running', attempts=F('attempts') + 1, locked_by='inline',
+        heartbeat_at=timezone.now(), started_at=timezone.now(),
+    )
+    if claimed:
+        execute(Job.objects.get(pk=job_id))
+
+
+def work(worker_id, queues, stop):
+    """Ciclo de un hilo worker hasta que se active el evento ``stop``"""
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            try:
+                job = claim(worker_id, queues)
+            except Exception:
+                logger.exception('No se pudo consultar la cola')
+                stop.wait(settings.JOBS_POLL_SECONDS * 5)
+                continue
+            if job is None:
+                stop.wait(settings.JOBS_POLL_SECONDS)
+                continue
+            logger.info('Trabajo %s (%s), intento %s de %s', job.pk, job.task, job.attempts, job.max_attempts)
+            _running[worker_id] = job.pk
+            try:
+                execute(job)
+            except Exception:
+                # No se pudo registrar el resultado (p. ej. se perdió la
+                # conexión): sin señales de vida, requeue_stale lo recupera
+                logger.exception('No se pudo registrar el resultado del trabajo %s (%s)', job.pk, job.task)
+                connection.close()
+            finally:
+                _running.pop(worker_id, None)
+    finally:
+        connection.close()
+
+
+def heartbeat():
+    """Marca como vivos los trabajos que los hilos de este proceso ejecutan"""
+    from apps.core.models import Job
+
+    running = dict(_running)
+    if not running:
+        return
+    Job.objects.filter(
+        status='running', pk__in=running.values(), locked_by__in=running.keys()
+    ).update(heartbeat_at=timezone.now())
+
+
+def requeue_stale():
+    """Reencola (o da por fallidos) los trabajos de workers que ya no responden"""
+    from apps.core.models import Job
+
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status='running', heartbeat_at__lt=now - timedelta(seconds=settings.JOBS_STALE_SECONDS)
+    )
+    error = 'El worker dejó de responder durante la ejecución'
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+        status='queued', run_at=now, locked_by='', last_error=error,
+    )
+    exhausted = list(stale)
+    stale.filter(pk__in=[job.pk for job in exhausted]).update(
+        status='failed', finished_at=now, locked_by='', last_error=error,
+    )
+    for job in exhausted:
+        _give_up(job)
+    if requeued or exhausted:
+        logger.warning('%s trabajos reencolados y %s fallidos por falta de señal', requeued, len(exhausted))
+
+
+def purge():
+    """Elimina los trabajos completados más antiguos que JOBS_RETENTION_DAYS"""
+    from apps.core.models import Job
+
+    cutoff = timezone.now() - timedelta(days=settings.JOBS_RETENTION_DAYS)
+    deleted, _ = Job.objects.filter(status='succeeded', finished_at__lt=cutoff).delete()
+    return deleted
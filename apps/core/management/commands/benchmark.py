@@ -0,0 +1,310 @@
+import json
+import os
+import re
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.urls import reverse
+
+from apps.complaints.models import EnvironmentalComplaint
+
+BENCHMARK_USER = 'benchmark'
+# Bases que --sizes puede vaciar sin --yes-destroy-data
+DISPOSABLE_DATABASE_RE = re.compile(r'bench|test', re.IGNORECASE)
+
+
+def scenarios():
+    """(nombre, URL) de las vistas medidas; el detalle usa la denuncia más reciente"""
+    latest = EnvironmentalComplaint.objects.order_by('-pk').values_list('pk', flat=True).first()
+    urls = [
+        ('complaints:list', reverse('complaints:list')),
+        ('dashboard:home', reverse('dashboard:home')),
+        ('dashboard:stats', reverse('dashboard:stats')),
+        ('dashboard:map', reverse('dashboard:map')),
+        ('dashboard:map-data', reverse('dashboard:map-data')),
+        ('api:complaints-list', '/api/denuncias/'),
+        ('api:complaint-types', '/api/tipos-denuncia/'),
+    ]
+    if latest is not None:
+        urls += [
+            ('complaints:detail', reverse('complaints:detail', args=[latest])),
+            ('api:complaints-detail', f'/api/denuncias/{latest}/'),
+        ]
+    return urls
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))]
+
+
+def summarize(latencies_ms, elapsed):
+    return {
+        'requests': len(latencies_ms),
+        'p50_ms': round(percentile(latencies_ms, 50), 2),
+        'p95_ms': round(percentile(latencies_ms, 95), 2),
+        'p99_ms': round(percentile(latencies_ms, 99), 2),
+        'throughput_rps': round(len(latencies_ms) / elapsed, 1) if elapsed else None,
+    }
+
+
+def peak_rss_kb(pid):
+    """VmHWM de ``pid`` y de sus hijos directos (Linux)"""
+    pids = [pid]
+    children = Path(f'/proc/{pid}/task/{pid}/children')
+    if children.exists():
+        pids += [int(child) for child in children.read_text().split()]
+    peak = 0
+    for process in pids:
+        try:
+            for line in Path(f'/proc/{process}/status').read_text().splitlines():
+                if line.startswith('VmHWM:'):
+                    peak = max(peak, int(line.split()[1]))
+        except OSError:
+            continue
+    return peak or None
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide latencia (p50/p95/p99), rendimiento, consultas SQL y memoria de las '
+        'vistas principales y guarda los resultados en un historial JSON que '
+        'detecta regresiones'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            help='Tamaños a generar con generate_load_data antes de medir, p. ej. '
+                 '10000,100000,1000000. BORRA las denuncias existentes, por lo que '
+                 'solo se permite con DEBUG, en una base cuyo nombre contenga '
+                 '"bench" o "test", o con --yes-destroy-data. Sin esta opción se '
+                 'miden los datos actuales.',
+        )
+        parser.add_argument(
+            '--yes-destroy-data', action='store_true',
+            help='Confirma que --sizes puede vaciar las denuncias, transiciones y fotos de esta base',
+        )
+        parser.add_argument('--seed', type=int, default=1, help='Semilla de los datos generados')
+        parser.add_argument('--iterations', type=int, default=30, help='Requests por vista en proceso')
+        parser.add_argument('--warmup', type=int, default=3, help='Requests de calentamiento por vista')
+        parser.add_argument(
+            '--http', action='store_true',
+            help='Medir también contra un gunicorn local con requests concurrentes',
+        )
+        parser.add_argument('--concurrency', type=int, default=8, help='Clientes HTTP concurrentes')
+        parser.add_argument('--http-requests', type=int, default=200, help='Requests HTTP por vista')
+        parser.add_argument('--gunicorn-workers', type=int, default=3)
+        parser.add_argument(
+            '--history', default=str(settings.BASE_DIR / 'benchmarks' / 'history.json'),
+            help='Archivo JSON con el historial de resultados',
+        )
+        parser.add_argument(
+            '--max-regression', type=float, default=0.2,
+            help='Aumento relativo de p95 tolerado respecto a la corrida anterior (por defecto 0.2)',
+        )
+        parser.add_argument('--only', help='Medir solo las vistas cuyo nombre contenga este texto')
+
+    def handle(self, *args, **options):
+        if options['sizes']:
+            self.check_disposable_database(options['yes_destroy_data'])
+        setup_test_environment()
+        # Las vistas medidas solo piden un usuario autenticado
+        user, created = User.objects.get_or_create(username=BENCHMARK_USER)
+        if created:
+            user.set_unusable_password()
+            user.save(update_fields=['password'])
+        sizes = [int(size) for size in options['sizes'].split(',')] if options['sizes'] else [None]
+
+        runs = []
+        for size in sizes:
+            if size is not None:
+                self.stderr.write(f'Generando {size} denuncias...')
+                call_command(
+                    'generate_load_data', complaints=size, seed=options['seed'], truncate=True,
+                    stdout=self.stderr,
+                )
+            dataset = EnvironmentalComplaint.objects_all.count()
+            selected = [
+                (name, url) for name, url in scenarios()
+                if not options['only'] or options['only'] in name
+            ]
+            results = {name: self.measure_in_process(user, url, options) for name, url in selected}
+            if options['http']:
+                for name, metrics in self.measure_http(user, selected, options).items():
+                    results[name]['http'] = metrics
+            runs.append({'dataset': dataset, 'seed': options['seed'] if size else None, 'results': results})
+            self.report(dataset, results)
+
+        entry = {
+            'timestamp': datetime.now(dt_timezone.utc).isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'settings': os.environ.get('DJANGO_SETTINGS_MODULE'),
+            'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'runs': runs,
+        }
+        history_path = Path(options['history'])
+        history = json.loads(history_path.read_text()) if history_path.exists() else []
+        regressions = self.regressions(history, entry, options['max_regression'])
+        history.append(entry)
+        history_path.parent.mkdir(parents=True, exist_ok=True)
+        history_path.write_text(json.dumps(history, indent=2, ensure_ascii=False))
+        self.stdout.write(f'Resultados agregados a {history_path}')
+
+        if regressions:
+            for message in regressions:
+                self.stderr.write(self.style.ERROR(message))
+            raise CommandError(f'{len(regressions)} regresiones respecto a la corrida anterior')
+
+    def check_disposable_database(self, confirmed):
+        name = str(connection.settings_dict['NAME'])
+        if confirmed or settings.DEBUG or DISPOSABLE_DATABASE_RE.search(name):
+            return
+        raise CommandError(
+            f'--sizes vacía las denuncias, transiciones y fotos de la base "{name}". '
+            f'Use una base de benchmark o confirme con --yes-destroy-data.'
+        )
+
+    def measure_in_process(self, user, url, options):
+        client = Client(HTTP_ACCEPT='text/html,application/json')
+        client.force_login(user)
+        for _ in range(options['warmup']):
+            client.get(url)
+        latencies = []
+        queries = []
+        started = time.perf_counter()
+        for _ in range(options['iterations']):
+            # Todas las bases: las vistas @read_replica leen de las réplicas
+            with ExitStack() as stack:
+                captured = [
+                    stack.enter_context(CaptureQueriesContext(alias_connection))
+                    for alias_connection in connections.all()
+                ]
+                request_started = time.perf_counter()
+                response = client.get(url)
+                latencies.append((time.perf_counter() - request_started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{url} respondió {response.status_code}')
+            queries.append(sum(len(context) for context in captured))
+        metrics = summarize(latencies, time.perf_counter() - started)
+        metrics['queries'] = max(queries)
+        metrics['response_bytes'] = len(response.content)
+        return metrics
+
+    def measure_http(self, user, selected, options):
+        if shutil.which('gunicorn') is None:
+            raise CommandError('--http requiere gunicorn instalado (requirements/production.txt)')
+        client = Client()
+        client.force_login(user)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        server = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn', 'acat_system.wsgi:application',
+                '--bind', f'127.0.0.1:{port}', '--workers', str(options['gunicorn_workers']),
+                '--log-level', 'warning',
+            ],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, 'CHANGE_LISTENER_ENABLED': 'False'},
+        )
+        base_url = f'http://127.0.0.1:{port}'
+        try:
+            self.wait_for(base_url + '/health/')
+            results = {}
+            for name, url in selected:
+                results[name] = self.load(base_url + url, cookie, options)
+                results[name]['peak_rss_kb'] = peak_rss_kb(server.pid)
+            return results
+        finally:
+            server.terminate()
+            server.wait(30)
+
+    def wait_for(self, url, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                urlopen(url, timeout=2).read()
+                return
+            except (OSError, HTTPError):
+                time.sleep(0.2)
+        raise CommandError(f'gunicorn no respondió en {timeout} s')
+
+    def load(self, url, cookie, options):
+        def fetch(_):
+            request = Request(url, headers={'Cookie': cookie, 'Accept': 'text/html,application/json'})
+            started = time.perf_counter()
+            with urlopen(request, timeout=60) as response:
+                response.read()
+            return (time.perf_counter() - started) * 1000
+
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            list(executor.map(fetch, range(options['concurrency'])))  # calentamiento
+            started = time.perf_counter()
+            latencies = list(executor.map(fetch, range(options['http_requests'])))
+            elapsed = time.perf_counter() - started
+        metrics = summarize(latencies, elapsed)
+        metrics['concurrency'] = options['concurrency']
+        return metrics
+
+    def report(self, dataset, results):
+        self.stdout.write(f'\n{dataset} denuncias')
+        self.stdout.write(f'{"vista":<28}{"p50":>9}{"p95":>9}{"p99":>9}{"req/s":>9}{"SQL":>6}{"HTTP p95":>10}')
+        for name, metrics in results.items():
+            http = metrics.get('http', {})
+            self.stdout.write(
+                f'{name:<28}{metrics["p50_ms"]:>9.1f}{metrics["p95_ms"]:>9.1f}{metrics["p99_ms"]:>9.1f}'
+                f'{metrics["throughput_rps"]:>9.1f}{metrics["queries"]:>6}'
+                f'{http.get("p95_ms", float("nan")):>10.1f}'
+            )
+
+    def regressions(self, history, entry, max_regression):
+        """Compara con la última corrida que midió la misma vista con el mismo tamaño de datos"""
+        previous = {}
+        for past in history:
+            for run in past['runs']:
+                for name, metrics in run['results'].items():
+                    previous[(run['dataset'], name)] = metrics
+        messages = []
+        for run in entry['runs']:
+            for name, metrics in run['results'].items():
+                baseline = previous.get((run['dataset'], name))
+                if baseline is None:
+                    continue
+                if metrics['queries'] > baseline['queries']:
+                    messages.append(
+                        f'{name} ({run["dataset"]} filas): {baseline["queries"]} -> {metrics["queries"]} consultas'
+                    )
+                if metrics['p95_ms'] > baseline['p95_ms'] * (1 + max_regression):
+                    messages.append(
+                        f'{name} ({run["dataset"]} filas): p95 {baseline["p95_ms"]} -> {metrics["p95_ms"]} ms'
+                    )
+        return messages
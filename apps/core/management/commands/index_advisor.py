@@ -0,0 +1,154 @@
+import os
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.core import index_advisor
+
+
+def describe_index(index):
+    parts = [', '.join(index.fields)]
+    if getattr(index, 'include', None):
+        parts.append(f'INCLUDE ({", ".join(index.include)})')
+    if index.condition is not None:
+        parts.append(f'WHERE {index.condition}')
+    return f'{index.__class__.__name__}({" ".join(parts)})'
+
+
+def size_label(size):
+    for unit in ('B', 'kB', 'MB', 'GB'):
+        if size < 1024:
+            return f'{size:.0f} {unit}'
+        size /= 1024
+    return f'{size:.1f} TB'
+
+
+class Command(BaseCommand):
+    help = (
+        'Propone índices compuestos, parciales, con INCLUDE y BRIN a partir de '
+        'pg_stat_statements y de los querysets declarados en hot_queries.py, '
+        'señala los índices sin uso o redundantes y genera una migración para revisar'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--min-calls', type=int, default=10,
+            help='Ignorar formas de consulta con menos llamadas (por defecto 10)',
+        )
+        parser.add_argument(
+            '--limit', type=int, default=200,
+            help='Formas de consulta de pg_stat_statements a analizar, las más costosas primero',
+        )
+        parser.add_argument(
+            '--brin-min-rows', type=int, default=1_000_000,
+            help='Filas mínimas de la tabla para proponer BRIN (por defecto 1 000 000)',
+        )
+        parser.add_argument('--app', help='Limitar las propuestas a una app (app_label)')
+        parser.add_argument(
+            '--drop-unused', action='store_true',
+            help='Incluir en la migración RemoveIndex de los Meta.indexes sin uso',
+        )
+        parser.add_argument(
+            '--write', action='store_true',
+            help='Escribir la migración en la carpeta migrations de la app en lugar de mostrarla',
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'postgresql':
+            raise CommandError('index_advisor necesita PostgreSQL')
+        tables = index_advisor.project_tables()
+        if options['app']:
+            tables = {
+                table: model for table, model in tables.items()
+                if model._meta.app_label == options['app']
+            }
+            if not tables:
+                raise CommandError(f'La app {options["app"]} no tiene modelos')
+
+        workloads = {}
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+            if cursor.fetchone() is None:
+                self.stderr.write(self.style.WARNING(
+                    'pg_stat_statements no está instalada: solo se analizan los querysets de hot_queries.py'
+                ))
+            else:
+                index_advisor.statement_workloads(
+                    cursor, tables, workloads, options['min_calls'], options['limit']
+                )
+            scans = index_advisor.queryset_workloads(cursor, index_advisor.autodiscover(), tables, workloads)
+            indexes = index_advisor.existing_indexes(cursor, tables)
+            rows, column_stats = index_advisor.table_statistics(cursor, tables)
+            cursor.execute(
+                'SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()'
+            )
+            stats_reset = cursor.fetchone()[0]
+
+        proposals = index_advisor.propose(
+            workloads.values(), tables, indexes, rows, column_stats, options['brin_min_rows']
+        )
+        unused, redundant = index_advisor.unused_and_redundant(indexes)
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Índices propuestos'))
+        if not proposals:
+            self.stdout.write('  Ninguno: los índices existentes cubren las consultas analizadas')
+        for proposal in proposals:
+            workload = proposal.workload
+            weight = (
+                f'{workload.time_ms / 1000:.1f} s en {workload.calls} llamadas' if workload.calls
+                else f'costo estimado {workload.cost:.0f}'
+            )
+            self.stdout.write(f'  {proposal.model._meta.db_table}: {describe_index(proposal.index)}')
+            self.stdout.write(f'      {proposal.reason} ({weight})')
+            for source in sorted(set(workload.sources))[:3]:
+                self.stdout.write(f'      - {source}')
+
+        if scans:
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING('Seq Scan en querysets calientes'))
+            for name, table, condition, plan_rows in scans:
+                self.stdout.write(f'  {name}: {table} ({plan_rows} filas) {condition}')
+
+        since = f' desde {stats_reset:%Y-%m-%d %H:%M}' if stats_reset else ''
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Índices sin uso{since}'))
+        meta_names = {
+            index.name: model for model in tables.values() for index in model._meta.indexes
+        }
+        for index in sorted(unused, key=lambda item: -item.size):
+            origin = 'Meta.indexes' if index.name in meta_names else 'fuera de Meta.indexes'
+            self.stdout.write(f'  {index.name} ({index.table}, {size_label(index.size)}, {origin})')
+        for index, container in redundant:
+            self.stdout.write(
+                f'  {index.name} es prefijo de {container.name} ({size_label(index.size)}, redundante)'
+            )
+
+        by_app = defaultdict(list)
+        for proposal in proposals:
+            by_app[proposal.model._meta.app_label].append(proposal)
+        removals = defaultdict(list)
+        if options['drop_unused']:
+            for index in unused:
+                if index.name in meta_names:
+                    model = meta_names[index.name]
+                    removals[model._meta.app_label].append((model, index.name))
+
+        for app_label in sorted(set(by_app) | set(removals)):
+            writer = index_advisor.migration_writer(app_label, by_app[app_label], removals[app_label])
+            self.stdout.write('')
+            if options['write']:
+                with open(writer.path, 'w', encoding='utf-8') as handle:
+                    handle.write(writer.as_string())
+                self.stdout.write(self.style.SUCCESS(f'Migración escrita en {os.path.relpath(writer.path)}'))
+            else:
+                self.stdout.write(self.style.MIGRATE_HEADING(f'# {os.path.relpath(writer.path)}'))
+                self.stdout.write(writer.as_string())
+        if by_app or removals:
+            self.stdout.write(self.style.WARNING(
+                'Revise la migración y copie los índices a Meta.indexes de cada modelo; si no, '
+                'makemigrations propondrá eliminarlos. En tablas grandes que no estén '
+                'particionadas conviene AddIndexConcurrently (migración con atomic = False).'
+            ))
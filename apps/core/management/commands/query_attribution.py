@@ -0,0 +1,110 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.core.sql_comments import parse_comment
+
+
+# Prefijo de la vista (namespace de URL) o de la ruta -> módulo del reporte
+VIEW_BUCKETS = (
+    ('view', 'complaints:', 'complaints'),
+    ('view', 'dashboard:', 'dashboard'),
+    ('route', 'api/', 'api'),
+    ('view', 'admin:', 'admin'),
+)
+
+
+def bucket_for(tags):
+    if not tags:
+        return 'sin etiqueta'
+    if 'origin' in tags:
+        return tags['origin']
+    for key, prefix, bucket in VIEW_BUCKETS:
+        if tags.get(key, '').startswith(prefix):
+            return bucket
+    return 'otras vistas'
+
+
+class Command(BaseCommand):
+    help = (
+        'Atribuye el tiempo de pg_stat_statements a las vistas y comandos de '
+        'Django usando los comentarios sqlcommenter de cada consulta. '
+        'pg_stat_statements agrupa por estructura ignorando comentarios y '
+        'conserva el texto de la primera ejecución, por lo que una forma de '
+        'consulta compartida por varias vistas se atribuye a la primera que '
+        'la emitió desde el último reset.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--limit', type=int, default=10,
+            help='Vistas a detallar por módulo',
+        )
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Reiniciar pg_stat_statements después del reporte',
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'postgresql':
+            raise CommandError('pg_stat_statements solo existe en PostgreSQL')
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+            if cursor.fetchone() is None:
+                raise CommandError(
+                    'La extensión pg_stat_statements no está instalada. Agregue '
+                    'shared_preload_libraries=pg_stat_statements a PostgreSQL y ejecute '
+                    '"CREATE EXTENSION pg_stat_statements;" en la base de datos.'
+                )
+            cursor.execute(
+                """
+                SELECT query, calls, total_exec_time, rows
+                FROM pg_stat_statements
+                WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+                """
+            )
+            statements = cursor.fetchall()
+
+        buckets = defaultdict(lambda: {'calls': 0, 'time': 0.0, 'rows': 0})
+        views = defaultdict(lambda: defaultdict(lambda: {'calls': 0, 'time': 0.0, 'rows': 0}))
+        for query, calls, total_time, rows in statements:
+            tags = parse_comment(query)
+            bucket = bucket_for(tags)
+            label = tags.get('view') or tags.get('origin') or '-'
+            for entry in (buckets[bucket], views[bucket][label]):
+                entry['calls'] += calls
+                entry['time'] += total_time
+                entry['rows'] += rows
+
+        grand_total = sum(entry['time'] for entry in buckets.values()) or 1.0
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{"módulo":<30} {"tiempo (s)":>12} {"%":>6} {"llamadas":>12} {"filas":>12}'
+        ))
+        for bucket, entry in sorted(buckets.items(), key=lambda item: -item[1]['time']):
+            self.stdout.write(
+                f'{bucket:<30} {entry["time"] / 1000:>12.1f} '
+                f'{entry["time"] / grand_total * 100:>6.1f} '
+                f'{entry["calls"]:>12} {entry["rows"]:>12}'
+            )
+
+        for bucket in ('complaints', 'dashboard', 'api'):
+            if bucket not in views:
+                continue
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING(bucket))
+            ranked = sorted(views[bucket].items(), key=lambda item: -item[1]['time'])
+            for label, entry in ranked[:options['limit']]:
+                self.stdout.write(
+                    f'  {label:<40} {entry["time"] / 1000:>10.1f}s '
+                    f'{entry["calls"]:>10} llamadas  '
+                    f'{entry["time"] / max(entry["calls"], 1):>8.2f} ms/llamada'
+                )
+
+        if options['reset']:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_stat_statements_reset()')
+            self.stdout.write(self.style.SUCCESS('pg_stat_statements reiniciado'))
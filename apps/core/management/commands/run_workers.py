@@ -0,0 +1,117 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.core import change_listener, jobs
+
+# Purga de trabajos completados, una vez por hora
+PURGE_SECONDS = 3600
+
+
+def serve(threads, queues):
+    """
+    Un proceso worker: ``threads`` hilos tomando trabajos y el hilo principal
+    enviando señales de vida hasta recibir SIGTERM o SIGINT. Los trabajos en
+    curso terminan antes de salir.
+    """
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *args: stop.set())
+
+    # Los cachés en memoria (refdata) también se invalidan en los workers
+    change_listener.start()
+    prefix = f'{socket.gethostname()}:{os.getpid()}:'
+    workers = [
+        threading.Thread(
+            target=jobs.work, args=(f'{prefix}{number}', queues, stop),
+            name=f'acat-job-worker-{number}',
+        )
+        for number in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+
+    purged_at = 0.0
+    while not stop.wait(jobs.HEARTBEAT_SECONDS):
+        try:
+            jobs.heartbeat()
+            jobs.requeue_stale()
+            if time.monotonic() - purged_at > PURGE_SECONDS:
+                jobs.purge()
+                purged_at = time.monotonic()
+        except Exception:
+            jobs.logger.exception('Error en el mantenimiento de la cola')
+    for worker in workers:
+        worker.join()
+    change_listener.stop()
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta los trabajos en segundo plano encolados con apps.core.jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Procesos worker (por defecto 1, en este mismo proceso)',
+        )
+        parser.add_argument(
+            '--threads', type=int, default=2,
+            help='Hilos por proceso, cada uno ejecuta un trabajo a la vez (por defecto 2)',
+        )
+        parser.add_argument(
+            '--queues', default='default',
+            help='Colas a atender, separadas por comas (por defecto "default")',
+        )
+
+    def handle(self, *args, **options):
+        if settings.JOBS_RUN_INLINE:
+            raise CommandError('JOBS_RUN_INLINE está activo: los trabajos ya se ejecutan en el request')
+        if options['processes'] < 1 or options['threads'] < 1:
+            raise CommandError('--processes y --threads deben ser al menos 1')
+        queues = [queue.strip() for queue in options['queues'].split(',') if queue.strip()]
+        jobs.autodiscover()
+        self.stdout.write(
+            f"Workers: {options['processes']} procesos x {options['threads']} hilos, "
+            f"colas: {', '.join(queues)}"
+        )
+
+        if options['processes'] == 1:
+            serve(options['threads'], queues)
+            return
+        self.supervise(options['processes'], options['threads'], queues)
+
+    def supervise(self, processes, threads, queues):
+        """Mantiene ``processes`` procesos vivos y los detiene con SIGTERM"""
+        context = multiprocessing.get_context('fork')
+        stopping = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *args: stopping.set())
+
+        def spawn():
+            # Las conexiones no deben compartirse con los hijos
+            connections.close_all()
+            process = context.Process(target=serve, args=(threads, queues), name='acat-job-worker')
+            process.start()
+            return process
+
+        children = [spawn() for _ in range(processes)]
+        while not stopping.wait(1):
+            for index, child in enumerate(children):
+                if not child.is_alive():
+                    self.stderr.write(f'El worker {child.pid} terminó con código {child.exitcode}; reiniciando')
+                    children[index] = spawn()
+
+        for child in children:
+            child.terminate()
+        for child in children:
+            child.join(settings.JOBS_SHUTDOWN_SECONDS)
+            if child.is_alive():
+                self.stderr.write(f'El worker {child.pid} no terminó a tiempo; se detiene a la fuerza')
+                child.kill()
@@ -0,0 +1,107 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+
+from apps.core.models import SlowQuery
+
+
+class Command(BaseCommand):
+    help = 'Lista las consultas lentas registradas agrupadas por forma normalizada'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=7,
+            help='Ventana de tiempo a considerar (por defecto 7 días)',
+        )
+        parser.add_argument(
+            '--limit', type=int, default=20,
+            help='Cantidad de consultas a mostrar',
+        )
+        parser.add_argument(
+            '--origin',
+            help='Filtrar por origen, p. ej. "view:complaints:list" o "command:import_complaints"',
+        )
+        parser.add_argument(
+            '--plan', metavar='FINGERPRINT',
+            help='Mostrar el último plan EXPLAIN ANALYZE capturado para una huella',
+        )
+        parser.add_argument(
+            '--purge', type=int, metavar='DAYS',
+            help='Eliminar registros con más de DAYS días y terminar',
+        )
+
+    def handle(self, *args, **options):
+        if options['purge'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['purge'])
+            deleted, _ = SlowQuery.objects.filter(created_at__lt=cutoff).delete()
+            self.stdout.write(self.style.SUCCESS(f'{deleted} registros eliminados'))
+            return
+
+        if options['plan']:
+            self.show_plan(options['plan'])
+            return
+
+        since = timezone.now() - timedelta(days=options['days'])
+        queryset = SlowQuery.objects.filter(created_at__gte=since)
+        if options['origin']:
+            queryset = queryset.filter(origin=options['origin'])
+
+        offenders = (
+            queryset.order_by()
+            .values('fingerprint')
+            .annotate(
+                count=Count('id'),
+                total_ms=Sum('duration_ms'),
+                avg_ms=Avg('duration_ms'),
+                max_ms=Max('duration_ms'),
+                origins=Count('origin', distinct=True),
+                last_seen=Max('created_at'),
+            )
+            .order_by('-total_ms')[:options['limit']]
+        )
+        offenders = list(offenders)
+        if not offenders:
+            self.stdout.write('No hay consultas lentas registradas en el periodo.')
+            return
+
+        samples = {
+            row['fingerprint']: row
+            for row in queryset.filter(fingerprint__in=[o['fingerprint'] for o in offenders])
+            .order_by('fingerprint', '-duration_ms')
+            .distinct('fingerprint')
+            .values('fingerprint', 'normalized_sql', 'origin')
+        }
+        with_plan = set(
+            queryset.filter(plan__isnull=False).values_list('fingerprint', flat=True).distinct()
+        )
+
+        for row in offenders:
+            sample = samples.get(row['fingerprint'], {})
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{row['fingerprint']}  total={row['total_ms'] / 1000:.1f}s  "
+                f"n={row['count']}  avg={row['avg_ms']:.0f}ms  max={row['max_ms']:.0f}ms"
+                f"{'  [plan]' if row['fingerprint'] in with_plan else ''}"
+            ))
+            origin = sample.get('origin', '?')
+            if row['origins'] > 1:
+                origin += f" (+{row['origins'] - 1} más)"
+            self.stdout.write(f'  origen: {origin}')
+            self.stdout.write(f"  {sample.get('normalized_sql', '')[:400]}")
+            self.stdout.write('')
+
+    def show_plan(self, query_fingerprint):
+        sample = (
+            SlowQuery.objects.filter(fingerprint=query_fingerprint, plan__isnull=False)
+            .order_by('-created_at')
+            .first()
+        )
+        if sample is None:
+            raise CommandError(f'No hay planes capturados para {query_fingerprint}')
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{sample.origin} - {sample.duration_ms:.0f} ms - {sample.created_at:%Y-%m-%d %H:%M}'
+        ))
+        self.stdout.write(sample.sql)
+        self.stdout.write(json.dumps(sample.plan, indent=2))
@@ -0,0 +1,236 @@
+"""
+Registro de métricas Prometheus del proceso.
+
+Con gunicorn se usa el modo multiproceso de ``prometheus_client``: cada worker
+escribe sus valores en archivos mmap dentro de ``PROMETHEUS_MULTIPROC_DIR`` y
+el endpoint ``/metrics`` los agrega al momento de la consulta. Sin esa
+variable (runserver, tests) las métricas viven en un registro en memoria.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+# Id estable del worker de gunicorn (0..N-1), asignado en gunicorn.conf.py
+WORKER_ID = os.environ.get('ACAT_WORKER_ID', '0')
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+CONNECT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+DOMAIN_CACHE_KEY = 'metrics:complaints_by_status'
+DB_CONNECTIONS_CACHE_KEY = 'metrics:db_connections'
+
+registry = CollectorRegistry()
+
+REQUEST_LATENCY = Histogram(
+    'acat_http_request_duration_seconds',
+    'Latencia de los requests HTTP por vista',
+    ['view', 'method', 'status'],
+    buckets=LATENCY_BUCKETS,
+    registry=registry,
+)
+REQUEST_DB_QUERIES = Histogram(
+    'acat_http_request_db_queries',
+    'Consultas SQL ejecutadas por request',
+    ['view'],
+    buckets=QUERY_COUNT_BUCKETS,
+    registry=registry,
+)
+DB_QUERIES = Counter(
+    'acat_db_queries',
+    'Consultas SQL ejecutadas dentro de requests',
+    ['view'],
+    registry=registry,
+)
+DB_QUERY_SECONDS = Counter(
+    'acat_db_query_seconds',
+    'Tiempo de base de datos dentro de requests',
+    ['view'],
+    registry=registry,
+)
+CACHE_REQUESTS = Counter(
+    'acat_cache_requests',
+    'Lecturas de caché por resultado (hit/miss)',
+    ['result'],
+    registry=registry,
+)
+WORKER_REQUESTS = Counter(
+    'acat_worker_requests',
+    'Requests atendidos por cada worker de gunicorn',
+    ['worker'],
+    registry=registry,
+)
+WORKER_INFO = Gauge(
+    'acat_worker_info',
+    'Workers de gunicorn vivos (el pid se agrega como etiqueta)',
+    ['worker'],
+    multiprocess_mode='liveall',
+    registry=registry,
+)
+DB_ROUTED_READS = Counter(
+    'acat_db_routed_reads',
+    'Requests de solo lectura según la base que atendió sus lecturas (réplica o default)',
+    ['database'],
+    registry=registry,
+)
+DB_REPLICA_LAG = Gauge(
+    'acat_db_replica_lag_seconds',
+    'Último retraso medido de cada réplica (-1 si no responde)',
+    ['database'],
+    multiprocess_mode='max',
+    registry=registry,
+)
+DB_CONNECT_SECONDS = Histogram(
+    'acat_db_connect_seconds',
+    'Tiempo para abrir una conexión nueva (TCP, TLS y autenticación; con PgBouncer, '
+    'solo el login en el pooler: la espera por un servidor cae en la primera consulta)',
+    ['database'],
+    buckets=CONNECT_BUCKETS,
+    registry=registry,
+)
+DB_CONNECTIONS_OPENED = Counter(
+    'acat_db_connections_opened',
+    'Conexiones nuevas abiertas por los procesos de Django',
+    ['database'],
+    registry=registry,
+)
+DB_CONNECTIONS_OPEN = Gauge(
+    'acat_db_connections_open',
+    'Conexiones abiertas en este momento por los procesos de Django',
+    ['database'],
+    multiprocess_mode='livesum',
+    registry=registry,
+)
+
+
+def _status_class(status_code):
+    return f'{status_code // 100}xx' if status_code else 'unknown'
+
+
+def observe_request(request, response, stats):
+    """Registra las métricas de un request ya medido por PerformanceMiddleware"""
+    view = stats.view_name or 'unresolved'
+    REQUEST_LATENCY.labels(
+        view=view,
+        method=request.method,
+        status=_status_class(getattr(response, 'status_code', None)),
+    ).observe(stats.total_time)
+    REQUEST_DB_QUERIES.labels(view=view).observe(stats.db_queries)
+    if stats.db_queries:
+        DB_QUERIES.labels(view=view).inc(stats.db_queries)
+        DB_QUERY_SECONDS.labels(view=view).inc(stats.db_time)
+    if stats.cache_hits:
+        CACHE_REQUESTS.labels(result='hit').inc(stats.cache_hits)
+    if stats.cache_misses:
+        CACHE_REQUESTS.labels(result='miss').inc(stats.cache_misses)
+    WORKER_REQUESTS.labels(worker=WORKER_ID).inc()
+
+
+def mark_worker_alive():
+    """
+    Publica ``acat_worker_info`` del worker actual. Se llama desde el hook
+    ``post_fork`` de gunicorn y no al importar el módulo, para que los
+    procesos de ``manage.py`` no escriban muestras de un worker inexistente.
+    """
+    WORKER_INFO.labels(worker=WORKER_ID).set(1)
+
+
+def invalidate_domain_metrics():
+    cache.delete(DOMAIN_CACHE_KEY)
+
+
+class ComplaintStatusCollector:
+    """
+    Gauge de denuncias por estado, calculado al momento de la consulta
+
+    El resultado se cachea unos segundos para que varios scrapers (o varios
+    workers respondiendo /metrics) no repitan el GROUP BY sobre la tabla.
+    """
+
+    def collect(self):
+        from apps.complaints.models import EnvironmentalComplaint
+
+        counts = cache.get(DOMAIN_CACHE_KEY)
+        if counts is None:
+            counts = dict(
+                EnvironmentalComplaint.objects.order_by().values_list('status')
+                .annotate(count=Count('id'))
+            )
+            cache.set(DOMAIN_CACHE_KEY, counts, settings.METRICS_DOMAIN_CACHE_SECONDS)
+
+        family = GaugeMetricFamily(
+            'acat_complaints', 'Denuncias ambientales por estado', labels=['status']
+        )
+        for status, _label in EnvironmentalComplaint._meta.get_field('status').choices:
+            family.add_metric([status], counts.get(status, 0))
+        yield family
+
+
+class DatabaseConnectionsCollector:
+    """
+    Uso de conexiones visto desde PostgreSQL: conexiones de clientes a la base
+    por estado (active, idle, idle in transaction...) y max_connections. Con
+    PgBouncer son las conexiones del pooler al servidor. Cacheado como
+    ``ComplaintStatusCollector``.
+    """
+
+    def collect(self):
+        from django.db import DatabaseError, connection
+
+        if connection.vendor != 'postgresql':
+            return
+        stats = cache.get(DB_CONNECTIONS_CACHE_KEY)
+        if stats is None:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT coalesce(state, 'unknown'), count(*) FROM pg_stat_activity "
+                        "WHERE datname = current_database() AND backend_type = 'client backend' "
+                        "GROUP BY 1"
+                    )
+                    by_state = dict(cursor.fetchall())
+                    cursor.execute("SELECT current_setting('max_connections')::int")
+                    stats = {'by_state': by_state, 'max': cursor.fetchone()[0]}
+            except DatabaseError:
+                return
+            cache.set(DB_CONNECTIONS_CACHE_KEY, stats, settings.METRICS_DOMAIN_CACHE_SECONDS)
+
+        family = GaugeMetricFamily(
+            'acat_db_server_connections',
+            'Conexiones de clientes a la base según pg_stat_activity, por estado',
+            labels=['state'],
+        )
+        for state, count in sorted(stats['by_state'].items()):
+            family.add_metric([state], count)
+        yield family
+        yield GaugeMetricFamily(
+            'acat_db_server_max_connections', 'max_connections de PostgreSQL', value=stats['max']
+        )
+
+
+if not MULTIPROCESS:
+    registry.register(ComplaintStatusCollector())
+    registry.register(DatabaseConnectionsCollector())
+
+
+def render_latest():
+    """Exposición en formato texto de Prometheus"""
+    if MULTIPROCESS:
+        scrape_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(scrape_registry)
+        scrape_registry.register(ComplaintStatusCollector())
+        scrape_registry.register(DatabaseConnectionsCollector())
+        return generate_latest(scrape_registry)
+    return generate_latest(registry)
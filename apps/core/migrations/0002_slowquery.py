@@ -0,0 +1,57 @@
+# Generated by Django 5.0 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "fingerprint",
+                    models.CharField(db_index=True, max_length=32, verbose_name="Huella"),
+                ),
+                ("normalized_sql", models.TextField(verbose_name="SQL normalizado")),
+                ("sql", models.TextField(verbose_name="SQL")),
+                ("duration_ms", models.FloatField(verbose_name="Duración (ms)")),
+                ("origin", models.CharField(max_length=200, verbose_name="Origen")),
+                (
+                    "database",
+                    models.CharField(
+                        default="default", max_length=50, verbose_name="Base de datos"
+                    ),
+                ),
+                (
+                    "plan",
+                    models.JSONField(
+                        blank=True, null=True, verbose_name="Plan EXPLAIN ANALYZE"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="Fecha de registro"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Consulta lenta",
+                "verbose_name_plural": "Consultas lentas",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
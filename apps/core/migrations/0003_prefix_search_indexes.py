@@ -0,0 +1,45 @@
+# Generated by Django 5.0 on 2026-10-18 10:05
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0002_slowquery"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="protectedarea",
+            index=models.Index(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"),
+                    name="text_pattern_ops",
+                ),
+                name="core_area_name_prefix_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="protectedarea",
+            index=models.Index(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("code"),
+                    name="text_pattern_ops",
+                ),
+                name="core_area_code_prefix_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sector",
+            index=models.Index(
+                models.F("protected_area"),
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"),
+                    name="text_pattern_ops",
+                ),
+                name="core_sector_area_name_idx",
+            ),
+        ),
+    ]
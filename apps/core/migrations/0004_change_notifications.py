@@ -0,0 +1,39 @@
+# Triggers de LISTEN/NOTIFY para invalidar cachés en los procesos
+# (ver apps.core.change_listener)
+
+from django.db import migrations
+
+NOTIFY_FUNCTION = """
+CREATE OR REPLACE FUNCTION acat_notify_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('acat_changes', TG_TABLE_NAME || ':' || TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+TABLES = ["core_protectedarea", "core_sector"]
+
+
+def create_trigger(table):
+    # Un aviso por sentencia (no por fila): un UPDATE masivo notifica una vez
+    return (
+        f"CREATE TRIGGER {table}_notify_change "
+        f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+        f"FOR EACH STATEMENT EXECUTE FUNCTION acat_notify_change();"
+    )
+
+
+def drop_trigger(table):
+    return f"DROP TRIGGER IF EXISTS {table}_notify_change ON {table};"
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0003_prefix_search_indexes"),
+    ]
+
+    operations = [
+        migrations.RunSQL(NOTIFY_FUNCTION, "DROP FUNCTION IF EXISTS acat_notify_change();"),
+        *[migrations.RunSQL(create_trigger(table), drop_trigger(table)) for table in TABLES],
+    ]
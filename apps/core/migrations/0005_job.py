@@ -0,0 +1,138 @@
+# Generated by Django 5.0 on 2026-10-18 16:10
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0004_change_notifications"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Job",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task", models.CharField(max_length=200, verbose_name="Tarea")),
+                (
+                    "queue",
+                    models.CharField(default="default", max_length=50, verbose_name="Cola"),
+                ),
+                (
+                    "args",
+                    models.JSONField(
+                        default=list,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        verbose_name="Argumentos",
+                    ),
+                ),
+                (
+                    "kwargs",
+                    models.JSONField(
+                        default=dict,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        verbose_name="Argumentos con nombre",
+                    ),
+                ),
+                ("priority", models.SmallIntegerField(default=0, verbose_name="Prioridad")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "En cola"),
+                            ("running", "En ejecución"),
+                            ("succeeded", "Completado"),
+                            ("failed", "Fallido"),
+                        ],
+                        default="queued",
+                        max_length=20,
+                        verbose_name="Estado",
+                    ),
+                ),
+                (
+                    "run_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Ejecutar desde"
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")),
+                (
+                    "max_attempts",
+                    models.PositiveSmallIntegerField(default=3, verbose_name="Intentos máximos"),
+                ),
+                ("progress_current", models.PositiveIntegerField(default=0, verbose_name="Avance")),
+                (
+                    "progress_total",
+                    models.PositiveIntegerField(blank=True, null=True, verbose_name="Total"),
+                ),
+                (
+                    "progress_message",
+                    models.CharField(blank=True, max_length=200, verbose_name="Mensaje de avance"),
+                ),
+                (
+                    "result",
+                    models.JSONField(
+                        blank=True,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        null=True,
+                        verbose_name="Resultado",
+                    ),
+                ),
+                ("last_error", models.TextField(blank=True, verbose_name="Último error")),
+                ("locked_by", models.CharField(blank=True, max_length=100, verbose_name="Worker")),
+                (
+                    "heartbeat_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Última señal del worker"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Fecha de creación"),
+                ),
+                ("started_at", models.DateTimeField(blank=True, null=True, verbose_name="Inicio")),
+                ("finished_at", models.DateTimeField(blank=True, null=True, verbose_name="Fin")),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Creado por",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Trabajo en segundo plano",
+                "verbose_name_plural": "Trabajos en segundo plano",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status", "queued")),
+                        fields=["queue", "-priority", "run_at"],
+                        name="core_job_queued_idx",
+                    ),
+                    models.Index(
+                        condition=models.Q(("status", "running")),
+                        fields=["heartbeat_at"],
+                        name="core_job_running_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
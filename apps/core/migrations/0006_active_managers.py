@@ -0,0 +1,91 @@
+# Generated by Django 5.0 on 2026-10-19 09:20
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+import django.db.models.manager
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0005_job"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="protectedarea",
+            options={
+                "default_manager_name": "objects_all",
+                "ordering": ["name"],
+                "verbose_name": "Área Silvestre Protegida",
+                "verbose_name_plural": "Áreas Silvestres Protegidas",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="sector",
+            options={
+                "default_manager_name": "objects_all",
+                "ordering": ["protected_area__name", "name"],
+                "verbose_name": "Sector",
+                "verbose_name_plural": "Sectores",
+            },
+        ),
+        migrations.AlterModelManagers(
+            name="protectedarea",
+            managers=[
+                ("objects_all", django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name="sector",
+            managers=[
+                ("objects_all", django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name="protectedarea",
+            name="core_area_name_prefix_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="protectedarea",
+            name="core_area_code_prefix_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="sector",
+            name="core_sector_area_name_idx",
+        ),
+        migrations.AddIndex(
+            model_name="protectedarea",
+            index=models.Index(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"),
+                    name="text_pattern_ops",
+                ),
+                condition=models.Q(("is_active", True)),
+                name="core_area_name_prefix_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="protectedarea",
+            index=models.Index(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("code"),
+                    name="text_pattern_ops",
+                ),
+                condition=models.Q(("is_active", True)),
+                name="core_area_code_prefix_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sector",
+            index=models.Index(
+                models.F("protected_area"),
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"),
+                    name="text_pattern_ops",
+                ),
+                condition=models.Q(("is_active", True)),
+                name="core_sector_area_name_idx",
+            ),
+        ),
+    ]
@@ -1,17 +1,42 @@
+from django.conf import settings
+from django.contrib.postgres.indexes import OpClass
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
+class ActiveManager(models.Manager):
+    """
+    Solo las filas con ``is_active``: es el manager ``objects`` de los
+    modelos con BaseModel, y sus consultas usan los índices parciales
+    ``WHERE is_active``
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_active=True)
+
+
 class BaseModel(models.Model):
     """
     Abstract base model with common fields for all models
+
+    ``objects`` devuelve solo los registros activos; ``objects_all``, que es
+    el manager por defecto (admin, relaciones, vistas genéricas con
+    ``model``), incluye los desactivados. Las subclases heredan
+    ``BaseModel.Meta`` para conservar ``default_manager_name``.
     """
     created_at = models.DateTimeField(_('Fecha de creación'), auto_now_add=True)
     updated_at = models.DateTimeField(_('Fecha de actualización'), auto_now=True)
     is_active = models.BooleanField(_('Activo'), default=True)
+
+    objects = ActiveManager()
+    objects_all = models.Manager()
     
     class Meta:
         abstract = True
+        default_manager_name = 'objects_all'
 
 
 class ProtectedArea(BaseModel):
@@ -22,15 +47,43 @@ class ProtectedArea(BaseModel):
     code = models.CharField(_('Código'), max_length=50, unique=True)
     description = models.TextField(_('Descripción'), blank=True)
     
-    class Meta:
+    class Meta(BaseModel.Meta):
         verbose_name = _('Área Silvestre Protegida')
         verbose_name_plural = _('Áreas Silvestres Protegidas')
         ordering = ['name']
+        indexes = [
+            # Búsqueda por prefijo (istartswith) del autocompletado, que
+            # solo ofrece áreas activas
+            models.Index(
+                OpClass(Upper('name'), name='text_pattern_ops'),
+                name='core_area_name_prefix_idx',
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                OpClass(Upper('code'), name='text_pattern_ops'),
+                name='core_area_code_prefix_idx',
+                condition=models.Q(is_active=True),
+            ),
+        ]
     
     def __str__(self):
         return f"{self.code} - {self.name}"
 
 
+class SectorManager(models.Manager):
+    """
+    Manager por defecto de Sector: ``__str__`` usa ``protected_area``, así
+    que siempre se trae en el mismo JOIN (admin, formularios, serializers)
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('protected_area')
+
+
+class ActiveSectorManager(ActiveManager, SectorManager):
+    """Sectores activos, con su área en el mismo JOIN"""
+
+
 class Sector(BaseModel):
     """
     Sector dentro de un Área Silvestre Protegida
@@ -43,12 +96,121 @@ class Sector(BaseModel):
         verbose_name=_('Área Silvestre Protegida')
     )
     description = models.TextField(_('Descripción'), blank=True)
+
+    objects = ActiveSectorManager()
+    objects_all = SectorManager()
     
-    class Meta:
+    class Meta(BaseModel.Meta):
         verbose_name = _('Sector')
         verbose_name_plural = _('Sectores')
         ordering = ['protected_area__name', 'name']
         unique_together = ['name', 'protected_area']
+        indexes = [
+            # Búsqueda encadenada: sectores activos de un área por prefijo del nombre
+            models.Index(
+                'protected_area', OpClass(Upper('name'), name='text_pattern_ops'),
+                name='core_sector_area_name_idx',
+                condition=models.Q(is_active=True),
+            ),
+        ]
     
     def __str__(self):
         return f"{self.protected_area.code} - {self.name}"
+
+
+class SlowQuery(models.Model):
+    """
+    Consulta SQL que superó SLOW_QUERY_THRESHOLD_MS, con su plan de
+    ejecución cuando fue muestreada
+    """
+    fingerprint = models.CharField(_('Huella'), max_length=32, db_index=True)
+    normalized_sql = models.TextField(_('SQL normalizado'))
+    sql = models.TextField(_('SQL'))
+    duration_ms = models.FloatField(_('Duración (ms)'))
+    origin = models.CharField(_('Origen'), max_length=200)
+    database = models.CharField(_('Base de datos'), max_length=50, default='default')
+    plan = models.JSONField(_('Plan EXPLAIN ANALYZE'), null=True, blank=True)
+    created_at = models.DateTimeField(_('Fecha de registro'), auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = _('Consulta lenta')
+        verbose_name_plural = _('Consultas lentas')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.origin} - {self.duration_ms:.0f} ms"
+
+
+JOB_STATUS_CHOICES = [
+    ('queued', _('En cola')),
+    ('running', _('En ejecución')),
+    ('succeeded', _('Completado')),
+    ('failed', _('Fallido')),
+]
+
+
+class Job(models.Model):
+    """
+    Trabajo en segundo plano (ver apps.core.jobs). Los workers de
+    ``manage.py run_workers`` toman los trabajos con
+    ``SELECT ... FOR UPDATE SKIP LOCKED``.
+    """
+    task = models.CharField(_('Tarea'), max_length=200)
+    queue = models.CharField(_('Cola'), max_length=50, default='default')
+    args = models.JSONField(_('Argumentos'), default=list, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(_('Argumentos con nombre'), default=dict, encoder=DjangoJSONEncoder)
+    priority = models.SmallIntegerField(_('Prioridad'), default=0)
+    status = models.CharField(
+        _('Estado'),
+        max_length=20,
+        choices=JOB_STATUS_CHOICES,
+        default='queued'
+    )
+    run_at = models.DateTimeField(_('Ejecutar desde'), default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(_('Intentos'), default=0)
+    max_attempts = models.PositiveSmallIntegerField(_('Intentos máximos'), default=3)
+    progress_current = models.PositiveIntegerField(_('Avance'), default=0)
+    progress_total = models.PositiveIntegerField(_('Total'), null=True, blank=True)
+    progress_message = models.CharField(_('Mensaje de avance'), max_length=200, blank=True)
+    result = models.JSONField(_('Resultado'), null=True, blank=True, encoder=DjangoJSONEncoder)
+    last_error = models.TextField(_('Último error'), blank=True)
+    locked_by = models.CharField(_('Worker'), max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(_('Última señal del worker'), null=True, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_('Creado por'),
+        related_name='+'
+    )
+    created_at = models.DateTimeField(_('Fecha de creación'), auto_now_add=True)
+    started_at = models.DateTimeField(_('Inicio'), null=True, blank=True)
+    finished_at = models.DateTimeField(_('Fin'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('Trabajo en segundo plano')
+        verbose_name_plural = _('Trabajos en segundo plano')
+        ordering = ['-created_at']
+        indexes = [
+            # Solo los pendientes: el índice no crece con el historial
+            models.Index(
+                fields=['queue', '-priority', 'run_at'],
+                name='core_job_queued_idx',
+                condition=models.Q(status='queued'),
+            ),
+            models.Index(
+                fields=['heartbeat_at'],
+                name='core_job_running_idx',
+                condition=models.Q(status='running'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+    @property
+    def progress_percent(self):
+        if not self.progress_total:
+            return None
+        return min(100, round(100 * self.progress_current / self.progress_total))
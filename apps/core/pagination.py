@@ -0,0 +1,145 @@
+"""
+Paginación con conteos estimados.
+
+En tablas grandes un ``COUNT(*)`` exacto recorre todo el índice o la tabla en
+cada carga de página. Por encima de ESTIMATED_COUNT_THRESHOLD filas se usa la
+estimación del planificador de PostgreSQL (``pg_class.reltuples`` sin
+filtros, o las filas estimadas por ``EXPLAIN`` con filtros); por debajo, el
+conteo exacto es barato y se mantiene.
+
+Como la estimación puede quedar por debajo del total real, el paginador no
+corta en ``num_pages``: desde la última página estimada pide una fila de más
+para saber si hay otra, y el conteo se corrige con lo que la consulta
+devuelve.
+"""
+
+import json
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+
+def _table_estimate(model, using):
+    with connections[using].cursor() as cursor:
+        # Una tabla particionada no tiene filas propias: se suman sus particiones
+        cursor.execute(
+            """
+            SELECT sum(greatest(reltuples, 0))::bigint FROM pg_class
+            WHERE oid = %s::regclass
+               OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)
+            """,
+            [model._meta.db_table, model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # reltuples es -1 (o 0) mientras la tabla no se haya analizado
+    return row[0] if row and row[0] else None
+
+
+def _plan_estimate(queryset):
+    query = queryset.order_by().values('pk').query
+    try:
+        sql, params = query.sql_with_params()
+    except EmptyResultSet:
+        # p. ej. pk__in=[] o .none(): no hay nada que contar
+        return 0
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _is_unfiltered(queryset):
+    query = queryset.query
+    return (
+        not query.where
+        and not query.distinct
+        and query.low_mark == 0
+        and query.high_mark is None
+        and query.group_by is None
+    )
+
+
+def estimated_count(queryset, threshold=None):
+    """
+    Conteo de ``queryset``: estimado si supera ``threshold``, exacto si no
+    """
+    if threshold is None:
+        threshold = settings.ESTIMATED_COUNT_THRESHOLD
+    if not isinstance(queryset, QuerySet) or connections[queryset.db].vendor != 'postgresql':
+        return queryset.count() if isinstance(queryset, QuerySet) else len(queryset)
+
+    if _is_unfiltered(queryset):
+        estimate = _table_estimate(queryset.model, queryset.db)
+    else:
+        estimate = _plan_estimate(queryset)
+
+    if estimate is None or estimate < threshold:
+        return queryset.count()
+    return estimate
+
+
+def estimated_model_count(model, threshold=None):
+    return estimated_count(model._default_manager.all(), threshold)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator de Django cuyo ``count`` usa ``estimated_count``
+
+    El número de páginas es aproximado en tablas grandes. Las páginas
+    anteriores a la última se cortan como siempre (y se evalúan solo al
+    usarse); desde la última página estimada en adelante la estimación no
+    limita el corte: se piden ``per_page + 1`` filas y el conteo se corrige
+    con lo que devuelve la consulta. Si la estimación se queda corta, las
+    páginas siguientes siguen disponibles mientras tengan filas; si se pasa,
+    las páginas más allá del final real quedan vacías.
+    """
+
+    @cached_property
+    def count(self):
+        return estimated_count(self.object_list)
+
+    @property
+    def count_is_estimated(self):
+        # Por debajo del umbral estimated_count devuelve el conteo exacto
+        return (
+            isinstance(self.object_list, QuerySet)
+            and self.count >= settings.ESTIMATED_COUNT_THRESHOLD
+        )
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # Con un conteo subestimado hay filas más allá de num_pages:
+            # page() lo decide según lo que devuelva la consulta
+            if not self.count_is_estimated or int(number) < 1:
+                raise
+            return int(number)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if number < self.num_pages or not self.count_is_estimated:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows:
+            if number > self.num_pages:
+                raise EmptyPage(self.error_messages['no_results'])
+            return self._get_page(rows, number, self)
+        # Con la fila de más, num_pages pasa a incluir la página siguiente
+        self.__dict__['count'] = bottom + len(rows)
+        self.__dict__.pop('num_pages', None)
+        return self._get_page(rows[:self.per_page], number, self)
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """Paginación de DRF con el mismo conteo estimado"""
+    django_paginator_class = EstimatedCountPaginator
@@ -0,0 +1,153 @@
+"""
+Presupuestos de consultas SQL.
+
+``query_budget(n)`` limita la cantidad de consultas que puede ejecutar una
+vista, función o serializer, para detectar regresiones N+1 antes de llegar a
+producción::
+
+    @query_budget(6)
+    class ComplaintListView(ListView): ...
+
+    @query_budget(0)
+    class SectorSerializer(serializers.ModelSerializer): ...
+
+    with query_budget(3):
+        list(Sector.objects.all())
+
+Con QUERY_BUDGET_MODE = 'raise' (desarrollo y pruebas) exceder el
+presupuesto lanza ``QueryBudgetExceeded``; con 'log' solo se registra una
+advertencia y con 'off' no se cuenta nada.
+"""
+
+import functools
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.views import View
+
+logger = logging.getLogger('acat.query_budget')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Se ejecutaron más consultas de las permitidas"""
+
+
+def _mode():
+    return getattr(settings, 'QUERY_BUDGET_MODE', 'log')
+
+
+def _counted_render(response, budget):
+    # Vuelve al render de la clase (y la respuesta sigue siendo serializable)
+    del response.render
+    budget._start()
+    try:
+        rendered = response.render()
+    finally:
+        budget._stop()
+    budget._check()
+    return rendered
+
+
+class query_budget:
+    """
+    Context manager y decorador. Aplicado a una clase:
+
+    - vistas basadas en clases: cubre ``dispatch`` incluyendo el render de
+      la ``TemplateResponse``;
+    - serializers: cubre ``to_representation`` de cada objeto, así que el
+      presupuesto es por fila (con ``many=True`` cada elemento se mide
+      por separado, que es justo donde aparece un N+1).
+    """
+
+    def __init__(self, limit, name=None):
+        self.limit = limit
+        self.name = name
+        self.queries = []
+        self._stack = None
+
+    def _counter(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def _start(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self._counter))
+
+    def _stop(self):
+        self._stack.close()
+        self._stack = None
+
+    def _check(self):
+        if len(self.queries) > self.limit:
+            self._exceeded()
+
+    def __enter__(self):
+        self.queries = []
+        if _mode() == 'off':
+            return self
+        self._start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._stack is None:
+            return False
+        self._stop()
+        if exc_type is None:
+            self._check()
+        return False
+
+    def _exceeded(self):
+        name = self.name or 'bloque'
+        message = (
+            f'{name} ejecutó {len(self.queries)} consultas '
+            f'(presupuesto: {self.limit})'
+        )
+        if _mode() == 'raise':
+            detail = '\n'.join(
+                f'{number}. {sql}' for number, sql in enumerate(self.queries, start=1)
+            )
+            raise QueryBudgetExceeded(f'{message}:\n{detail}')
+        logger.warning(message)
+
+    def __call__(self, target):
+        if isinstance(target, type):
+            return self._decorate_class(target)
+        return self._decorate_function(target, target.__qualname__)
+
+    def _decorate_function(self, func, name):
+        limit = self.limit
+        name = self.name or name
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _mode() == 'off':
+                return func(*args, **kwargs)
+            budget = query_budget(limit, name)
+            budget._start()
+            try:
+                response = func(*args, **kwargs)
+            finally:
+                budget._stop()
+            if callable(getattr(response, 'render', None)) and not getattr(response, 'is_rendered', True):
+                # La TemplateResponse se sigue renderizando donde la renderiza
+                # Django (los middlewares miden ese tiempo); solo se cuentan
+                # también las consultas del template
+                response.render = functools.partial(_counted_render, response, budget)
+            else:
+                budget._check()
+            return response
+        return wrapper
+
+    def _decorate_class(self, cls):
+        if issubclass(cls, View):
+            method = 'dispatch'
+        elif hasattr(cls, 'to_representation'):
+            method = 'to_representation'
+        else:
+            raise TypeError(f'query_budget no sabe decorar la clase {cls.__name__}')
+        original = getattr(cls, method)
+        setattr(cls, method, self._decorate_function(original, f'{cls.__qualname__}.{method}'))
+        return cls
@@ -0,0 +1,184 @@
+"""
+Caché en el proceso de los datos de referencia.
+
+Tipos de denuncia, tipos de infracción, áreas protegidas y sectores son
+tablas pequeñas que casi no cambian. Cada proceso las carga completas en
+memoria y las reutiliza en formularios, vistas y serializers. Un contador de
+versión compartido en el caché de Django (Redis en producción) se consulta a
+lo sumo una vez por REFDATA_CHECK_SECONDS: cuando un cambio desde el admin lo
+incrementa, todos los workers de gunicorn recargan en menos de ese intervalo.
+
+Si el proceso tiene activo el listener de ``apps.core.change_listener``, la
+versión en Redis no se consulta: la copia local se descarta cuando llega la
+notificación de PostgreSQL de alguna de las tablas.
+
+Solo ``save()`` y ``delete()`` emiten las señales que incrementan la
+versión; después de un ``QuerySet.update()`` sobre estas tablas hay que
+llamar a ``bump()``.
+
+La carga siempre lee de ``default``: la versión o la notificación llegan al
+confirmarse el cambio en el primario, y una réplica atrasada dejaría los
+datos viejos guardados bajo la versión nueva hasta el próximo cambio.
+"""
+
+import threading
+import time
+
+from django import forms
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from apps.core import change_listener
+
+VERSION_KEY = 'refdata:version'
+
+REFERENCE_MODELS = (
+    'complaints.ComplaintType',
+    'complaints.InfractionType',
+    'core.ProtectedArea',
+    'core.Sector',
+)
+
+_lock = threading.Lock()
+_state = {'tables': None, 'version': None, 'checked_at': 0.0, 'stale': False}
+
+
+def version():
+    current = cache.get(VERSION_KEY)
+    if current is None:
+        # Un valor basado en el reloj no repite una versión anterior si la
+        # clave fue desalojada del caché
+        cache.add(VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        current = cache.get(VERSION_KEY)
+    return current
+
+
+def bump():
+    """Invalida los datos de referencia en todos los procesos"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns() // 1000, timeout=None)
+    # Este proceso recarga de inmediato, sin esperar el intervalo
+    _state['checked_at'] = 0.0
+    _state['stale'] = True
+
+
+def clear():
+    """Descarta la copia local (p. ej. entre pruebas)"""
+    with _lock:
+        _state.update(tables=None, version=None, checked_at=0.0, stale=False)
+
+
+def _invalidate(tables):
+    _state['stale'] = True
+
+
+def _load():
+    tables = {}
+    for label in REFERENCE_MODELS:
+        model = apps.get_model(label)
+        rows = list(model._default_manager.using('default'))
+        tables[model] = {'rows': rows, 'by_pk': {row.pk: row for row in rows}}
+    return tables
+
+
+def _tables_from_notifications():
+    tables = _state['tables']
+    if tables is not None and not _state['stale']:
+        return tables
+    with _lock:
+        if _state['tables'] is None or _state['stale']:
+            # Se baja antes de cargar: una notificación que llegue durante la
+            # carga la vuelve a marcar
+            _state['stale'] = False
+            _state['tables'] = _load()
+            _state['version'] = None
+        return _state['tables']
+
+
+def _tables():
+    if change_listener.is_healthy():
+        return _tables_from_notifications()
+    now = time.monotonic()
+    if _state['tables'] is not None and now - _state['checked_at'] < settings.REFDATA_CHECK_SECONDS:
+        return _state['tables']
+    with _lock:
+        if _state['tables'] is not None and now - _state['checked_at'] < settings.REFDATA_CHECK_SECONDS:
+            return _state['tables']
+        current = version()
+        if _state['tables'] is None or current != _state['version']:
+            _state['tables'] = _load()
+            _state['version'] = current
+        _state['checked_at'] = now
+        return _state['tables']
+
+
+def preload():
+    """
+    Carga (o revalida) la copia local ahora, p. ej. antes de un bloque con
+    ``query_budget`` que de otro modo pagaría la carga en su primera fila
+    """
+    _tables()
+
+
+def all_objects(model, active_only=False):
+    """
+    Filas de ``model`` en el orden de su Meta.ordering. Las instancias son
+    compartidas entre requests: no deben modificarse.
+    """
+    rows = _tables()[model]['rows']
+    if active_only:
+        return [row for row in rows if row.is_active]
+    return rows
+
+
+def lookup(model, pk):
+    """Instancia de ``model`` con ``pk`` o None, sin consultar la base de datos"""
+    try:
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    return _tables()[model]['by_pk'].get(pk)
+
+
+class CachedModelChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField para datos de referencia: valida el valor enviado contra
+    la caché en lugar de hacer un ``queryset.get()`` por campo. Los filtros
+    del queryset del campo no se aplican a la validación.
+    """
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        obj = lookup(self.queryset.model, value)
+        if obj is None:
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+        return obj
+
+    def instances_for(self, pks):
+        """Usado por AutocompleteSelect para la opción seleccionada"""
+        model = self.queryset.model
+        return [obj for obj in (lookup(model, pk) for pk in pks) if obj is not None]
+
+
+def _changed(sender, **kwargs):
+    # Después del commit: otro worker podría recargar antes y quedarse con
+    # los datos viejos bajo la versión nueva
+    transaction.on_commit(bump, using=kwargs.get('using'))
+
+
+def connect_signals():
+    models = [apps.get_model(label) for label in REFERENCE_MODELS]
+    change_listener.subscribe([model._meta.db_table for model in models], _invalidate)
+    for label, model in zip(REFERENCE_MODELS, models):
+        post_save.connect(_changed, sender=model, dispatch_uid=f'refdata_saved_{label}')
+        post_delete.connect(_changed, sender=model, dispatch_uid=f'refdata_deleted_{label}')
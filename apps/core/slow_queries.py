@@ -0,0 +1,162 @@
+"""
+Captura de consultas lentas.
+
+Un execute wrapper permanente (instalado al crear cada conexión) mide todas
+las consultas del ORM, tanto en vistas como en comandos de manage.py. Las que
+superan SLOW_QUERY_THRESHOLD_MS se registran en el log con su origen y en la
+tabla SlowQuery; una fracción muestreada se vuelve a ejecutar con
+``EXPLAIN (ANALYZE, BUFFERS)`` para guardar el plan real.
+"""
+
+import contextvars
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from apps.core.instrumentation import current_origin
+
+logger = logging.getLogger('acat.slow_queries')
+
+# Evita que el EXPLAIN o el INSERT del registro se midan a sí mismos
+_capturing = contextvars.ContextVar('acat_slow_query_capturing', default=False)
+
+_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+_IN_LIST_RE = re.compile(r'\bIN\s*\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)', re.IGNORECASE)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_WHITESPACE_RE = re.compile(r'\s+')
+_IDENTIFIER_RE = re.compile(r'"(?:[^"]|"")*"')
+# EXPLAIN ANALYZE ejecuta la consulta: nada que escriba o tome bloqueos
+_UNSAFE_RE = re.compile(
+    r'\b(?:INSERT|UPDATE|DELETE|MERGE)\b|\bFOR\s+(?:NO\s+KEY\s+UPDATE|KEY\s+SHARE|SHARE)\b'
+)
+
+
+def normalize_sql(sql):
+    """
+    Forma canónica de la consulta: sin comentarios, literales ni listas IN
+    de largo variable, para agrupar consultas con la misma estructura
+    """
+    sql = _COMMENT_RE.sub('', sql)
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.md5(normalized_sql.encode('utf-8')).hexdigest()
+
+
+def _should_explain(sql, many, duration_ms, connection):
+    if many or connection.vendor != 'postgresql':
+        return False
+    if duration_ms > settings.SLOW_QUERY_EXPLAIN_MAX_MS:
+        # Re-ejecutar una consulta muy larga duplicaría su costo
+        return False
+    statement = _IDENTIFIER_RE.sub('""', _STRING_RE.sub("''", _COMMENT_RE.sub('', sql)))
+    statement = statement.lstrip().upper()
+    if not statement.startswith(('SELECT', 'WITH')) or _UNSAFE_RE.search(statement):
+        # Incluye los WITH con DELETE ... RETURNING y los SELECT ... FOR UPDATE
+        return False
+    return random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+
+
+def explain_analyze(connection, sql, params):
+    """
+    Plan real de la consulta, usando el cursor de psycopg2 directamente para
+    no pasar de nuevo por los execute wrappers de Django. La consulta se
+    ejecuta de verdad, así que siempre se revierte: con un savepoint dentro
+    de una transacción, o en una transacción propia en modo autocommit.
+    """
+    in_transaction = not connection.get_autocommit()
+    if in_transaction:
+        begin, rollback = 'SAVEPOINT acat_explain', 'ROLLBACK TO SAVEPOINT acat_explain'
+    else:
+        begin, rollback = 'BEGIN', 'ROLLBACK'
+    with connection.connection.cursor() as cursor:
+        cursor.execute(begin)
+        try:
+            cursor.execute('EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        finally:
+            cursor.execute(rollback)
+            if in_transaction:
+                cursor.execute('RELEASE SAVEPOINT acat_explain')
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+def record_slow_query(sql, params, many, duration, connection):
+    from apps.core.models import SlowQuery
+
+    duration_ms = duration * 1000
+    normalized = normalize_sql(sql)
+    query_fingerprint = fingerprint(normalized)
+    origin = current_origin()
+    logger.warning(
+        'slow_query duration_ms=%.1f origin=%s fingerprint=%s sql=%s',
+        duration_ms, origin, query_fingerprint, sql[:2000],
+    )
+
+    if SlowQuery._meta.db_table in sql:
+        return
+
+    token = _capturing.set(True)
+    try:
+        plan = None
+        if _should_explain(sql, many, duration_ms, connection):
+            try:
+                plan = explain_analyze(connection, sql, params)
+            except Exception:
+                logger.exception('No se pudo obtener el plan de la consulta %s', query_fingerprint)
+
+        if settings.SLOW_QUERY_PERSIST:
+            try:
+                with transaction.atomic(using=connection.alias):
+                    SlowQuery.objects.using(connection.alias).create(
+                        fingerprint=query_fingerprint,
+                        normalized_sql=normalized,
+                        sql=sql,
+                        duration_ms=duration_ms,
+                        origin=origin[:200],
+                        database=connection.alias,
+                        plan=plan,
+                    )
+            except DatabaseError:
+                # Por ejemplo, antes de aplicar la migración de SlowQuery
+                logger.debug('No se pudo registrar la consulta lenta', exc_info=True)
+    finally:
+        _capturing.reset(token)
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    if _capturing.get():
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = time.perf_counter() - started
+    if duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        try:
+            record_slow_query(sql, params, many, duration, context['connection'])
+        except Exception:
+            logger.exception('Error registrando consulta lenta')
+    return result
+
+
+def install(sender, connection, **kwargs):
+    """
+    Receptor de ``connection_created``: instala el wrapper una sola vez por
+    conexión. Va al inicio de la lista para no interferir con los wrappers
+    temporales que se agregan y quitan con ``connection.execute_wrapper()``.
+    """
+    if not settings.SLOW_QUERY_CAPTURE:
+        return
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, slow_query_wrapper)
@@ -0,0 +1,98 @@
+"""
+Etiquetado de consultas SQL al estilo sqlcommenter.
+
+Agrega al final de cada consulta del ORM un comentario como
+``/*route='denuncias/',user_role='staff',view='complaints:list'*/`` para que
+``pg_stat_statements``, ``pg_stat_activity`` y el log de PostgreSQL permitan
+saber qué vista o comando la emitió.
+"""
+
+import re
+from urllib.parse import quote, unquote
+
+from django.conf import settings
+from django.utils.functional import empty
+
+from apps.core.instrumentation import PROCESS_ORIGIN, current_stats
+
+
+_COMMENT_RE = re.compile(r"/\*((?:\w+='[^']*',?)+)\*/\s*;?\s*$")
+_PAIR_RE = re.compile(r"(\w+)='([^']*)'")
+
+
+def user_role(user):
+    if user is None or not user.is_authenticated:
+        return 'anonymous'
+    if user.is_superuser:
+        return 'superuser'
+    if user.is_staff:
+        return 'staff'
+    return 'authenticated'
+
+
+def _request_user_role(stats):
+    if stats.user_role:
+        return stats.user_role
+    user = getattr(stats.request, 'user', None)
+    # No forzar la carga del usuario: eso dispararía consultas anidadas
+    if user is None or getattr(user, '_wrapped', None) is empty:
+        return ''
+    stats.user_role = user_role(user)
+    return stats.user_role
+
+
+def current_tags():
+    stats = current_stats()
+    if stats is None:
+        return {'origin': PROCESS_ORIGIN}
+    tags = {'view': stats.view_name or 'unresolved'}
+    if stats.route:
+        tags['route'] = stats.route
+    role = _request_user_role(stats)
+    if role:
+        tags['user_role'] = role
+    return tags
+
+
+def format_comment(tags):
+    pairs = ','.join(
+        "{}='{}'".format(key, quote(str(value), safe=''))
+        for key, value in sorted(tags.items())
+    )
+    return f'/*{pairs}*/'
+
+
+def parse_comment(sql):
+    """Etiquetas del comentario sqlcommenter al final de ``sql`` (o {})"""
+    match = _COMMENT_RE.search(sql)
+    if not match:
+        return {}
+    return {
+        key: unquote(value.replace('%%', '%'))
+        for key, value in _PAIR_RE.findall(match.group(1))
+    }
+
+
+def add_comment(sql, params, tags):
+    comment = format_comment(tags)
+    if params is not None:
+        # psycopg2 interpreta "%" cuando hay parámetros; quote() genera "%XX"
+        comment = comment.replace('%', '%%')
+    stripped = sql.rstrip()
+    if stripped.endswith(';'):
+        return f'{stripped[:-1]} {comment};'
+    return f'{stripped} {comment}'
+
+
+def sqlcommenter_wrapper(execute, sql, params, many, context):
+    if sql.rstrip().endswith('*/'):
+        return execute(sql, params, many, context)
+    return execute(add_comment(sql, params, current_tags()), params, many, context)
+
+
+def install(sender, connection, **kwargs):
+    """Receptor de ``connection_created``; ver ``slow_queries.install``"""
+    if not settings.SQL_COMMENTER_ENABLED:
+        return
+    if sqlcommenter_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, sqlcommenter_wrapper)
@@ -1,3 +1,665 @@
-from django.test import TestCase
+import os
+import signal
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django import forms
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.paginator import EmptyPage
+from django.db import connection, transaction
+from django.template import engines
+from django.template.response import TemplateResponse
+from django.db.models import Q
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import path
+from django.utils import timezone
+
+from apps.complaints.models import ComplaintRecord, ComplaintType, EnvironmentalComplaint
+from apps.complaints.serializers import SectorSerializer
+from . import db_routing, index_advisor, instrumentation, jobs, refdata, slow_queries
+from .autocomplete import AutocompleteSelect
+from .management.commands import run_workers
+from .models import Job, ProtectedArea, Sector
+from .pagination import EstimatedCountPaginator, estimated_count
+from .query_budget import QueryBudgetExceeded, query_budget
+
+
+@query_budget(1)
+def slow_template_view(request):
+    # El template tarda al menos 20 ms en renderizarse
+    template = engines['django'].from_string('{{ wait }}{% for area in areas %}{{ area.code }}{% endfor %}')
+    return TemplateResponse(request, template, {
+        'wait': lambda: time.sleep(0.02), 'areas': ProtectedArea.objects.all(),
+    })
+
+
+urlpatterns = [path('slow-template/', slow_template_view, name='slow_template')]
+
+
+class SectorManagerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(3):
+            area = ProtectedArea.objects.create(name=f'Área {number}', code=f'A{number}')
+            Sector.objects.create(name=f'Sector {number}', protected_area=area)
+
+    def test_str_does_not_query_per_sector(self):
+        with self.assertNumQueries(1):
+            labels = [str(sector) for sector in Sector.objects.all()]
+        self.assertEqual(len(labels), 3)
+
+    def test_serializer_stays_within_budget(self):
+        with self.assertNumQueries(1):
+            data = SectorSerializer(Sector.objects.all(), many=True).data
+        self.assertEqual(data[0]['protected_area_name'], 'Área 0')
+
+
+class ActiveManagerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        area = ProtectedArea.objects.create(name='Tortuguero', code='TO')
+        Sector.objects.create(name='Cerro', protected_area=area)
+        Sector.objects.create(name='Jalova', protected_area=area, is_active=False)
+        ProtectedArea.objects.create(name='Caño Negro', code='CN', is_active=False)
+
+    def test_objects_returns_active_only(self):
+        self.assertEqual([area.code for area in ProtectedArea.objects.all()], ['TO'])
+        self.assertEqual([sector.name for sector in Sector.objects.all()], ['Cerro'])
+
+    def test_default_manager_includes_inactive(self):
+        self.assertEqual(ProtectedArea._default_manager.count(), 2)
+        self.assertEqual(Sector.objects_all.count(), 2)
+        self.assertEqual(Sector._default_manager.name, 'objects_all')
+
+    def test_active_sectors_keep_area_join(self):
+        with self.assertNumQueries(1):
+            labels = [str(sector) for sector in Sector.objects.all()]
+        self.assertEqual(labels, ['TO - Cerro'])
+
+
+@override_settings(QUERY_BUDGET_MODE='raise')
+class RefdataReplicaTests(TestCase):
+    def setUp(self):
+        refdata.clear()
+        self.addCleanup(refdata.clear)
+
+    @override_settings(REPLICA_DATABASES=['replica'])
+    def test_reload_reads_from_primary_inside_replica_block(self):
+        ProtectedArea.objects.create(name='Tenorio', code='TN')
+
+        # El alias 'replica' no existe: cualquier lectura enrutada fallaría
+        with mock.patch.object(db_routing, '_choose', return_value='replica'), db_routing.use_replica():
+            rows = refdata.all_objects(ProtectedArea)
+
+        self.assertEqual([area.code for area in rows], ['TN'])
+
+
+class AutocompleteSelectTests(TestCase):
+    class AreaForm(forms.Form):
+        area = forms.ModelChoiceField(ProtectedArea.objects.all(), widget=AutocompleteSelect(url='/areas/'))
+        code = forms.ModelChoiceField(
+            ProtectedArea.objects.all(), to_field_name='code', widget=AutocompleteSelect(url='/areas/'),
+        )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.area = ProtectedArea.objects.create(name='Cahuita', code='CA')
+
+    def test_renders_only_selected_option(self):
+        ProtectedArea.objects.create(name='Manzanillo', code='MZ')
+        form = self.AreaForm({'area': str(self.area.pk), 'code': 'CA'})
+
+        with self.assertNumQueries(2):
+            html = str(form['area']) + str(form['code'])
+
+        self.assertEqual(html.count('selected'), 2)
+        self.assertNotIn('Manzanillo', html)
+
+    def test_tampered_values_are_dropped(self):
+        for data in ({'area': 'abc'}, {'area': '1 OR 1=1'}, {'area': str(self.area.pk + 100)}):
+            with self.subTest(data=data):
+                form = self.AreaForm(data)
+                self.assertFalse(form.is_valid())
+                html = str(form['area'])
+                self.assertNotIn('Cahuita', html)
+
+
+class QueryBudgetTests(TestCase):
+    def setUp(self):
+        self.area = ProtectedArea.objects.create(name='Palo Verde', code='PV')
+        Sector.objects.create(name='Catalina', protected_area=self.area)
+
+    def test_within_budget(self):
+        with query_budget(1) as budget:
+            list(Sector.objects.all())
+        self.assertEqual(len(budget.queries), 1)
+
+    def test_exceeding_budget_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(1):
+                list(Sector.objects.all())
+                list(ProtectedArea.objects.all())
+
+    def test_decorated_function(self):
+        @query_budget(0)
+        def lookup():
+            return ProtectedArea.objects.get(code='PV')
+
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'lookup ejecutó 1 consultas'):
+            lookup()
+
+    def test_template_response_stays_lazy_and_counts_render(self):
+        template = engines['django'].from_string('{% for area in areas %}{{ area.code }}{% endfor %}')
+
+        @query_budget(0)
+        def view(request):
+            return TemplateResponse(request, template, {'areas': ProtectedArea.objects.all()})
+
+        response = view(RequestFactory().get('/'))
+
+        self.assertFalse(response.is_rendered)
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'view ejecutó 1 consultas'):
+            response.render()
+
+    def test_serializer_budget_detects_n_plus_one(self):
+        # Sin el JOIN del manager, cada fila consulta su área
+        sectors = Sector.objects.select_related(None)
+        with self.assertRaises(QueryBudgetExceeded):
+            SectorSerializer(sectors, many=True).data
+
+    @override_settings(QUERY_BUDGET_MODE='log')
+    def test_log_mode_only_warns(self):
+        with self.assertLogs('acat.query_budget', level='WARNING'):
+            with query_budget(0):
+                list(Sector.objects.all())
+
+    @override_settings(QUERY_BUDGET_MODE='off')
+    def test_off_mode_does_not_count(self):
+        with query_budget(0) as budget:
+            list(Sector.objects.all())
+        self.assertEqual(budget.queries, [])
+
+
+@override_settings(ROOT_URLCONF='apps.core.tests', PERFORMANCE_INSTRUMENTATION=True)
+class TemplateTimingTests(TestCase):
+    def setUp(self):
+        instrumentation.view_stats.reset()
+        self.addCleanup(instrumentation.view_stats.reset)
+
+    def test_render_time_recorded_for_budgeted_view(self):
+        ProtectedArea.objects.create(name='Barra Honda', code='BH')
+
+        response = self.client.get('/slow-template/')
+
+        self.assertContains(response, 'BH')
+        stats, = instrumentation.view_stats.snapshot()
+        self.assertEqual(stats['view'], 'slow_template')
+        self.assertGreaterEqual(stats['template_time'], 0.02)
+
+
+@override_settings(ESTIMATED_COUNT_THRESHOLD=1)
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(5):
+            ProtectedArea.objects.create(name=f'Área {number}', code=f'E{number}')
+
+    def paginator(self):
+        return EstimatedCountPaginator(ProtectedArea.objects.order_by('code'), 2)
+
+    def test_underestimate_keeps_later_pages_reachable(self):
+        with mock.patch('apps.core.pagination.estimated_count', return_value=2):
+            paginator = self.paginator()
+            self.assertEqual(paginator.num_pages, 1)
+            first = paginator.page(1)
+            self.assertTrue(first.has_next())
+            self.assertEqual(paginator.num_pages, 2)
+
+            last = paginator.page(3)
+            self.assertEqual([area.code for area in last], ['E4'])
+            self.assertFalse(last.has_next())
+            self.assertEqual((paginator.count, last.end_index()), (5, 5))
+            with self.assertRaises(EmptyPage):
+                paginator.page(4)
+
+    def test_last_estimated_page_is_not_cut_at_the_estimate(self):
+        with mock.patch('apps.core.pagination.estimated_count', return_value=3):
+            page = self.paginator().page(2)
+            self.assertEqual([area.code for area in page], ['E2', 'E3'])
+            self.assertTrue(page.has_next())
+
+    def test_overestimate_leaves_pages_past_the_end_empty(self):
+        with mock.patch('apps.core.pagination.estimated_count', return_value=9):
+            paginator = self.paginator()
+            self.assertEqual(list(paginator.page(4)), [])
+            self.assertEqual(list(paginator.page(5)), [])
+            with self.assertRaises(EmptyPage):
+                paginator.page(6)
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=1000)
+    def test_exact_count_keeps_django_behaviour(self):
+        paginator = self.paginator()
+        self.assertEqual(paginator.num_pages, 3)
+        with self.assertRaises(EmptyPage):
+            paginator.page(4)
+
+    def test_empty_result_set(self):
+        self.assertEqual(estimated_count(ProtectedArea.objects.filter(pk__in=[]), threshold=0), 0)
+        self.assertEqual(estimated_count(ProtectedArea.objects.none(), threshold=0), 0)
+
+
+@override_settings(SLOW_QUERY_EXPLAIN_SAMPLE_RATE=1.0, SLOW_QUERY_EXPLAIN_MAX_MS=10000)
+class SlowQueryExplainTests(TestCase):
+    def should_explain(self, sql):
+        return slow_queries._should_explain(sql, False, 600, connection)
+
+    def test_explains_reads_only(self):
+        self.assertTrue(self.should_explain('SELECT "name" FROM "core_sector" WHERE "name" = \'delete\''))
+        self.assertTrue(self.should_explain('WITH recent AS (SELECT 1) SELECT * FROM recent'))
+        for sql in (
+            'WITH moved AS (DELETE FROM t RETURNING *) INSERT INTO p SELECT * FROM moved',
+            'WITH changed AS (UPDATE t SET a = 1 RETURNING *) SELECT * FROM changed',
+            'SELECT * FROM t FOR UPDATE SKIP LOCKED',
+            'SELECT * FROM t FOR NO KEY UPDATE',
+            'SELECT * FROM t FOR SHARE',
+            'UPDATE t SET a = 1',
+        ):
+            with self.subTest(sql=sql):
+                self.assertFalse(self.should_explain(sql))
+
+    def test_explain_analyze_never_applies_writes(self):
+        area = ProtectedArea.objects.create(name='Corcovado', code='CO')
+        table = ProtectedArea._meta.db_table
+        plan = slow_queries.explain_analyze(
+            connection,
+            f'WITH renamed AS (UPDATE {table} SET name = %s RETURNING id) SELECT * FROM renamed',
+            ['Otro'],
+        )
+        self.assertIn('Plan', plan[0])
+        area.refresh_from_db()
+        self.assertEqual(area.name, 'Corcovado')
+
+
+COMPLAINTS = EnvironmentalComplaint._meta.db_table
+TYPES = ComplaintType._meta.db_table
+
+
+def existing_index(name, columns, table=COMPLAINTS, method='btree', predicate='', include=(),
+                   unique=False, scans=1):
+    return index_advisor.ExistingIndex(
+        name=name, table=table, method=method, columns=tuple(columns), include=tuple(include),
+        opclasses=(3124,) * len(columns), predicate=predicate, unique=unique, constraint=unique,
+        expression=False, scans=scans, size=8192,
+    )
+
+
+class IndexAdvisorParseTests(SimpleTestCase):
+    C = f'"{COMPLAINTS}"'
+
+    def test_access_patterns(self):
+        c = self.C
+        cases = [
+            (
+                f'SELECT {c}."id", {c}."status" FROM {c} WHERE {c}."status" = %s '
+                f'ORDER BY {c}."created_at" DESC LIMIT 20',
+                {'equality': ('status',), 'order': (('created_at', True),), 'selected': {'id', 'status'}},
+            ),
+            (
+                f'SELECT {c}."id" FROM {c} WHERE ({c}."protected_area_id" IN (%s, %s) '
+                f'AND {c}."infraction_date" >= %s)',
+                {'equality': ('protected_area_id',), 'range_column': 'infraction_date'},
+            ),
+            (
+                f'SELECT {c}."id" FROM {c} WHERE {c}."created_at" BETWEEN %s AND %s',
+                {'range_column': 'created_at'},
+            ),
+            (
+                f'SELECT {c}."id" FROM {c} WHERE ({c}."archived_at" IS NULL AND {c}."status" = %s) '
+                f'ORDER BY {c}."infraction_date" DESC, {c}."id" ASC',
+                {'equality': ('archived_at', 'status'), 'order': (('infraction_date', True), ('id', False))},
+            ),
+            (
+                # Igualdad y rango sobre la misma columna: cuenta como igualdad
+                f'SELECT {c}."id" FROM {c} WHERE ({c}."status" = %s AND {c}."status" >= %s)',
+                {'equality': ('status',)},
+            ),
+        ]
+        for sql, expected in cases:
+            with self.subTest(sql=sql):
+                pattern = index_advisor.parse(sql, [COMPLAINTS])[COMPLAINTS]
+                self.assertEqual(pattern.equality, expected.get('equality', ()))
+                self.assertEqual(pattern.range_column, expected.get('range_column'))
+                self.assertEqual(pattern.order, expected.get('order', ()))
+                if 'selected' in expected:
+                    self.assertEqual(pattern.selected, expected['selected'])
+
+    def test_boolean_column_marks_active_only(self):
+        t = f'"{TYPES}"'
+        sql = f'SELECT {t}."id", {t}."name" FROM {t} WHERE {t}."is_active" ORDER BY {t}."name" ASC'
+
+        pattern = index_advisor.parse(sql, [TYPES])[TYPES]
+
+        self.assertTrue(pattern.active_only)
+        self.assertEqual((pattern.equality, pattern.order), ((), (('name', False),)))
+
+    def test_ignored_predicates(self):
+        c, s = self.C, f'"{Sector._meta.db_table}"'
+        cases = [
+            # Comparación entre columnas (JOIN), no con un valor
+            f'SELECT {c}."id" FROM {c} INNER JOIN {s} ON ({c}."sector_id" = {s}."id") WHERE {c}."sector_id" = {s}."id"',
+            # <> no es un rango
+            f'SELECT {c}."id" FROM {c} WHERE {c}."status" <> %s',
+            # Tabla que la consulta no usa
+            f'SELECT {s}."id" FROM {s} WHERE {s}."name" = %s',
+            # Sin WHERE ni ORDER BY
+            f'SELECT {c}."id" FROM {c} LIMIT 21',
+        ]
+        for sql in cases:
+            with self.subTest(sql=sql):
+                self.assertNotIn(COMPLAINTS, index_advisor.parse(sql, [COMPLAINTS]))
+
+    def test_seq_scans_walks_nested_plans(self):
+        plan = {'Node Type': 'Limit', 'Plans': [
+            {'Node Type': 'Nested Loop', 'Plans': [
+                {'Node Type': 'Seq Scan', 'Relation Name': COMPLAINTS, 'Filter': '(status = x)', 'Plan Rows': 40},
+                {'Node Type': 'Seq Scan', 'Relation Name': Sector._meta.db_table, 'Plan Rows': 3},
+                {'Node Type': 'Index Scan', 'Relation Name': COMPLAINTS},
+            ]},
+        ]}
+
+        self.assertEqual(index_advisor.seq_scans(plan, [COMPLAINTS]), [(COMPLAINTS, '(status = x)', 40)])
+
+
+class IndexAdvisorProposalTests(SimpleTestCase):
+    tables = {COMPLAINTS: EnvironmentalComplaint, TYPES: ComplaintType}
+
+    def workload(self, table=COMPLAINTS, **pattern):
+        return index_advisor.Workload(index_advisor.Pattern(table=table, **pattern), time_ms=10.0)
+
+    def propose(self, workloads, indexes=(), rows=None, column_stats=None):
+        return index_advisor.propose(
+            workloads, self.tables, list(indexes), rows or {}, column_stats or {}, brin_min_rows=1000,
+        )
+
+    def test_composite_index_equality_then_order(self):
+        proposal, = self.propose([self.workload(equality=('status',), order=(('created_at', True),))])
+
+        self.assertEqual(proposal.model, EnvironmentalComplaint)
+        self.assertEqual(proposal.index.fields, ['status', 'created_at'])
+        self.assertIsNone(proposal.index.condition)
+        self.assertTrue(proposal.index.name.endswith('_idx'))
+
+    def test_existing_or_covered_indexes_are_skipped(self):
+        workload = self.workload(equality=('status',), order=(('created_at', True),))
+        cases = [
+            ([existing_index('exacto', ['status', 'created_at'])], 0),
+            ([existing_index('mas_largo', ['status', 'created_at', 'id'])], 0),
+            ([existing_index('prefijo', ['status'])], 1),
+            ([existing_index('otro_orden', ['created_at', 'status'])], 1),
+            ([existing_index('gin', ['status', 'created_at'], method='gin')], 1),
+            ([existing_index('parcial', ['status', 'created_at'], predicate='(archived_at IS NULL)')], 1),
+            ([existing_index('otra_tabla', ['status', 'created_at'], table=TYPES)], 1),
+        ]
+        for indexes, expected in cases:
+            with self.subTest(index=indexes[0].name):
+                self.assertEqual(len(self.propose([workload], indexes)), expected)
+
+    def test_include_columns_must_be_covered(self):
+        workload = self.workload(equality=('status',), selected=frozenset({'status', 'sitada_number'}))
+
+        proposal, = self.propose([workload], [existing_index('sin_include', ['status'])])
+        self.assertEqual(proposal.index.include, ('sitada_number',))
+        self.assertEqual(
+            self.propose([workload], [existing_index('con_include', ['status'], include=['sitada_number'])]), []
+        )
+
+    def test_active_only_proposes_partial_index(self):
+        workload = self.workload(table=TYPES, order=(('name', False),), active_only=True)
+
+        proposal, = self.propose([workload])
+        self.assertEqual(proposal.index.condition, Q(is_active=True))
+        self.assertTrue(proposal.index.name.endswith('_pidx'))
+        covered = existing_index('activos', ['name'], table=TYPES, predicate='is_active')
+        self.assertEqual(self.propose([workload], [covered]), [])
+
+    def test_brin_for_correlated_range_on_large_table(self):
+        workload = self.workload(range_column='infraction_date')
+        stats = {(COMPLAINTS, 'infraction_date'): (5000, 0.97)}
+
+        proposal, = self.propose([workload], rows={COMPLAINTS: 50000}, column_stats=stats)
+        self.assertIsInstance(proposal.index, index_advisor.BrinIndex)
+        self.assertEqual(proposal.index.fields, ['infraction_date'])
+        self.assertEqual(
+            self.propose([workload], [existing_index('fecha', ['infraction_date'])],
+                         rows={COMPLAINTS: 50000}, column_stats=stats),
+            [],
+        )
+        # Tabla chica o sin correlación: B-tree
+        for rows, correlation in ((500, 0.97), (50000, 0.2)):
+            with self.subTest(rows=rows, correlation=correlation):
+                proposal, = self.propose(
+                    [workload], rows={COMPLAINTS: rows},
+                    column_stats={(COMPLAINTS, 'infraction_date'): (5000, correlation)},
+                )
+                self.assertNotIsInstance(proposal.index, index_advisor.BrinIndex)
+
+    def test_duplicate_workloads_propose_once(self):
+        workloads = [self.workload(equality=('status',)), self.workload(equality=('status',))]
+
+        self.assertEqual(len(self.propose(workloads)), 1)
+
+    def test_unused_and_redundant(self):
+        short = existing_index('corto', ['status'])
+        long = existing_index('largo', ['status', 'created_at'])
+        idle = existing_index('sin_uso', ['accused_name'], scans=0)
+        pkey = existing_index('pkey', ['id'], unique=True, scans=0)
+
+        unused, redundant = index_advisor.unused_and_redundant([short, long, idle, pkey])
+
+        self.assertEqual(unused, [idle])
+        self.assertEqual(redundant, [(short, long)])
+
+    def test_project_tables_skip_unmanaged_models(self):
+        tables = index_advisor.project_tables()
+
+        self.assertIs(tables[COMPLAINTS], EnvironmentalComplaint)
+        self.assertNotIn(ComplaintRecord._meta.db_table, tables)
+        self.assertFalse(any(model._meta.app_label == 'auth' for model in tables.values()))
+
+
+failures = []
+
+
+@jobs.task(name='core.tests.add')
+def add(a, b):
+    return a + b
+
+
+@jobs.task(name='core.tests.explode', max_attempts=2, on_failure=lambda *args: failures.append(args))
+def explode(code):
+    raise ValueError(f'falla {code}')
+
+
+@jobs.task(name='core.tests.unserializable')
+def unserializable():
+    failures.append('ejecutada')
+    return object()
+
+
+@jobs.task(name='core.tests.stop_worker')
+def stop_worker():
+    # Como ``docker stop``: el proceso recibe SIGTERM con el trabajo en curso
+    os.kill(os.getpid(), signal.SIGTERM)
+    return 'detenido'
+
+
+@override_settings(JOBS_RUN_INLINE=False, JOBS_RETRY_DELAY_SECONDS=30, JOBS_STALE_SECONDS=300)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        failures.clear()
+
+    def test_claim_takes_ready_jobs_by_priority(self):
+        low = add.delay(1, 2)
+        high = add.enqueue(args=(3, 4), priority=5)
+        add.enqueue(args=(5, 6), countdown=600)
+        add.enqueue(args=(7, 8), queue='exports')
+
+        self.assertEqual(jobs.claim('w:1', ['default']).pk, high.pk)
+        job = jobs.claim('w:2', ['default'])
+        self.assertEqual(job.pk, low.pk)
+        self.assertEqual((job.status, job.attempts, job.locked_by), ('running', 1, 'w:2'))
+        self.assertIsNone(jobs.claim('w:3', ['default']))
+
+    def test_execute_stores_result(self):
+        add.delay(2, 3)
+        self.assertTrue(jobs.execute(jobs.claim('w:1', ['default'])))
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.result, job.locked_by), ('succeeded', 5, ''))
+
+    def test_unserializable_result_fails_without_retry(self):
+        unserializable.delay()
+
+        with self.assertLogs('acat.jobs', level='ERROR'):
+            self.assertFalse(jobs.execute(jobs.claim('w:1', ['default'])))
+
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.locked_by, job.result), ('failed', '', None))
+        self.assertIn('JSON', job.last_error)
+        Job.objects.update(run_at=timezone.now())
+        jobs.requeue_stale()
+        self.assertIsNone(jobs.claim('w:1', ['default']))
+        self.assertEqual(failures, ['ejecutada'])
+
+    @override_settings(JOBS_RUN_INLINE=True)
+    def test_run_inline_executes_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            job = add.delay(4, 5)
+        self.assertEqual(Job.objects.get().status, 'queued')
+
+        for callback in callbacks:
+            callback()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.attempts), ('succeeded', 9, 1))
+
+    def test_failure_retries_with_backoff(self):
+        explode.delay(1)
+        before = timezone.now()
+        self.assertFalse(jobs.execute(jobs.claim('w:1', ['default'])))
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts, job.locked_by), ('queued', 1, ''))
+        self.assertIn('falla 1', job.last_error)
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=30))
+        self.assertIsNone(jobs.claim('w:1', ['default']))
+
+        Job.objects.update(run_at=timezone.now())
+        jobs.execute(jobs.claim('w:1', ['default']))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertEqual(failures, [(1,)])
+
+    def test_requeue_stale(self):
+        old = timezone.now() - timedelta(seconds=600)
+        retry = add.delay(1, 1)
+        exhausted = explode.delay(2)
+        fresh = add.delay(2, 2)
+        Job.objects.filter(pk=retry.pk).update(status='running', attempts=1, heartbeat_at=old, locked_by='w:1')
+        Job.objects.filter(pk=exhausted.pk).update(status='running', attempts=2, heartbeat_at=old, locked_by='w:2')
+        Job.objects.filter(pk=fresh.pk).update(status='running', attempts=1, heartbeat_at=timezone.now())
+
+        jobs.requeue_stale()
+
+        statuses = dict(Job.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses, {retry.pk: 'queued', exhausted.pk: 'failed', fresh.pk: 'running'})
+        self.assertEqual(failures, [(2,)])
+
+    def test_heartbeat_only_refreshes_jobs_in_progress(self):
+        old = timezone.now() - timedelta(seconds=600)
+        held = add.delay(1, 1)
+        orphan = add.delay(2, 2)
+        Job.objects.filter(pk=held.pk).update(status='running', heartbeat_at=old, locked_by='w:1')
+        Job.objects.filter(pk=orphan.pk).update(status='running', heartbeat_at=old, locked_by='w:2')
+
+        with mock.patch.dict(jobs._running, {'w:1': held.pk}):
+            jobs.heartbeat()
+
+        held.refresh_from_db()
+        orphan.refresh_from_db()
+        self.assertGreater(held.heartbeat_at, old)
+        self.assertEqual(orphan.heartbeat_at, old)
+
+    def test_worker_survives_unrecorded_result(self):
+        add.delay(1, 1)
+        add.delay(2, 2)
+        stop = threading.Event()
+        executed = []
+
+        def broken_execute(job):
+            executed.append(job.pk)
+            if len(executed) == 2:
+                stop.set()
+            raise TypeError('resultado no serializable')
+
+        with mock.patch.object(jobs, 'execute', broken_execute), \
+                mock.patch.object(jobs, 'close_old_connections'), \
+                mock.patch.object(jobs, 'connection'), \
+                self.assertLogs('acat.jobs', level='ERROR'):
+            jobs.work('w:1', ['default'], stop)
+
+        self.assertEqual(len(executed), 2)
+        self.assertEqual(jobs._running, {})
+
+
+@override_settings(JOBS_RUN_INLINE=False, JOBS_POLL_SECONDS=0.05)
+class JobWorkerTests(TransactionTestCase):
+    def test_claim_skips_jobs_locked_by_another_worker(self):
+        first = add.delay(1, 1)
+        second = add.delay(2, 2)
+        locked, release = threading.Event(), threading.Event()
+        other = []
+
+        def other_worker():
+            try:
+                # El trabajo queda bloqueado hasta que termine la transacción
+                with transaction.atomic():
+                    other.append(jobs.claim('w:2', ['default']).pk)
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=other_worker)
+        thread.start()
+        self.assertTrue(locked.wait(10))
+        try:
+            claimed = jobs.claim('w:1', ['default'])
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(other, [first.pk])
+        self.assertEqual(claimed.pk, second.pk)
+
+    def test_serve_finishes_current_job_on_sigterm(self):
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            self.addCleanup(signal.signal, signum, signal.getsignal(signum))
+        job = stop_worker.delay()
+
+        with mock.patch.object(run_workers, 'change_listener'), \
+                mock.patch.object(jobs, 'HEARTBEAT_SECONDS', 0.05):
+            run_workers.serve(1, ['default'])
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.locked_by), ('succeeded', 'detenido', ''))
+
+    @override_settings(JOBS_RUN_INLINE=True)
+    def test_command_refuses_inline_mode(self):
+        with self.assertRaisesMessage(CommandError, 'JOBS_RUN_INLINE'):
+            call_command('run_workers')
+
+    def test_command_validates_counts(self):
+        with self.assertRaisesMessage(CommandError, 'al menos 1'):
+            call_command('run_workers', threads=0)
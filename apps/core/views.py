@@ -1,3 +1,76 @@
-from django.shortcuts import render
+import ipaddress
 
-# Create your views here.
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+
+from apps.core import health as health_checks
+
+
+def _client_allowed(request, networks):
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network) for network in networks)
+
+
+@require_GET
+def metrics(request):
+    """
+    Métricas en formato de exposición de Prometheus
+
+    Solo se atiende a clientes de las redes internas configuradas; nginx
+    además bloquea la ruta desde el exterior.
+    """
+    if not _client_allowed(request, settings.METRICS_ALLOWED_NETWORKS):
+        return HttpResponseForbidden()
+
+    from prometheus_client import CONTENT_TYPE_LATEST
+    from apps.core import metrics as metrics_registry
+
+    return HttpResponse(metrics_registry.render_latest(), content_type=CONTENT_TYPE_LATEST)
+
+
+@never_cache
+@require_GET
+def auth_check(request):
+    """
+    Subrequest ``auth_request`` de nginx: 204 si la sesión o las credenciales
+    básicas corresponden a un usuario autenticado, 401 si no. Protege las
+    respuestas ``shared`` del microcaché (ver apps.core.http_cache).
+    """
+    user = request.user
+    if not user.is_authenticated and 'HTTP_AUTHORIZATION' in request.META:
+        from rest_framework.authentication import BasicAuthentication
+        from rest_framework.exceptions import AuthenticationFailed
+
+        try:
+            result = BasicAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            result = None
+        user = result[0] if result else user
+    return HttpResponse(status=204 if user.is_authenticated else 401)
+
+
+@never_cache
+@require_GET
+def health(request):
+    """
+    Liveness: el proceso responde; no consulta dependencias externas
+    """
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+@require_GET
+def ready(request):
+    """
+    Readiness: base de datos, PostGIS y Redis con timeouts acotados
+    """
+    healthy, checks = health_checks.readiness()
+    return JsonResponse(
+        {'status': 'ok' if healthy else 'error', 'checks': checks},
+        status=200 if healthy else 503,
+    )
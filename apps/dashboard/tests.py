@@ -1,3 +1,30 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from apps.complaints.testing import QueryScalingTestCase
+
+
+class DashboardQueryScalingTests(QueryScalingTestCase):
+    def test_home(self):
+        # Sesión y usuario, dos conteos, refdata en frío (4), por estado y últimas
+        self.assertQueryCountConstant(reverse('dashboard:home'), 10)
+
+    def test_home_uses_indexes(self):
+        self.assertUsesIndexes(reverse('dashboard:home'))
+
+    def test_stats(self):
+        self.assertQueryCountConstant(reverse('dashboard:stats'), 4)
+
+    def test_map(self):
+        self.assertQueryCountConstant(reverse('dashboard:map'), 6)
+
+    def test_map_data(self):
+        # Sin sesión: fotos, denuncias y refdata en frío (4)
+        self.assertQueryCountConstant(reverse('dashboard:map-data'), 6)
+
+    def test_map_data_is_never_public(self):
+        # Imputados y números SITADA: solo el microcaché protegido de nginx
+        response = self.client.get(reverse('dashboard:map-data'))
+
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotIn('public', response['Cache-Control'])
+        self.assertEqual(response['X-Accel-Expires'], '60')
@@ -8,5 +8,6 @@ urlpatterns = [
     path('', views.DashboardView.as_view(), name='home'),
     path('estadisticas/', views.StatsView.as_view(), name='stats'),
     path('mapa/', views.MapView.as_view(), name='map'),
+    path('mapa/datos/', views.MapDataView.as_view(), name='map-data'),
     path('test-map/', TemplateView.as_view(template_name='test_map.html'), name='test_map'),
 ]
@@ -1,12 +1,21 @@
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.views import View
 from django.views.generic import TemplateView
 from django.db.models import Count, Q
-from apps.complaints.models import EnvironmentalComplaint, ComplaintType
+from apps.complaints.evidence import derivative_urls
+from apps.complaints.models import EnvironmentalComplaint, ComplaintType, EvidencePhoto
+from apps.core import refdata
+from apps.core.db_routing import read_replica
+from apps.core.http_cache import cache_policy
 from apps.core.models import ProtectedArea
 from django.utils import timezone
 from datetime import timedelta
 
 
+# Páginas con el nombre del usuario en la barra: solo caché del navegador
+@read_replica
+@cache_policy('private', max_age=30)
 class DashboardView(TemplateView):
     template_name = 'dashboard/home.html'
     
@@ -15,7 +24,7 @@ class DashboardView(TemplateView):
         
         # Estadísticas básicas
         context['total_complaints'] = EnvironmentalComplaint.objects.count()
-        context['total_protected_areas'] = ProtectedArea.objects.count()
+        context['total_protected_areas'] = len(refdata.all_objects(ProtectedArea, active_only=True))
         
         # Denuncias por estado
         context['complaints_by_status'] = EnvironmentalComplaint.objects.values(
@@ -41,6 +50,8 @@ class DashboardView(TemplateView):
         return context
 
 
+@read_replica
+@cache_policy('private', max_age=60)
 class StatsView(TemplateView):
     template_name = 'dashboard/stats.html'
     
@@ -50,7 +61,7 @@ class StatsView(TemplateView):
         # Estadísticas detalladas por mes
         context['monthly_stats'] = self.get_monthly_stats()
         context['complaint_types'] = ComplaintType.objects.annotate(
-            complaint_count=Count('environmentalcomplaint')
+            complaint_count=Count('complaints', filter=Q(complaints__is_active=True))
         ).order_by('-complaint_count')
         
         return context
@@ -66,37 +77,58 @@ class StatsView(TemplateView):
         ).order_by('month')
 
 
+@read_replica
+@cache_policy('private', max_age=30)
 class MapView(TemplateView):
     template_name = 'dashboard/map.html'
     
     def get_context_data(self, **kwargs):
-        import json
-        from django.core.serializers.json import DjangoJSONEncoder
         context = super().get_context_data(**kwargs)
-        
-        # Obtener denuncias con coordenadas para el mapa
+        # Las denuncias se cargan desde MapDataView, cacheada por nginx
+        context['protected_areas'] = refdata.all_objects(ProtectedArea, active_only=True)
+        return context
+
+
+@read_replica
+@cache_policy('shared', max_age=60, stale_while_revalidate=300)
+class MapDataView(View):
+    """
+    Denuncias con ubicación para el mapa, en JSON. Es igual para todos los
+    usuarios autenticados, así que nginx la sirve desde su microcaché detrás
+    de ``auth_request``; incluye imputados y números SITADA, por eso nunca
+    es ``public``.
+    """
+    
+    def get(self, request, *args, **kwargs):
         complaints_queryset = EnvironmentalComplaint.objects.filter(
             location__isnull=False
-        ).select_related('protected_area', 'complaint_type')
+        )
+        
+        # Primera foto lista de cada denuncia; el popup solo carga la miniatura
+        first_photos = {}
+        for complaint_id, content_hash in EvidencePhoto.objects.filter(
+            status='ready', complaint__location__isnull=False
+        ).order_by('complaint_id', 'created_at').values_list('complaint_id', 'content_hash'):
+            first_photos.setdefault(complaint_id, content_hash)
         
-        # Convertir a lista de diccionarios para JSON
         complaints_data = []
         for complaint in complaints_queryset:
+            complaint_type = refdata.lookup(ComplaintType, complaint.complaint_type_id)
+            protected_area = refdata.lookup(ProtectedArea, complaint.protected_area_id)
             complaints_data.append({
                 'id': complaint.id,
                 'sitada': complaint.sitada_number or 'Sin SITADA',
                 'accused': complaint.accused_name,
-                'type': complaint.complaint_type.name if complaint.complaint_type else 'Sin tipo',
-                'area': complaint.protected_area.name if complaint.protected_area else 'Sin área',
+                'type': complaint_type.name if complaint_type else 'Sin tipo',
+                'area': protected_area.name if protected_area else 'Sin área',
                 'status': complaint.status,
                 'date': complaint.created_at.strftime('%d/%m/%Y'),
                 'description': complaint.description[:100] if complaint.description else '',
-                'location': str(complaint.location)  # Convert to string
+                'location': str(complaint.location),  # Convert to string
+                'thumbnail': (
+                    derivative_urls(first_photos[complaint.id])['thumb']['jpeg']
+                    if complaint.id in first_photos else None
+                ),
             })
         
-        # Serializar a JSON para usar en JavaScript
-        context['complaints_json'] = json.dumps(complaints_data, cls=DjangoJSONEncoder)
-        context['complaints_with_location'] = complaints_data  # Para el contador
-        context['protected_areas'] = ProtectedArea.objects.all()
-        
-        return context
+        return JsonResponse({'complaints': complaints_data, 'count': len(complaints_data)})
@@ -22,7 +22,6 @@ area, created = ProtectedArea.objects.get_or_create(
     name="Parque Nacional Volcán Arenal",
     defaults={
         'code': 'PNVA',
-        'area_type': 'PARQUE_NACIONAL',
         'description': 'Parque Nacional Volcán Arenal'
     }
 )
@@ -32,7 +31,6 @@ Sector.objects.get_or_create(
     name="Sector Norte", 
     protected_area=area,
     defaults={
-        'code': 'PNVA-N',
         'description': 'Sector Norte del parque'
     }
 )
@@ -26,6 +26,12 @@ fi
 
 echo "✅ Environment variables validated"
 
+# Every manage.py process below imports the Prometheus metrics module, which
+# needs the multiprocess directory to exist (e.g. /tmp on a fresh container)
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 # Wait for PostgreSQL to be ready
 echo "🔍 Waiting for PostgreSQL to be ready..."
 while ! pg_isready -h $DB_HOST -p $DB_PORT -U $DB_USER; do
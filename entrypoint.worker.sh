@@ -0,0 +1,29 @@
+#!/bin/bash
+set -e
+
+# ACAT System - Staging worker entrypoint
+# The web container (entrypoint.staging.sh) owns migrations, the superuser and
+# collectstatic; the worker only waits for the database and its schema.
+
+echo "🚀 ACAT System - Staging worker startup"
+
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
+echo "🔍 Waiting for PostgreSQL to be ready..."
+while ! pg_isready -h $DB_HOST -p $DB_PORT -U $DB_USER; do
+    echo "⏳ PostgreSQL is unavailable - sleeping for 2 seconds"
+    sleep 2
+done
+echo "✅ PostgreSQL is ready!"
+
+# The job tables come from migrations applied by the web container
+echo "🔍 Waiting for database migrations..."
+while ! python manage.py migrate --check > /dev/null 2>&1; do
+    echo "⏳ Migrations pending - sleeping for 5 seconds"
+    sleep 5
+done
+echo "✅ Database schema is up to date"
+
+exec "$@"
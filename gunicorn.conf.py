@@ -0,0 +1,39 @@
+"""
+Gunicorn configuration for ACAT System
+
+Gunicorn loads ./gunicorn.conf.py automatically; options given on the command
+line (Dockerfile CMD) still take precedence over the values below.
+"""
+
+import os
+import shutil
+
+# Prometheus multiprocess mode: every worker writes its metrics to mmap files
+# in this directory and /metrics aggregates them on each scrape.
+_prometheus_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+
+def on_starting(server):
+    # Stale files from a previous run would be summed into the new counters
+    if _prometheus_dir:
+        shutil.rmtree(_prometheus_dir, ignore_errors=True)
+        os.makedirs(_prometheus_dir, exist_ok=True)
+
+
+def pre_fork(server, worker):
+    # Stable worker ids (0..workers-1) keep the metric label cardinality bounded
+    used = {getattr(w, 'acat_worker_id', None) for w in server.WORKERS.values()}
+    worker.acat_worker_id = next(i for i in range(len(used) + 1) if i not in used)
+
+
+def post_fork(server, worker):
+    os.environ['ACAT_WORKER_ID'] = str(worker.acat_worker_id)
+    # Imported only now so WORKER_ID picks up the id set above
+    from apps.core import metrics
+    metrics.mark_worker_alive()
+
+
+def child_exit(server, worker):
+    if _prometheus_dir:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -63,20 +63,19 @@ def create_basic_data():
     
     # Crear áreas protegidas
     protected_areas = [
-        ("Parque Nacional Volcán Arenal", "PN", "PARQUE_NACIONAL"),
-        ("Refugio Nacional de Vida Silvestre Caño Negro", "RNVS", "REFUGIO"),
-        ("Reserva Biológica Alberto Brenes", "RB", "RESERVA_BIOLOGICA"),
-        ("Parque Nacional Tenorio", "PN", "PARQUE_NACIONAL"),
-        ("Zona Protectora Arenal", "ZP", "ZONA_PROTECTORA")
+        ("Parque Nacional Volcán Arenal", "PNVA"),
+        ("Refugio Nacional de Vida Silvestre Caño Negro", "RNVSCN"),
+        ("Reserva Biológica Alberto Manuel Brenes", "RBAMB"),
+        ("Parque Nacional Volcán Tenorio", "PNVT"),
+        ("Zona Protectora Arenal-Monteverde", "ZPAM")
     ]
     
     print("🏞️ Creando áreas protegidas...")
-    for name, code, area_type in protected_areas:
+    for name, code in protected_areas:
         obj, created = ProtectedArea.objects.get_or_create(
-            name=name,
+            code=code,
             defaults={
-                'code': code,
-                'area_type': area_type,
+                'name': name,
                 'description': f'Área protegida: {name}'
             }
         )
@@ -97,7 +96,6 @@ def create_basic_data():
                 name=sector_name,
                 protected_area=area,
                 defaults={
-                    'code': f"{area.code}-{sector_name.split()[1][0]}",
                     'description': f'Sector de {area.name}'
                 }
             )
@@ -5,11 +5,11 @@ set -e
 
 # Configuration
 DJANGO_URL="http://localhost:8000"
-MAX_RESPONSE_TIME=30
+MAX_RESPONSE_TIME=10
 
 echo "🏥 ACAT Staging Health Check"
 
-# Check if Django is responding
+# Liveness: the Django process answers
 echo "🔍 Checking Django application..."
 RESPONSE=$(curl -s -o /dev/null -w "%{http_code}:%{time_total}" --max-time $MAX_RESPONSE_TIME "$DJANGO_URL/health/" || echo "000:999")
 HTTP_CODE=$(echo $RESPONSE | cut -d: -f1)
@@ -22,48 +22,19 @@ else
     exit 1
 fi
 
-# Check database connectivity
-echo "🔍 Checking database connectivity..."
-python manage.py shell -c "
-from django.db import connection
-try:
-    cursor = connection.cursor()
-    cursor.execute('SELECT 1')
-    result = cursor.fetchone()
-    if result[0] == 1:
-        print('✅ Database connection is healthy')
-    else:
-        print('❌ Database query failed')
-        exit(1)
-except Exception as e:
-    print(f'❌ Database connection failed: {e}')
-    exit(1)
-" 2>/dev/null
+# Readiness: database, PostGIS and Redis are checked in-process by /ready/
+# (bounded timeouts, result cached for a few seconds) instead of booting
+# separate "manage.py shell" interpreters.
+echo "🔍 Checking database, PostGIS and Redis..."
+READY_BODY=$(mktemp)
+HTTP_CODE=$(curl -s -o "$READY_BODY" -w "%{http_code}" --max-time $MAX_RESPONSE_TIME "$DJANGO_URL/ready/" || echo "000")
+echo "   $(cat "$READY_BODY")"
+rm -f "$READY_BODY"
 
-if [ $? -ne 0 ]; then
-    echo "❌ Database health check failed"
-    exit 1
-fi
-
-# Check Redis connectivity
-echo "🔍 Checking Redis connectivity..."
-python manage.py shell -c "
-from django.core.cache import cache
-try:
-    cache.set('health_check', 'ok', 60)
-    result = cache.get('health_check')
-    if result == 'ok':
-        print('✅ Redis connection is healthy')
-    else:
-        print('❌ Redis operation failed')
-        exit(1)
-except Exception as e:
-    print(f'❌ Redis connection failed: {e}')
-    exit(1)
-" 2>/dev/null
-
-if [ $? -ne 0 ]; then
-    echo "❌ Redis health check failed"
+if [ "$HTTP_CODE" = "200" ]; then
+    echo "✅ Dependencies are ready"
+else
+    echo "❌ Readiness check failed (HTTP: $HTTP_CODE)"
     exit 1
 fi
 
@@ -12,5 +12,9 @@ WHERE NOT EXISTS (SELECT FROM pg_database WHERE datname = 'acat_system_dev')\gex
 CREATE EXTENSION IF NOT EXISTS postgis;
 CREATE EXTENSION IF NOT EXISTS postgis_topology;
 
+-- Query statistics (requires shared_preload_libraries=pg_stat_statements,
+-- see docker-compose). Used by "manage.py query_attribution".
+CREATE EXTENSION IF NOT EXISTS pg_stat_statements;
+
 -- Grant permissions to user
 GRANT ALL PRIVILEGES ON DATABASE acat_system_dev TO acat_user;